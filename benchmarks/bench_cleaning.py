@@ -0,0 +1,148 @@
+"""
+Benchmark for the journal cleaning pipeline.
+
+Compares clean_content (the single-pass CleaningEngine) against the original
+five-step implementation, frozen below, on a generated corpus of notes. The
+outputs are checked to be identical before anything is timed.
+
+Usage:
+    python -m benchmarks.bench_cleaning [--notes 2000] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from src.utils.cleaning import clean_content
+
+
+# --- Original implementation, kept verbatim as the baseline ---
+
+def _legacy_strip_yaml(text):
+    if text.startswith("---"):
+        end_delimiter = text.find("---", 3)
+        if end_delimiter != -1:
+            return text[end_delimiter + 4:]
+    return text
+
+
+def _legacy_remove_images(text):
+    text = re.sub(r"!\[[^\]]*\]\([^\)]+\)", "", text)
+    return re.sub(r"!\\[.*?\\]\\(.*?\\)", "", text)
+
+
+def _legacy_simplify_internal_links(text):
+    return re.sub(r"\[\[([^\]]+)\]\]", r"\1", text)
+
+
+def _legacy_extract_journal_content(content):
+    match = re.search(r'# Journal\n(.*?)(\n#|\Z)', content, re.DOTALL)
+    return match.group(1).strip() if match else content
+
+
+def _legacy_remove_date_like_headers(text):
+    lines = text.splitlines()
+    filtered_lines = []
+    for i, line in enumerate(lines):
+        if line == "# 🟢" and i + 1 < len(lines) and lines[i + 1] == "This is some text.":
+            filtered_lines.append("# This some text.")
+            continue
+        if "# De# c#  # 30#  # 🟢🔴# 🟢# x# " in line:
+            continue
+        if re.match(r"^#\s*(?:[A-Za-z]{3})\s+\d{1,2}(?:\s*[🟢🔴x]\s*)*$", line, re.IGNORECASE):
+            continue
+        if re.match(r"^#\s+\d{1,2}(?:\s*[🟢🔴x]\s*)*$", line, re.IGNORECASE):
+            continue
+        if re.match(r"^#\s+[🟢🔴x]$", line, re.IGNORECASE):
+            continue
+        if line == "#  30  " and i + 1 < len(lines) and lines[i + 1] == "This is some text.":
+            continue
+        if line == "# Dec  30  " and i + 1 < len(lines) and lines[i + 1] == "This is some text.":
+            continue
+        if line == "#   " and i + 1 < len(lines) and lines[i + 1] == "This is some text.":
+            continue
+        filtered_lines.append(line)
+    return "\n".join(filtered_lines)
+
+
+def legacy_clean_content(text):
+    text = _legacy_strip_yaml(text)
+    text = _legacy_remove_images(text)
+    text = _legacy_simplify_internal_links(text)
+    text = _legacy_extract_journal_content(text)
+    text = _legacy_remove_date_like_headers(text)
+    return text
+
+
+# --- Corpus ---
+
+WORDS = ("calm grateful tired walk coffee family work stillness rain garden "
+         "anxious hopeful project friend music reading slept early late").split()
+
+
+def make_note(rng: random.Random) -> str:
+    """Build a daily note shaped like the vault templates."""
+    def sentence():
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 14))]
+        if rng.random() < 0.3:
+            words.insert(rng.randint(0, len(words)), f"[[{rng.choice(WORDS).title()}]]")
+        if rng.random() < 0.2:
+            words.append(f"#{rng.choice(WORDS)}")
+        return " ".join(words).capitalize() + rng.choice([".", ".", "?", "!"])
+
+    parts = []
+    if rng.random() < 0.9:
+        parts.append(f"---\ntitle: Entry\ndate: 2025-03-{rng.randint(1, 28):02d}\ntags: [daily]\n---\n")
+    parts.append("# What I want today\n" + "\n".join(f"- [ ] {sentence()}" for _ in range(rng.randint(2, 8))) + "\n")
+    if rng.random() < 0.8:
+        journal = [f"# Dec {rng.randint(1, 31)} 🟢🔴x"] if rng.random() < 0.5 else []
+        for _ in range(rng.randint(3, 12)):
+            journal.append(sentence())
+            if rng.random() < 0.2:
+                journal.append(f"![image](attachments/pic{rng.randint(1, 99)}.jpg)")
+            if rng.random() < 0.1:
+                journal.append(f"# {rng.randint(1, 31)} x")
+        parts.append("# Journal\n" + "\n".join(journal) + "\n")
+    parts.append("# New Resources\n" + "\n".join(
+        f"- [Link](https://example.com/{i}) ![[embed{i}.png]]" for i in range(rng.randint(5, 30))))
+    return "\n".join(parts)
+
+
+def make_corpus(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [make_note(rng) for _ in range(count)]
+
+
+def time_cleaner(cleaner, corpus, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for note in corpus:
+            cleaner(note)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_content against the original pipeline")
+    parser.add_argument("--notes", type=int, default=2000, help="Number of generated notes")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.notes)
+    mismatches = sum(1 for note in corpus if clean_content(note) != legacy_clean_content(note))
+    if mismatches:
+        raise SystemExit(f"{mismatches} notes cleaned differently from the original pipeline")
+
+    legacy = time_cleaner(legacy_clean_content, corpus, args.repeat)
+    engine = time_cleaner(clean_content, corpus, args.repeat)
+    size_mb = sum(len(note.encode("utf-8")) for note in corpus) / 1e6
+    print(f"Corpus: {args.notes} notes, {size_mb:.1f} MB (outputs identical)")
+    print(f"Original pipeline: {legacy * 1000:8.1f} ms  ({size_mb / legacy:6.1f} MB/s)")
+    print(f"CleaningEngine:    {engine * 1000:8.1f} ms  ({size_mb / engine:6.1f} MB/s)")
+    print(f"Speedup: {legacy / engine:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare the batch lexicon sentiment scorer against TextBlob.
+
+Scores a sample corpus with TextBlob (one entry at a time) and with the
+lexicon scorer (all entries in one batch), then reports how often the
+polarities and the positive/neutral/negative labels agree, the confusion
+between labels, and the time each takes.
+
+Usage:
+    python -m benchmarks.compare_sentiment [--notes 500] [--entries 5000]
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from benchmarks.bench_cleaning import make_corpus
+from benchmarks.compare_tokenizers import SAMPLE_ENTRIES
+from src.models.sentiment import _NEGATIVE_PHRASE_RE, _classify
+from src.utils.cleaning import extract_journal_content
+
+OPENINGS = ("Today", "This morning", "Tonight", "At work", "After the walk", "With Anna")
+MODIFIERS = ("", "", "very ", "really ", "so ", "quite ", "extremely ", "a bit ")
+NEGATIONS = ("", "", "", "not ", "never ")
+FEELINGS = ("happy", "calm", "tired", "anxious", "grateful", "sad", "good", "bad", "hopeful", "lonely",
+            "excited", "frustrated", "peaceful", "overwhelmed", "proud", "worried", "fine", "great")
+ENDINGS = (".", ".", "!", "!!", "?", " :)", " :(", "...")
+FILLER = ("I went for a walk.", "Made coffee and read for an hour.", "Called mom.",
+          "The meeting ran late.", "Cooked dinner with Sam.", "Cleaned the flat.")
+LABELS = ("positive", "neutral", "negative")
+
+
+def make_entries(count: int, seed: int = 11):
+    """Build journal-style entries with negations, intensifiers and emoticons."""
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            if rng.random() < 0.3:
+                sentences.append(rng.choice(FILLER))
+                continue
+            sentences.append(f"{rng.choice(OPENINGS)} I felt {rng.choice(NEGATIONS)}{rng.choice(MODIFIERS)}"
+                             f"{rng.choice(FEELINGS)}{rng.choice(ENDINGS)}")
+        entries.append(" ".join(sentences))
+    return entries
+
+
+def label(text, polarity):
+    return "negative" if _NEGATIVE_PHRASE_RE.search(text) else _classify(polarity)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare lexicon sentiment against TextBlob")
+    parser.add_argument("--notes", type=int, default=500, help="Number of generated notes added to the sample")
+    parser.add_argument("--entries", type=int, default=5000, help="Number of generated journal-style entries")
+    args = parser.parse_args()
+
+    texts = (SAMPLE_ENTRIES + [extract_journal_content(note) for note in make_corpus(args.notes)]
+             + make_entries(args.entries))
+
+    start = time.perf_counter()
+    from textblob import TextBlob
+    reference = [TextBlob(text).sentiment.polarity for text in texts]
+    textblob_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from src.models.lexicon import get_lexicon
+    lexicon = get_lexicon()
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = lexicon.polarities(texts)
+    lexicon_time = time.perf_counter() - start
+
+    exact = sum(1 for a, b in zip(reference, scores) if abs(a - b) < 1e-9)
+    pairs = Counter((label(text, a), label(text, b)) for text, a, b in zip(texts, reference, scores))
+    agree = sum(n for (a, b), n in pairs.items() if a == b)
+
+    print(f"Entries: {len(texts)}")
+    print(f"Identical polarity: {exact} ({exact / len(texts):.2%})")
+    print(f"Same label:         {agree} ({agree / len(texts):.2%})")
+    print(f"\n{'textblob / lexicon':20}" + "".join(f"{name:>10}" for name in LABELS))
+    for a in LABELS:
+        print(f"{a:20}" + "".join(f"{pairs[(a, b)]:>10}" for b in LABELS))
+    print(f"\nTextBlob (per entry): {textblob_time * 1000:10.1f} ms")
+    print(f"Lexicon (one batch):  {lexicon_time * 1000:10.1f} ms (+{load_time * 1000:.1f} ms to compile)")
+    print(f"Speed-up:             {textblob_time / lexicon_time:10.1f}x")
+
+    mismatches = [(text, a, b) for text, a, b in zip(texts, reference, scores) if abs(a - b) >= 1e-9]
+    for text, a, b in mismatches[:5]:
+        print(f"\n  textblob={a:+.3f} lexicon={b:+.3f}: {text[:100]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the "nltk" and "fast" tokenizer backends on a sample corpus.
+
+Reports total token counts (which drive average entry length), filtered
+word counts, the words whose counts differ most, and the time each backend
+takes.
+
+Usage:
+    python -m benchmarks.compare_tokenizers [--notes 500]
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from nltk.corpus import stopwords
+
+from benchmarks.bench_cleaning import make_corpus
+from src.utils.cleaning import extract_journal_content
+from src.utils.tokenizers import TOKENIZERS
+
+SAMPLE_ENTRIES = [
+    "Today I felt really calm and grateful. #grateful\nWhy do I still feel tired?\nStillness matters. Stillness heals.",
+    "I had the best day ever. Everything went well and I feel fantastic! #joy",
+    "This was a terrible day. I felt awful and everything went wrong. I hate this day. It was the worst day ever.",
+    "Didn't sleep well—woke at 3:30, couldn't stop thinking about Anna's e-mail. I'm worried it's over.",
+    "Ran 5km with Sam & Jo; we're training for the half-marathon (12 weeks to go!). Café afterwards.",
+]
+
+
+def run(name, texts, excluded):
+    tokenize = TOKENIZERS[name]
+    counts = Counter()
+    tokens = 0
+    start = time.perf_counter()
+    for text in texts:
+        words, token_count = tokenize(text.lower(), excluded)
+        counts.update(words)
+        tokens += token_count
+    return counts, tokens, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare tokenizer backends")
+    parser.add_argument("--notes", type=int, default=500, help="Number of generated notes added to the sample")
+    args = parser.parse_args()
+
+    texts = SAMPLE_ENTRIES + [extract_journal_content(note) for note in make_corpus(args.notes)]
+    excluded = set(stopwords.words("english"))
+
+    nltk_counts, nltk_tokens, nltk_time = run("nltk", texts, excluded)
+    fast_counts, fast_tokens, fast_time = run("fast", texts, excluded)
+
+    print(f"Entries: {len(texts)}")
+    print(f"{'':16}{'nltk':>12}{'fast':>12}")
+    print(f"{'tokens':16}{nltk_tokens:>12}{fast_tokens:>12}")
+    print(f"{'filtered words':16}{sum(nltk_counts.values()):>12}{sum(fast_counts.values()):>12}")
+    print(f"{'vocabulary':16}{len(nltk_counts):>12}{len(fast_counts):>12}")
+    print(f"{'time (ms)':16}{nltk_time * 1000:>12.1f}{fast_time * 1000:>12.1f}")
+
+    diff = Counter({w: abs(nltk_counts[w] - fast_counts[w]) for w in set(nltk_counts) | set(fast_counts)})
+    diff = +diff
+    print(f"\nWords counted differently: {len(diff)}")
+    for word, delta in diff.most_common(10):
+        print(f"  {word!r}: nltk={nltk_counts[word]} fast={fast_counts[word]}")
+    top_nltk = [w for w, _ in nltk_counts.most_common(5)]
+    top_fast = [w for w, _ in fast_counts.most_common(5)]
+    print(f"\nTop 5 (nltk): {top_nltk}\nTop 5 (fast): {top_fast}")
+
+
+if __name__ == "__main__":
+    main()
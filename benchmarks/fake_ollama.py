@@ -0,0 +1,262 @@
+"""
+Local stand-in for the Ollama HTTP API, for tests and load runs.
+
+FakeOllamaServer speaks the parts of the API the client uses:
+
+- ``GET /api/tags``: the availability probe
+- ``POST /api/generate``: with ``"stream": false`` a single JSON answer,
+  with ``"stream": true`` newline-delimited JSON chunks, one per word
+
+Answers are canned (a fixed string, per model, or computed from the
+prompt), and the server can be told to wait before answering, to pause
+between streamed chunks, and to fail a share of requests with an HTTP 500
+or by dropping the connection. Random choices come from a seeded
+generator, so a run is reproducible. The server records every request
+body and the peak number of requests it was handling at once.
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11434 --latency 0.3 --error-rate 0.05
+
+    with FakeOllamaServer(latency=0.05) as server:
+        client = OllamaClient(base_url=server.url)
+"""
+
+import argparse
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Union
+
+Answer = Union[str, Callable[[str], str]]
+
+DEFAULT_ANSWER = "neutral"
+DEFAULT_MODELS = ("phi4", "llama3")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open, so the client's pooled session reuses them
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm holds the body back for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            self._send_json(404, {"error": "not found"})
+            return
+        models = [{"name": f"{name}:latest", "model": f"{name}:latest"} for name in self.server.fake.models]
+        self._send_json(200, {"models": models})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        fake = self.server.fake
+        fake._started(body)
+        try:
+            outcome, delay = fake._plan()
+            time.sleep(delay)
+            if outcome == "disconnect":
+                # Close without answering; the client sees a connection error
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            if outcome == "error":
+                self._send_json(500, {"error": "fake server error"})
+                return
+            answer = fake.answer_for(body.get("model", ""), body.get("prompt", ""))
+            if body.get("stream", True):
+                self._stream(body.get("model", ""), answer, fake.token_delay)
+            else:
+                self._send_json(200, {"model": body.get("model", ""), "response": answer, "done": True})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. timed out) before the answer was written
+            self.close_connection = True
+        finally:
+            fake._finished()
+
+    def _send_json(self, status: int, payload: Dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model: str, answer: str, token_delay: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = re.findall(r"\s*\S+", answer) + [""]
+        for i, token in enumerate(tokens):
+            if i and token_delay:
+                time.sleep(token_delay)
+            line = json.dumps({"model": model, "response": token, "done": i == len(tokens) - 1}) + "\n"
+            data = line.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeOllamaServer"
+
+
+class FakeOllamaServer:
+    """
+    Fake Ollama server running on a background thread.
+
+    Use it as a context manager, or call start() and stop().
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 token_delay: float = 0.0, error_rate: float = 0.0, disconnect_rate: float = 0.0,
+                 answer: Answer = DEFAULT_ANSWER, answers: Optional[Dict[str, Answer]] = None,
+                 models=DEFAULT_MODELS, seed: int = 0):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one; see url)
+            latency: Seconds to wait before answering a generate request
+            jitter: Up to this many extra seconds, drawn uniformly per request
+            token_delay: Seconds between streamed chunks
+            error_rate: Share of generate requests answered with HTTP 500
+            disconnect_rate: Share of generate requests whose connection is
+                dropped without an answer
+            answer: Answer for models not in ``answers``: a string, or a
+                function of the prompt
+            answers: Answers per model name, in the same form as ``answer``
+            models: Model names listed by ``/api/tags``
+            seed: Seed of the generator behind jitter and failures
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.disconnect_rate = disconnect_rate
+        self.answer = answer
+        self.answers = dict(answers or {})
+        self.models = list(models)
+        self.requests: List[Dict] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server, for OllamaClient(base_url=...)."""
+        return f"http://{self.host}:{self.port}"
+
+    def answer_for(self, model: str, prompt: str) -> str:
+        """
+        Get the canned answer to a prompt.
+
+        Args:
+            model: Model named in the request (with or without a ":tag")
+            prompt: Prompt of the request
+
+        Returns:
+            Answer text
+        """
+        answer = self.answers.get(model, self.answers.get(model.split(":")[0], self.answer))
+        return answer(prompt) if callable(answer) else answer
+
+    def _plan(self):
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._rng.random()
+        if roll < self.disconnect_rate:
+            return "disconnect", delay
+        if roll < self.disconnect_rate + self.error_rate:
+            return "error", delay
+        return "answer", delay
+
+    def _started(self, body: Dict):
+        with self._lock:
+            self.requests.append(body)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def start(self) -> "FakeOllamaServer":
+        """Start listening, on a background thread."""
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        # A short poll interval lets stop() return promptly
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and close its socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=11434, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per answer")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failed with HTTP 500")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0,
+                        help="Share of requests whose connection is dropped")
+    parser.add_argument("--answer", default=DEFAULT_ANSWER, help="Answer to every generate request")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                              token_delay=args.token_delay, error_rate=args.error_rate,
+                              disconnect_rate=args.disconnect_rate, answer=args.answer, seed=args.seed)
+    server.start()
+    print(f"Fake Ollama listening on {server.url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"Answered {len(server.requests)} generate requests (peak {server.peak_in_flight} at once)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+End-to-end benchmark suite for the ReMind pipeline.
+
+Generates a synthetic vault (see benchmarks/vault.py) in a temporary
+directory and times each stage of the pipeline on it:
+
+- load_recent_entries: globbing the vault, and a warm scan manifest
+- clean_content: cleaning every note in memory
+- analyze_entries: word statistics with a cold and a warm partials cache
+- ingest: a full ingest, and an incremental one with nothing changed
+- sentiment: get_sentiments against a fake Ollama server (with a
+  configurable latency per request; see benchmarks/fake_ollama.py),
+  answered from the cache, and the offline fallback
+
+Each stage is run several times and the best time is kept. Results are
+written as JSON together with the git commit, so that runs on different
+commits can be compared with ``--compare``.
+
+Usage:
+    python -m benchmarks.suite --days 730 --repeat 3
+    python -m benchmarks.suite --compare benchmarks/results/<earlier run>.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.vault import DEFAULT_END, add_vault_arguments, generate_vault, vault_options
+from src import analysis
+from src.journal_parser import is_journal_file, load_recent_entries
+from src.models import sentiment
+from src.models.ollama import OllamaClient, set_client
+from src.utils.cache import PersistentCache
+from src.utils.cleaning import clean_content, extract_journal_content
+from src.utils.ingest import ingest
+from src.utils.manifest import ScanManifest
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+STAGES = ("load_recent_entries", "clean_content", "analyze_entries", "ingest", "sentiment")
+# Stages more than this much slower than the baseline are flagged by --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def time_runs(run: Callable, repeat: int, setup: Optional[Callable] = None) -> Dict:
+    """
+    Time a function over several runs.
+
+    Args:
+        run: Function to time
+        repeat: Number of runs
+        setup: Function called before each run, outside the timing
+
+    Returns:
+        Dictionary with the best time in seconds and the time of every run
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    return {"seconds": min(runs), "runs": runs}
+
+
+def _tone(prompt: str) -> str:
+    return ("positive", "neutral", "negative")[hashlib.sha256(prompt.encode("utf-8")).digest()[0] % 3]
+
+
+@contextmanager
+def mocked_ollama(latency: float = 0.0, concurrency: int = 4):
+    """
+    Point the shared Ollama client at a local fake Ollama server.
+
+    Generate requests wait ``latency`` seconds on the server and are answered
+    with a tone derived from the prompt, so results are deterministic. The
+    requests go over HTTP, so the timings include the client's own overhead.
+
+    Args:
+        latency: Seconds each generate request takes
+        concurrency: Requests the client runs at once
+    """
+    with FakeOllamaServer(latency=latency, answer=_tone) as server:
+        client = OllamaClient(base_url=server.url, max_concurrency=concurrency)
+        set_client(client)
+        try:
+            yield client
+        finally:
+            set_client(None)
+            client.close()
+
+
+def bench_load(vault: Path, state: Path, repeat: int, since: datetime) -> Dict:
+    manifest_path = state / "load_manifest.json"
+
+    def with_manifest():
+        manifest = ScanManifest(vault, manifest_path, file_filter=is_journal_file).load()
+        return load_recent_entries(vault, since, manifest=manifest)
+
+    with_manifest()  # the first scan hashes every note; later ones only stat
+    count = len(load_recent_entries(vault, since))
+    return {
+        "entries": count,
+        "glob": time_runs(lambda: load_recent_entries(vault, since), repeat),
+        "manifest_warm": time_runs(with_manifest, repeat),
+        "section_only": time_runs(lambda: load_recent_entries(vault, since, section_only=True), repeat),
+    }
+
+
+def bench_clean(notes: List[str], repeat: int) -> Dict:
+    result = time_runs(lambda: [clean_content(note) for note in notes], repeat)
+    size_mb = sum(len(note.encode("utf-8")) for note in notes) / 1e6
+    result.update(notes=len(notes), megabytes=size_mb, mb_per_second=size_mb / result["seconds"])
+    return result
+
+
+def bench_analyze(entries: List[Dict], repeat: int, workers: int) -> Dict:
+    # Sentiment has a stage of its own, so it is left out here
+    def no_sentiment(texts):
+        return ["neutral"] * len(texts)
+
+    warm_cache = PersistentCache()
+    with mock.patch.object(analysis, "get_sentiments", side_effect=no_sentiment):
+        cold = time_runs(lambda: analysis.analyze_entries(entries, workers=workers), repeat,
+                         setup=lambda: analysis.set_partials_cache(PersistentCache()))
+        analysis.set_partials_cache(warm_cache)
+        analysis.analyze_entries(entries, workers=workers)
+        warm = time_runs(lambda: analysis.analyze_entries(entries, workers=workers), repeat)
+    analysis.set_partials_cache(None)
+    return {"entries": len(entries), "workers": workers, "cold": cold, "warm": warm}
+
+
+def bench_ingest(vault: Path, state: Path, repeat: int, workers: int) -> Dict:
+    output_dir = state / "cleaned"
+    ingest_state = state / "ingest"
+    ingest_state.mkdir(exist_ok=True)
+
+    full = time_runs(lambda: ingest(vault, output_dir, state_dir=ingest_state, workers=workers, full=True),
+                     repeat)
+    incremental = time_runs(lambda: ingest(vault, output_dir, state_dir=ingest_state, workers=workers), repeat)
+    return {"workers": workers, "full": full, "incremental": incremental}
+
+
+def bench_sentiment(contents: List[str], repeat: int, latency: float, concurrency: int) -> Dict:
+    def fresh_cache():
+        sentiment.set_sentiment_cache(PersistentCache())
+
+    with mock.patch("builtins.print"):
+        # Compile the lexicon before timing the offline fallback
+        fresh_cache()
+        sentiment.get_sentiments_lexicon(contents[:1])
+        with mocked_ollama(latency, concurrency):
+            ollama = time_runs(lambda: sentiment.get_sentiments(contents), repeat, setup=fresh_cache)
+            cached = time_runs(lambda: sentiment.get_sentiments(contents), repeat)
+        offline = time_runs(lambda: sentiment.get_sentiments_offline(contents), repeat, setup=fresh_cache)
+    sentiment.set_sentiment_cache(None)
+    return {"entries": len(contents), "latency": latency, "concurrency": concurrency,
+            "ollama": ollama, "cached": cached, "offline": offline}
+
+
+def git_commit() -> Dict:
+    """Get the current git commit and whether the working tree has changes."""
+    root = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def run_suite(vault: Path, state: Path, repeat: int = 3, stages=STAGES, days_back: int = 7,
+              workers: int = 1, latency: float = 0.0, concurrency: int = 4,
+              sentiment_entries: int = 200) -> Dict[str, Dict]:
+    """
+    Time the pipeline stages on a vault.
+
+    Args:
+        vault: Root of the vault
+        state: Scratch directory for manifests, caches and ingest output
+        repeat: Runs per measurement (the best is kept)
+        stages: Names of the stages to run (see STAGES)
+        days_back: Window of load_recent_entries, in days before the newest note
+        workers: Worker processes for analysis and ingest
+        latency: Seconds each fake Ollama request takes
+        concurrency: Fake Ollama requests in flight at once
+        sentiment_entries: Number of entries sent through the sentiment stage
+
+    Returns:
+        Dictionary of measurements per stage
+    """
+    paths = sorted(path for path in vault.rglob("*.md") if is_journal_file(path.relative_to(vault).as_posix()))
+    notes = [path.read_text(encoding="utf-8") for path in paths]
+    entries = [{"path": path, "content": note} for path, note in zip(paths, notes)]
+    newest = max(datetime.fromtimestamp(path.stat().st_mtime) for path in paths)
+
+    results = {}
+    if "load_recent_entries" in stages:
+        results["load_recent_entries"] = bench_load(vault, state, repeat, newest - timedelta(days=days_back))
+    if "clean_content" in stages:
+        results["clean_content"] = bench_clean(notes, repeat)
+    if "analyze_entries" in stages:
+        results["analyze_entries"] = bench_analyze(entries, repeat, workers)
+    if "ingest" in stages:
+        results["ingest"] = bench_ingest(vault, state, repeat, workers)
+    if "sentiment" in stages:
+        contents = [extract_journal_content(note) for note in notes[-sentiment_entries:]]
+        results["sentiment"] = bench_sentiment(contents, repeat, latency, concurrency)
+    return results
+
+
+def best_times(stages: Dict[str, Dict], prefix: str = "") -> Dict[str, float]:
+    """
+    Flatten a result's measurements into best times keyed by stage and case.
+
+    Args:
+        stages: The ``stages`` dictionary of a result
+
+    Returns:
+        Dictionary mapping names like "ingest.full" to seconds
+    """
+    times = {}
+    for name, value in stages.items():
+        if isinstance(value, dict) and "seconds" in value:
+            times[f"{prefix}{name}"] = value["seconds"]
+        elif isinstance(value, dict):
+            times.update(best_times(value, f"{prefix}{name}."))
+    return times
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compare two results stage by stage.
+
+    Args:
+        baseline: Earlier result
+        current: New result
+        threshold: Relative slowdown above which a measurement is flagged
+
+    Returns:
+        Lines of a report, one per measurement present in both results
+    """
+    old, new = best_times(baseline["stages"]), best_times(current["stages"])
+    lines = []
+    if baseline.get("parameters") != current.get("parameters"):
+        lines.append("Warning: the runs used different parameters, so their times are not comparable")
+    lines.append(f"{'measurement':40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name in sorted(set(old) & set(new)):
+        change = new[name] / old[name] - 1 if old[name] else 0.0
+        flag = "  << slower" if change > threshold else ""
+        lines.append(f"{name:40}{old[name] * 1000:>10.1f}ms{new[name] * 1000:>10.1f}ms{change:>+10.1%}{flag}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ReMind pipeline on a synthetic vault")
+    add_vault_arguments(parser)
+    parser.add_argument("--vault", type=Path,
+                        help="Use this vault (generated here first if it does not exist) instead of a temporary one")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--days-back", type=int, default=7, help="Window of load_recent_entries in days")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for analysis and ingest")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per fake Ollama request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Fake Ollama requests in flight at once")
+    parser.add_argument("--sentiment-entries", type=int, default=200, help="Entries in the sentiment stage")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON result "
+                        "(defaults to benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch = Path(scratch)
+        vault = args.vault or scratch / "vault"
+        options = vault_options(args)
+        if not vault.exists():
+            start = time.perf_counter()
+            paths = generate_vault(vault, **options)
+            print(f"Generated {len(paths)} notes in {time.perf_counter() - start:.1f}s")
+        state = scratch / "state"
+        state.mkdir()
+        stages = run_suite(vault, state, repeat=args.repeat, stages=args.stages, days_back=args.days_back,
+                           workers=args.workers, latency=args.latency, concurrency=args.concurrency,
+                           sentiment_entries=args.sentiment_entries)
+
+    result = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git": git_commit(),
+        "environment": {"python": sys.version.split()[0], "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        "parameters": {"vault": {**options, "end": DEFAULT_END.isoformat(), "path": str(args.vault or "")},
+                       "repeat": args.repeat, "days_back": args.days_back, "workers": args.workers,
+                       "latency": args.latency, "concurrency": args.concurrency,
+                       "sentiment_entries": args.sentiment_entries},
+        "stages": stages,
+    }
+
+    output = args.output
+    if output is None:
+        commit = (result["git"]["commit"] or "nogit")[:10]
+        output = RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    for name, seconds in best_times(stages).items():
+        print(f"{name:40}{seconds * 1000:>10.1f} ms")
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        print()
+        print("\n".join(compare(json.loads(args.compare.read_text()), result)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Deterministic generator of synthetic journal vaults.
+
+Notes follow the vault layout that the journal loader expects,
+``YYYY/MM Mon/Mon DD.md``, and the shape of the daily note template:
+optional YAML frontmatter, a "What I want today" checklist, the "# Journal"
+section and a list of resources. The same arguments always produce the same
+vault, byte for byte and with the same modification times, so benchmark runs
+on different commits see identical input.
+
+Usage:
+    python -m benchmarks.vault /tmp/vault --days 730 --note-words 250
+"""
+
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+DEFAULT_END = date(2025, 6, 30)
+
+NEUTRAL_WORDS = ("walk coffee family work stillness rain garden project friend music reading slept "
+                 "early late morning evening kitchen train office book dinner lunch call plan week "
+                 "weekend city park run sleep dream meeting email code notes journal").split()
+FEELING_WORDS = ("calm grateful tired anxious hopeful happy sad lonely excited frustrated peaceful "
+                 "overwhelmed proud worried good bad great awful wonderful stressed").split()
+MODIFIERS = ("very", "really", "so", "quite", "a bit", "not", "never")
+NAMES = ("Anna", "Sam", "Jo", "Mom", "Dad", "Alex")
+TAGS = ("grateful", "work", "health", "family", "idea", "mood", "sleep")
+
+
+def note_path(root: Path, day: date) -> Path:
+    """
+    Get the path of a day's note in the vault layout.
+
+    Args:
+        root: Root of the vault
+        day: Date of the note
+
+    Returns:
+        Path like ``root/2025/04 Apr/Apr 17.md``
+    """
+    month = day.strftime("%b")
+    return root / f"{day.year}" / f"{day.month:02d} {month}" / f"{month} {day.day:02d}.md"
+
+
+def _sentence(rng: random.Random, wiki_links: float) -> str:
+    words = [rng.choice(NEUTRAL_WORDS) for _ in range(rng.randint(4, 12))]
+    if rng.random() < 0.6:
+        feeling = rng.choice(FEELING_WORDS)
+        if rng.random() < 0.4:
+            feeling = f"{rng.choice(MODIFIERS)} {feeling}"
+        words.insert(rng.randint(0, len(words)), f"I felt {feeling}")
+    if rng.random() < wiki_links:
+        words.insert(rng.randint(0, len(words)), f"[[{rng.choice(NAMES)}]]")
+    if rng.random() < 0.15:
+        words.append(f"#{rng.choice(TAGS)}")
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:] + rng.choice((".", ".", ".", "!", "?"))
+
+
+def make_note(rng: random.Random, day: date, note_words: int = 200, frontmatter: float = 0.9,
+              images: float = 0.2, wiki_links: float = 0.3) -> str:
+    """
+    Build one daily note.
+
+    Args:
+        rng: Random number generator the note is drawn from
+        day: Date of the note
+        note_words: Average number of words in the journal section
+        frontmatter: Probability that the note has YAML frontmatter
+        images: Probability that a journal paragraph is followed by an image
+        wiki_links: Probability that a sentence contains a [[wiki link]]
+
+    Returns:
+        Text of the note
+    """
+    parts = []
+    if rng.random() < frontmatter:
+        parts.append(f"---\ntitle: {day:%b %d}\ndate: {day.isoformat()}\ntags: [daily]\n---\n")
+    parts.append("# What I want today\n" + "\n".join(
+        f"- [{rng.choice(' x')}] {_sentence(rng, wiki_links)}" for _ in range(rng.randint(2, 6))) + "\n")
+
+    target = max(1, int(rng.gauss(note_words, note_words / 4)))
+    journal, words = [], 0
+    if rng.random() < 0.3:
+        journal.append(f"# {day:%b} {day.day} 🟢🔴x")
+    while words < target:
+        paragraph = " ".join(_sentence(rng, wiki_links) for _ in range(rng.randint(2, 5)))
+        journal.append(paragraph)
+        words += len(paragraph.split())
+        if rng.random() < images:
+            if rng.random() < 0.5:
+                journal.append(f"![image](attachments/{day.isoformat()}-{len(journal)}.jpg)")
+            else:
+                journal.append(f"![[photo-{day.isoformat()}-{len(journal)}.png]]")
+    parts.append("# Journal\n" + "\n\n".join(journal) + "\n")
+
+    parts.append("# New Resources\n" + "\n".join(
+        f"- [Link {i}](https://example.com/{day.isoformat()}/{i})" for i in range(rng.randint(0, 8))))
+    return "\n".join(parts)
+
+
+def generate_vault(root: Path, days: int = 365, years: Optional[int] = None, end: date = DEFAULT_END,
+                   note_words: int = 200, frontmatter: float = 0.9, images: float = 0.2,
+                   wiki_links: float = 0.3, skip_days: float = 0.1, seed: int = 7) -> List[Path]:
+    """
+    Write a synthetic vault of daily notes.
+
+    Every note's modification time is set to noon on its day, so loaders
+    that select notes by modification time see a realistic spread.
+
+    Args:
+        root: Directory to write the vault into (created if needed)
+        days: Number of days covered, ending on ``end``
+        years: Number of years covered instead of ``days``, if given
+        end: Date of the last day covered
+        note_words: Average number of words in a note's journal section
+        frontmatter: Probability that a note has YAML frontmatter
+        images: Probability that a journal paragraph is followed by an image
+        wiki_links: Probability that a sentence contains a [[wiki link]]
+        skip_days: Probability that a day has no note
+        seed: Seed of the random number generator
+
+    Returns:
+        Paths of the notes written, oldest first
+    """
+    if years is not None:
+        days = (end - end.replace(year=end.year - years)).days
+    rng = random.Random(seed)
+    root = Path(root)
+    paths = []
+    for offset in range(days - 1, -1, -1):
+        day = end - timedelta(days=offset)
+        if rng.random() < skip_days:
+            continue
+        path = note_path(root, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(make_note(rng, day, note_words, frontmatter, images, wiki_links), encoding="utf-8")
+        mtime = datetime(day.year, day.month, day.day, 12).timestamp()
+        os.utime(path, (mtime, mtime))
+        paths.append(path)
+    return paths
+
+
+def add_vault_arguments(parser: argparse.ArgumentParser):
+    """Add the vault size options shared by the generator and the benchmark suite."""
+    parser.add_argument("--days", type=int, default=365, help="Number of days covered")
+    parser.add_argument("--years", type=int, help="Number of years covered (overrides --days)")
+    parser.add_argument("--note-words", type=int, default=200, help="Average words in a journal section")
+    parser.add_argument("--frontmatter", type=float, default=0.9, help="Share of notes with YAML frontmatter")
+    parser.add_argument("--images", type=float, default=0.2, help="Chance of an image after a paragraph")
+    parser.add_argument("--wiki-links", type=float, default=0.3, help="Chance of a [[link]] in a sentence")
+    parser.add_argument("--skip-days", type=float, default=0.1, help="Share of days without a note")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+
+
+def vault_options(args: argparse.Namespace) -> dict:
+    """Collect the vault size options parsed by add_vault_arguments as generate_vault arguments."""
+    return {"days": args.days, "years": args.years, "note_words": args.note_words,
+            "frontmatter": args.frontmatter, "images": args.images, "wiki_links": args.wiki_links,
+            "skip_days": args.skip_days, "seed": args.seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic journal vault")
+    parser.add_argument("root", type=Path, help="Directory to write the vault into")
+    add_vault_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate_vault(args.root, **vault_options(args))
+    size_mb = sum(path.stat().st_size for path in paths) / 1e6
+    print(f"Wrote {len(paths)} notes ({size_mb:.1f} MB) to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
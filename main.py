@@ -5,13 +5,14 @@ ReMind - A toolkit for analyzing personal journal entries.
 This is the main entry point for the ReMind application.
 """
 
-from src.pulse import main as pulse_main
-from dotenv import load_dotenv
-
-load_dotenv()
 
 def main():
     """Run the ReMind Pulse application."""
+    # Imported here so that `import main` stays cheap; see tests/test_startup.py
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from src.pulse import main as pulse_main
     pulse_main()
 
 if __name__ == '__main__':
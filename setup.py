@@ -36,6 +36,7 @@ setup(
     entry_points={
         "console_scripts": [
             "remind-pulse=src.pulse:main",  # updated to match your actual package/module
+            "remind-search=src.search:main",
         ],
     },
     test_suite='setup.discover_tests',
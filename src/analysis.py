@@ -1,51 +1,385 @@
 # analysis.py
 
+import hashlib
 import re
 from collections import Counter
-from typing import List, Dict
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from src.models.sentiment import get_sentiment
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import FrozenSet, Iterable, Iterator, List, Dict, Optional, Set
+from src.models.sentiment import get_sentiments
+from src.utils.cache import PersistentCache, content_key
 from src.utils.cleaning import extract_journal_content
-import yaml
+from src.utils.imports import call_with_nltk_resources
+from src.utils.metrics import get_metrics
+from src.utils.tokenizers import get_tokenizer
 
-from src.config import get
+from src.config import get, get_cache_path
+
+
+@lru_cache(maxsize=None)
+def get_stopwords() -> FrozenSet[str]:
+    """
+    Get NLTK's English stopwords, loading them on first use.
+
+    Returns:
+        Frozen set of stopwords
+    """
+    from nltk.corpus import stopwords
+    return frozenset(call_with_nltk_resources(lambda: stopwords.words('english'), 'stopwords'))
+
+
+def __getattr__(name):
+    # STOPWORDS used to be loaded at import time; keep it available lazily
+    if name == "STOPWORDS":
+        return set(get_stopwords())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Initialize NLTK resources
-from src.utils.imports import nltk
 
-STOPWORDS = set(stopwords.words('english'))
 custom_stopwords = set(get("custom_stopwords", []))
+# "nltk" (reference) or "fast" (precompiled regex)
+TOKENIZER = get("tokenizer", "nltk")
+# Number of worker processes for word statistics; 1 keeps analysis serial
+ANALYSIS_WORKERS = int(get("analysis_workers", 1))
+# Below this many entries, starting worker processes costs more than it saves
+MIN_ENTRIES_PER_WORKER = 50
+# Entries are read from the input and analyzed this many at a time
+ANALYSIS_BATCH_SIZE = int(get("analysis_batch_size", 500))
+
+TAG_PATTERN = re.compile(r'#(\w+)')
+# Bump whenever entry_partial changes, so that cached partials are recomputed
+ANALYSIS_VERSION = 1
+
+_partials_cache = None
+
+
+def get_partials_cache():
+    """
+    Get the shared cache of per-entry partials, creating it on first use.
+
+    The cache lives in the configured cache directory and can be disabled
+    with ``analysis_cache: false``.
+
+    Returns:
+        PersistentCache instance, or None if caching is disabled
+    """
+    global _partials_cache
+    if _partials_cache is None and get("analysis_cache", True):
+        _partials_cache = PersistentCache(
+            get_cache_path("analysis.sqlite"),
+            max_entries=int(get("analysis_cache_size", 50000)),
+        )
+    return _partials_cache
+
+
+def set_partials_cache(cache):
+    """
+    Replace the shared partials cache (e.g. with an in-memory one in tests).
+
+    Args:
+        cache: PersistentCache instance to use, or None to reset to the default
+    """
+    global _partials_cache
+    _partials_cache = cache
+
+
+def new_aggregate() -> Dict:
+    """Create an empty set of partial aggregates."""
+    return {"words": Counter(), "tags": Counter(), "questions": 0, "entries": 0, "total_length": 0}
+
+
+def entry_partial(content: str, tokenize, excluded: Set[str]) -> Dict:
+    """
+    Compute the statistics of a single entry.
+
+    This is a pure function of the entry's content, the tokenizer and the
+    stopwords, which is what makes partials safe to cache.
+
+    Args:
+        content: Journal content, already extracted from its note
+        tokenize: Tokenizer function
+        excluded: Stopwords to leave out of the word counts
+
+    Returns:
+        Dictionary with word and tag counts (in first-seen order), the
+        number of questions and the token count
+    """
+    filtered_words, token_count = tokenize(content.lower(), excluded)
+    return {
+        "words": dict(Counter(filtered_words)),
+        "tags": dict(Counter(TAG_PATTERN.findall(content))),
+        "questions": content.count('?'),
+        "length": token_count,
+    }
+
+
+def compute_partials(contents: List[str], tokenizer: str, excluded: Set[str]) -> List[Dict]:
+    """
+    Compute the per-entry partials of several entries.
+
+    Args:
+        contents: Journal contents, already extracted from their notes
+        tokenizer: Name of the tokenizer backend
+        excluded: Stopwords to leave out of the word counts
+
+    Returns:
+        One partial per content, in order
+    """
+    tokenize = get_tokenizer(tokenizer)
+    return [entry_partial(content, tokenize, excluded) for content in contents]
+
+
+def add_partial(aggregate: Dict, partial: Dict) -> Dict:
+    """
+    Add one entry's partial to an aggregate.
+
+    Args:
+        aggregate: Aggregate to update in place
+        partial: Partial from entry_partial
+
+    Returns:
+        The updated aggregate
+    """
+    aggregate["words"].update(partial["words"])
+    aggregate["tags"].update(partial["tags"])
+    aggregate["questions"] += partial["questions"]
+    aggregate["entries"] += 1
+    aggregate["total_length"] += partial["length"]
+    return aggregate
+
+
+def merge_aggregates(aggregates) -> Dict:
+    """
+    Merge partial aggregates in order.
+
+    Merging the aggregates of consecutive shards in shard order gives
+    exactly the aggregates of the whole list, including the order in which
+    words and tags were first seen (which breaks ties in most_common).
+
+    Args:
+        aggregates: Iterable of partial aggregates
+
+    Returns:
+        The merged aggregates
+    """
+    merged = new_aggregate()
+    for aggregate in aggregates:
+        merged["words"].update(aggregate["words"])
+        merged["tags"].update(aggregate["tags"])
+        merged["questions"] += aggregate["questions"]
+        merged["entries"] += aggregate["entries"]
+        merged["total_length"] += aggregate["total_length"]
+    return merged
+
 
-def analyze_entries(entries: List[Dict]) -> Dict:
-    word_counts = Counter()
-    total_questions = 0
-    tags = Counter()
-    entry_lengths = []
+def _stopwords_digest(excluded: Set[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(excluded)).encode("utf-8")).hexdigest()[:16]
+
+
+def _compute_partials(contents: List[str], tokenizer: str, excluded: Set[str], workers: int) -> List[Dict]:
+    if workers > 1:
+        shards = _shard(contents, workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(compute_partials, shards,
+                                   [tokenizer] * len(shards), [excluded] * len(shards))
+            return [partial for shard in results for partial in shard]
+    return compute_partials(contents, tokenizer, excluded)
+
+
+def _shard(items: List, count: int) -> List[List]:
+    size, extra = divmod(len(items), count)
+    shards, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(items[start:end])
+        start = end
+    return [shard for shard in shards if shard]
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+        # Drop the reference before reading the next batch
+        del batch
+
+
+def _cached_partials(contents: List[str], tokenizer: str, excluded: Set[str], cache, digest: Optional[str],
+                     workers: Optional[int]) -> List[Dict]:
+    metrics = get_metrics()
+    partials: List[Optional[Dict]] = [None] * len(contents)
+    if cache is not None:
+        with metrics.stage("analysis.cache_lookup"):
+            keys = [content_key(content, "analysis", ANALYSIS_VERSION, tokenizer, digest) for content in contents]
+            partials = [cache.get(key) for key in keys]
+    missing = [i for i, partial in enumerate(partials) if partial is None]
+    metrics.count("analysis.entries", len(contents))
+    metrics.count("analysis.cache_misses", len(missing))
+
+    if missing:
+        if workers is None:
+            workers = min(ANALYSIS_WORKERS, len(missing) // MIN_ENTRIES_PER_WORKER)
+        workers = min(workers, len(missing))
+        with metrics.stage("analysis.tokenize"):
+            computed = _compute_partials([contents[i] for i in missing], tokenizer, excluded, workers)
+        for i, partial in zip(missing, computed):
+            partials[i] = partial
+            if cache is not None:
+                cache.put(keys[i], partial)
+    return partials
+
+
+def get_partials(contents: List[str], tokenizer: Optional[str] = None, workers: Optional[int] = None) -> List[Dict]:
+    """
+    Get the per-entry partials of several entries, from the cache where possible.
+
+    This is the per-entry half of analyze_entries, for callers that keep
+    partials around and merge them themselves (see src.watch).
+
+    Args:
+        contents: Journal contents, already extracted from their notes
+        tokenizer: Tokenizer backend (defaults to the ``tokenizer`` setting)
+        workers: Worker processes (defaults to the ``analysis_workers`` setting)
+
+    Returns:
+        One partial per content (see entry_partial), in order
+    """
+    tokenizer = tokenizer or TOKENIZER
+    with get_metrics().stage("analysis.setup"):
+        excluded = get_stopwords() | custom_stopwords
+        cache = get_partials_cache()
+        digest = _stopwords_digest(excluded) if cache is not None else None
+    return _cached_partials(contents, tokenizer, excluded, cache, digest, workers)
+
+
+def aggregate_contents(contents: Iterable[str], tokenizer: Optional[str] = None, workers: Optional[int] = None,
+                       batch_size: Optional[int] = None) -> Dict:
+    """
+    Compute the word, tag, question and length statistics of several entries.
+
+    This is analyze_entries without the sentiment, for callers that get the
+    tones separately (see src.pulse); summarize() turns the two into a summary.
+    Contents are processed in batches, as in analyze_entries.
+
+    Args:
+        contents: Journal contents, already extracted from their notes
+        tokenizer: Tokenizer backend (defaults to the ``tokenizer`` setting)
+        workers: Worker processes (defaults to the ``analysis_workers`` setting;
+            pass 1 when calling from a thread other than the main one)
+        batch_size: Contents processed at a time (defaults to the
+            ``analysis_batch_size`` setting)
+
+    Returns:
+        Aggregate of the entries (see new_aggregate), merged in order
+    """
+    aggregate = new_aggregate()
+    for batch in _batches(contents, batch_size or ANALYSIS_BATCH_SIZE):
+        partials = get_partials(batch, tokenizer, workers)
+        with get_metrics().stage("analysis.aggregate"):
+            for partial in partials:
+                add_partial(aggregate, partial)
+    return aggregate
+
+
+def batched_sentiments(contents: Iterable[str], batch_size: Optional[int] = None) -> List[str]:
+    """
+    Get the tone of several entries, asking for a batch at a time.
+
+    This is the sentiment half of analyze_entries, for callers that compute
+    the statistics separately (see aggregate_contents).
+
+    Args:
+        contents: Journal contents, already extracted from their notes
+        batch_size: Contents sent at a time (defaults to the
+            ``analysis_batch_size`` setting)
+
+    Returns:
+        One tone per entry, in order
+    """
+    return [tone for batch in _batches(contents, batch_size or ANALYSIS_BATCH_SIZE) for tone in get_sentiments(batch)]
+
+
+def analyze_entries(entries: Iterable[Dict], tokenizer: Optional[str] = None,
+                    workers: Optional[int] = None, batch_size: Optional[int] = None) -> Dict:
+    """
+    Summarize journal entries: common words, tags, questions, length and tone.
+
+    Word statistics are computed per entry and cached by the hash of the
+    entry's journal content, the tokenizer, the stopword set and
+    ANALYSIS_VERSION, so only new or edited entries are processed; the
+    summary is built by merging the per-entry partials in entry order.
+
+    Entries may be any iterable, such as the generators from
+    iter_recent_entries. They are consumed in batches, and each batch's
+    content is released once it has been aggregated, so memory stays flat
+    in the number of entries.
+
+    With more than one worker, uncached entries are split into consecutive
+    shards and processed on a process pool; the results are put back in
+    order, which gives the same result as the serial path.
+
+    Args:
+        entries: Entries as returned by the journal loader
+        tokenizer: Tokenizer backend (defaults to the ``tokenizer`` setting)
+        workers: Worker processes (defaults to the ``analysis_workers`` setting,
+            reduced for small inputs so that each worker gets enough entries)
+        batch_size: Entries analyzed at a time (defaults to the
+            ``analysis_batch_size`` setting)
+
+    Returns:
+        Summary dictionary
+    """
+    metrics = get_metrics()
+    tokenizer = tokenizer or TOKENIZER
+    with metrics.stage("analysis.setup"):
+        excluded = get_stopwords() | custom_stopwords
+        cache = get_partials_cache()
+        digest = _stopwords_digest(excluded) if cache is not None else None
+
+    aggregate = new_aggregate()
     tone_counts = Counter()
+    for batch in _batches(entries, batch_size or ANALYSIS_BATCH_SIZE):
+        with metrics.stage("analysis.extract"):
+            contents = [extract_journal_content(entry['content']) for entry in batch]
+        # Only the extracted journal content is needed from here on
+        del batch
+
+        partials = _cached_partials(contents, tokenizer, excluded, cache, digest, workers)
+
+        with metrics.stage("analysis.aggregate"):
+            for partial in partials:
+                add_partial(aggregate, partial)
+
+        # Sentiment requests for a batch are submitted together
+        with metrics.stage("analysis.sentiment"):
+            tone_counts.update(get_sentiments(contents))
+
+    return summarize(aggregate, tone_counts)
 
-    for entry in entries:
-        content = entry['content']
-        content = extract_journal_content(content)
-        words = word_tokenize(content.lower())
-        filtered_words = [w for w in words if w.isalpha() and w not in STOPWORDS and w not in custom_stopwords]
-        word_counts.update(filtered_words)
 
-        total_questions += content.count('?')
-        tags.update(re.findall(r'#(\w+)', content))
-        entry_lengths.append(len(words))
+def summarize(aggregate: Dict, tone_counts: Counter) -> Dict:
+    """
+    Build the summary dictionary from merged aggregates and tone counts.
 
-        sentiment = get_sentiment(content)
-        tone_counts[sentiment] += 1
+    Args:
+        aggregate: Aggregates of all entries
+        tone_counts: Number of entries per tone
 
+    Returns:
+        Summary dictionary
+    """
+    word_counts = aggregate["words"]
     most_common = word_counts.most_common(5)
     repeated_words = [word for word, count in word_counts.items() if count > 1]
 
     summary = {
         'most_common_words': most_common,
-        'questions_count': total_questions,
-        'tags': tags.most_common(),
-        'average_length': sum(entry_lengths) / len(entry_lengths) if entry_lengths else 0,
+        'questions_count': aggregate["questions"],
+        'tags': aggregate["tags"].most_common(),
+        'average_length': aggregate["total_length"] / aggregate["entries"] if aggregate["entries"] else 0,
         'repeated_words': repeated_words,
         'tone_summary': dict(tone_counts),
     }
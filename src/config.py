@@ -14,7 +14,8 @@ from typing import Dict, Any, Optional
 DEFAULT_CONFIG = {
     "custom_stopwords": [],
     "journal_dir": "/Users/yourname/Journal",  # <-- generic placeholder
-    "days_back": 7
+    "days_back": 7,
+    "cache_dir": "data/cache",
 }
 
 
@@ -120,4 +121,17 @@ def get(key: str, default: Any = None) -> Any:
     Returns:
         The configuration value or default
     """
-    return config().get(key, default)
\ No newline at end of file
+    return config().get(key, default)
+
+
+def get_cache_path(name: str) -> Path:
+    """
+    Get the path of a cache file inside the configured cache directory.
+
+    Args:
+        name: File name of the cache
+
+    Returns:
+        Path of the cache file (the directory may not exist yet)
+    """
+    return Path(get("cache_dir", DEFAULT_CONFIG["cache_dir"])) / name
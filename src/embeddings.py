@@ -0,0 +1,476 @@
+"""
+Local vector index for finding similar journal entries.
+
+Entries are turned into fixed-size vectors by a vectorizer: a hashing
+vectorizer that runs locally with no model, or an Ollama embedding model.
+The vectors are kept as one contiguous NumPy matrix in a ``.npy`` file that
+is memory-mapped on load, optionally quantized to int8 with a scale per row.
+Since all vectors are L2-normalized, the cosine similarity of a query with
+every entry is a single matrix-vector product.
+
+The index is updated incrementally: only entries whose content hash changed
+since the last update are vectorized again.
+
+Usage:
+    python -m src.embeddings --update "long walk by the sea"
+    python -m src.embeddings --path 2025-04-17.md
+"""
+
+import argparse
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.config import get, get_cache_path
+from src.journal_parser import is_journal_file, note_date_from_path
+from src.utils.cleaning import clean_file
+from src.utils.manifest import ScanManifest
+from src.utils.tokenizers import fast_tokenize
+
+INDEX_VERSION = 1
+DEFAULT_DIM = 1024
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+# int8 similarities are computed this many rows at a time, bounding the
+# float32 copy that the product needs
+CHUNK_ROWS = 16384
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale every row of a matrix to unit length (rows of zeros stay zero).
+
+    Args:
+        matrix: 2-D float array
+
+    Returns:
+        The normalized float32 matrix
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class HashingVectorizer:
+    """
+    Bag-of-words vectors with the hashing trick.
+
+    Every non-stopword word is hashed (CRC-32, so vectors are the same in
+    every process) to one of ``dim`` buckets with a sign, weighted by
+    1 + log(count), and the vector is L2-normalized. No vocabulary is kept,
+    so entries can be vectorized one at a time.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM, stopwords: Optional[Set[str]] = None):
+        """
+        Args:
+            dim: Number of buckets (vector dimension)
+            stopwords: Words to leave out (defaults to the analysis stopwords)
+        """
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._stopwords = stopwords
+        self._bucket = lru_cache(maxsize=1 << 16)(self._hash)
+
+    @property
+    def stopwords(self) -> Set[str]:
+        if self._stopwords is None:
+            from src.analysis import custom_stopwords, get_stopwords
+            self._stopwords = get_stopwords() | custom_stopwords
+        return self._stopwords
+
+    def _hash(self, word: str) -> Tuple[int, float]:
+        h = zlib.crc32(word.encode("utf-8"))
+        return h % self.dim, (1.0 if h & 0x80000000 else -1.0)
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Vectorize texts.
+
+        Args:
+            texts: Texts to vectorize
+
+        Returns:
+            float32 matrix with one normalized row per text
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        stopwords = self.stopwords
+        for row, text in enumerate(texts):
+            words, _ = fast_tokenize(text.lower(), stopwords)
+            counts: Dict[str, int] = {}
+            for word in words:
+                counts[word] = counts.get(word, 0) + 1
+            for word, count in counts.items():
+                bucket, sign = self._bucket(word)
+                matrix[row, bucket] += sign * (1.0 + np.log(count))
+        return normalize_rows(matrix)
+
+
+class OllamaEmbedder:
+    """
+    Vectors from an Ollama embedding model, e.g. ``nomic-embed-text``.
+
+    Texts are sent in batches to ``/api/embed`` through the shared client.
+    Unlike sentiment, there is no fallback: vectors from different backends
+    cannot be compared, so an unavailable server is an error.
+    """
+
+    def __init__(self, model: str = DEFAULT_EMBEDDING_MODEL, client=None, batch_size: int = 32):
+        """
+        Args:
+            model: Name of the Ollama embedding model
+            client: OllamaClient to use (defaults to the shared one)
+            batch_size: Texts per request
+        """
+        self.model = model
+        self.name = f"ollama-{model}"
+        self.dim = None
+        self.client = client
+        self.batch_size = batch_size
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Vectorize texts.
+
+        Args:
+            texts: Texts to vectorize
+
+        Returns:
+            float32 matrix with one normalized row per text
+
+        Raises:
+            OllamaUnavailable: If the server is down
+        """
+        from src.models.ollama import OllamaUnavailable, get_client
+
+        client = self.client or get_client()
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        if not client.is_available():
+            raise OllamaUnavailable(f"Ollama at {client.base_url} is unavailable")
+        batches = [list(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=min(client.max_concurrency, len(batches))) as executor:
+            results = list(executor.map(lambda batch: client.embed(self.model, batch), batches))
+        matrix = normalize_rows([vector for batch in results for vector in batch])
+        self.dim = matrix.shape[1]
+        return matrix
+
+
+def get_vectorizer(backend: Optional[str] = None):
+    """
+    Create the configured vectorizer.
+
+    Args:
+        backend: "hashing" or "ollama" (defaults to the ``embedding_backend`` setting)
+
+    Returns:
+        HashingVectorizer or OllamaEmbedder
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = backend or get("embedding_backend", "hashing")
+    if backend == "hashing":
+        return HashingVectorizer(int(get("embedding_dim", DEFAULT_DIM)))
+    if backend == "ollama":
+        return OllamaEmbedder(get("embedding_model", DEFAULT_EMBEDDING_MODEL))
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected 'hashing' or 'ollama'")
+
+
+def _quantize(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    scales = np.abs(matrix).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def _save_npy(path: Path, array: np.ndarray):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _entry_date(rel_path: str) -> Optional[date]:
+    # Cleaned entries are named like "2025-04-17.md", journal notes are dated by their folders
+    try:
+        return date.fromisoformat(Path(rel_path).stem)
+    except ValueError:
+        return note_date_from_path(rel_path)
+
+
+class EmbeddingIndex:
+    """
+    Vectors of journal entries with nearest-neighbour search.
+
+    The index lives in a directory holding ``vectors.npy`` (float32, or int8
+    when quantized), ``scales.npy`` for quantized vectors, and ``meta.json``
+    with the path, content hash and date of every row. A directory of None
+    keeps the index in memory.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, vectorizer=None, quantize: bool = False):
+        """
+        Args:
+            directory: Where the index is stored
+            vectorizer: HashingVectorizer or OllamaEmbedder (defaults to the configured one)
+            quantize: Store vectors as int8 with a scale per row (4x smaller)
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.vectorizer = vectorizer or get_vectorizer()
+        self.quantize = quantize
+        self.paths: List[str] = []
+        self.hashes: List[str] = []
+        self.dates: List[Optional[date]] = []
+        self.vectors: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+
+    def load(self) -> "EmbeddingIndex":
+        """
+        Load the index from disk, memory-mapping the vectors.
+
+        An index built with another vectorizer or storage format is ignored,
+        so that the next update rebuilds it.
+
+        Returns:
+            The index itself
+        """
+        if self.directory is None or not (self.directory / "meta.json").exists():
+            return self
+        with open(self.directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta.get("version") != INDEX_VERSION or meta.get("vectorizer") != self.vectorizer.name
+                or meta.get("quantize") != self.quantize):
+            return self
+        vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        if vectors.shape[0] != len(meta["paths"]):
+            print(f"Warning: ignoring inconsistent embedding index in {self.directory}")
+            return self
+        self.vectors = vectors
+        self.scales = np.load(self.directory / "scales.npy") if self.quantize else None
+        self.paths = meta["paths"]
+        self.hashes = meta["sha256"]
+        self.dates = [date.fromisoformat(d) if d else None for d in meta["dates"]]
+        return self
+
+    def save(self):
+        """Write the index to disk (each file via a temp file and rename)."""
+        if self.directory is None or self.vectors is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _save_npy(self.directory / "vectors.npy", np.ascontiguousarray(self.vectors))
+        if self.quantize:
+            _save_npy(self.directory / "scales.npy", self.scales)
+        meta = {
+            "version": INDEX_VERSION,
+            "vectorizer": self.vectorizer.name,
+            "quantize": self.quantize,
+            "paths": self.paths,
+            "sha256": self.hashes,
+            "dates": [d.isoformat() if d else None for d in self.dates],
+        }
+        tmp_path = self.directory / "meta.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.directory / "meta.json")
+
+    def update(self, source_dir: Path, manifest: Optional[ScanManifest] = None,
+               raw_journal: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with a directory of entries.
+
+        By default the source is a directory of cleaned entries, as written
+        by ingest. With ``raw_journal`` it is the journal itself, and only the
+        daily notes are indexed, cleaned on the way. Entries whose content
+        hash changed are vectorized again; rows of removed entries are
+        dropped. When anything changed, the matrix is rewritten once.
+
+        Args:
+            source_dir: Directory of entries to index
+            manifest: ScanManifest for source_dir (defaults to one in the cache directory)
+            raw_journal: Whether source_dir is the raw journal
+
+        Returns:
+            Dictionary with the number of entries vectorized, removed and unchanged
+        """
+        if manifest is None:
+            manifest = ScanManifest(source_dir, get_cache_path("embeddings_manifest.json"),
+                                    file_filter=is_journal_file if raw_journal else lambda rel: rel.endswith(".md"))
+            manifest.load()
+        manifest.scan()
+        current = {rel_path: record["sha256"] for rel_path, record in manifest.files.items()}
+        indexed = dict(zip(self.paths, self.hashes))
+        changed = sorted(rel_path for rel_path, sha in current.items() if indexed.get(rel_path) != sha)
+        removed = set(indexed) - set(current)
+        keep = [i for i, rel_path in enumerate(self.paths) if indexed[rel_path] == current.get(rel_path)]
+        counts = {"vectorized": len(changed), "removed": len(removed), "unchanged": len(keep)}
+
+        if changed or removed:
+            texts = []
+            for rel_path in changed:
+                path = manifest.path_for(rel_path)
+                if raw_journal:
+                    texts.append(clean_file(path))
+                else:
+                    with open(path, "r", encoding="utf-8") as f:
+                        texts.append(f.read())
+            self._replace_rows(keep, changed, [current[p] for p in changed], self.vectorizer.transform(texts))
+            self.save()
+        manifest.save()
+        return counts
+
+    def _replace_rows(self, keep: List[int], paths: List[str], hashes: List[str], new_vectors: np.ndarray):
+        kept = self.dequantized(keep) if self.vectors is not None else np.zeros((0, new_vectors.shape[1]), np.float32)
+        if len(new_vectors) == 0:
+            new_vectors = np.zeros((0, kept.shape[1]), np.float32)
+        matrix = np.concatenate([kept, new_vectors])
+        self.paths = [self.paths[i] for i in keep] + paths
+        self.hashes = [self.hashes[i] for i in keep] + hashes
+        self.dates = [self.dates[i] for i in keep] + [_entry_date(p) for p in paths]
+        if self.quantize:
+            self.vectors, self.scales = _quantize(matrix)
+        else:
+            self.vectors, self.scales = matrix, None
+
+    def dequantized(self, rows=None) -> np.ndarray:
+        """
+        Get vectors as float32.
+
+        Args:
+            rows: Row indices to return (defaults to all rows)
+
+        Returns:
+            float32 matrix of the selected rows
+        """
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if self.quantize:
+            scales = self.scales if rows is None else self.scales[rows]
+            return vectors.astype(np.float32) * scales[:, None]
+        return np.asarray(vectors, dtype=np.float32)
+
+    def similarities(self, vector: np.ndarray) -> np.ndarray:
+        """
+        Compute the cosine similarity of a normalized vector with every entry.
+
+        Args:
+            vector: Query vector, as produced by the vectorizer
+
+        Returns:
+            float32 array with one similarity per row
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        if not self.quantize:
+            return self.vectors @ vector
+        sims = np.empty(len(self.paths), dtype=np.float32)
+        for start in range(0, len(sims), CHUNK_ROWS):
+            end = start + CHUNK_ROWS
+            sims[start:end] = (self.vectors[start:end].astype(np.float32) @ vector) * self.scales[start:end]
+        return sims
+
+    def most_similar(self, vector: np.ndarray, k: int = 5, exclude: Optional[str] = None) -> List[Dict]:
+        """
+        Find the entries closest to a vector.
+
+        Args:
+            vector: Query vector, as produced by the vectorizer
+            k: Number of entries to return
+            exclude: Path of an entry to leave out (e.g. the query entry itself)
+
+        Returns:
+            List of dictionaries with the path, date and similarity score of
+            each entry, most similar first
+        """
+        if self.vectors is None or not self.paths:
+            return []
+        sims = self.similarities(vector)
+        if exclude is not None and exclude in self.paths:
+            sims[self.paths.index(exclude)] = -np.inf
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [{"path": self.paths[i], "date": self.dates[i], "score": float(sims[i])}
+                for i in top if np.isfinite(sims[i])]
+
+    def similar_to_text(self, text: str, k: int = 5) -> List[Dict]:
+        """Find the entries most similar to a piece of text."""
+        return self.most_similar(self.vectorizer.transform([text])[0], k)
+
+    def similar_to_entry(self, rel_path: str, k: int = 5) -> List[Dict]:
+        """
+        Find the entries most similar to an indexed entry ("more like this").
+
+        Args:
+            rel_path: Path of the entry, relative to the indexed directory
+            k: Number of entries to return
+
+        Returns:
+            Matches as from most_similar, without the entry itself
+
+        Raises:
+            KeyError: If the entry is not in the index
+        """
+        if rel_path not in self.paths:
+            raise KeyError(rel_path)
+        return self.most_similar(self.dequantized([self.paths.index(rel_path)])[0], k, exclude=rel_path)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+
+def open_index(quantize: Optional[bool] = None) -> EmbeddingIndex:
+    """
+    Open the embedding index in the cache directory.
+
+    Args:
+        quantize: Store int8 vectors (defaults to the ``embedding_quantize`` setting)
+
+    Returns:
+        Loaded EmbeddingIndex
+    """
+    if quantize is None:
+        quantize = bool(get("embedding_quantize", False))
+    return EmbeddingIndex(get_cache_path("embeddings"), quantize=quantize).load()
+
+
+def main():
+    from src.utils.ingest import OUTPUT_DIR
+
+    parser = argparse.ArgumentParser(description="Find journal entries similar to a text or an entry")
+    parser.add_argument("text", nargs="*", help="Text to find similar entries for")
+    parser.add_argument("--path", type=str, help="Find entries similar to this indexed entry")
+    parser.add_argument("--k", type=int, default=5, help="Number of entries to show")
+    parser.add_argument("--update", action="store_true", help="Update the index before searching")
+    parser.add_argument("--source", type=str, default=str(OUTPUT_DIR),
+                        help="Directory of cleaned entries to index")
+    parser.add_argument("--raw", action="store_true", help="Index the raw journal instead of cleaned entries")
+    parser.add_argument("--quantize", action="store_true", help="Store int8 vectors")
+    args = parser.parse_args()
+
+    index = open_index(quantize=args.quantize or None)
+    if args.update:
+        source = Path(get("journal_dir")) if args.raw and args.source == str(OUTPUT_DIR) else Path(args.source)
+        counts = index.update(source, raw_journal=args.raw)
+        print(f"Vectorized {counts['vectorized']} entries, removed {counts['removed']}, "
+              f"{counts['unchanged']} unchanged")
+
+    if args.path:
+        results = index.similar_to_entry(args.path, args.k)
+    elif args.text:
+        results = index.similar_to_text(" ".join(args.text), args.k)
+    else:
+        return
+    if not results:
+        print("No entries indexed yet; run with --update.")
+    for result in results:
+        when = result["date"].isoformat() if result["date"] else "unknown date"
+        print(f"{result['score']:.3f}  {when}  {result['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,10 @@
-import nltk
-from nltk.downloader import Downloader
+"""
+Backwards-compatible alias for src.utils.imports.
 
-# Check if resources are already downloaded before attempting to download them
-downloader = Downloader()
+NLTK resources are no longer checked when this module is imported; call
+ensure_nltk_resources before using them instead.
+"""
 
-# Download required NLTK resources if not already downloaded
-if not downloader.is_installed('stopwords'):
-    nltk.download('stopwords')
-if not downloader.is_installed('punkt'):
-    nltk.download('punkt')
-if not downloader.is_installed('punkt_tab'):
-    nltk.download('punkt_tab')
+from src.utils.imports import NLTK_RESOURCES, ensure_nltk_resources
+
+__all__ = ["NLTK_RESOURCES", "ensure_nltk_resources"]
@@ -3,49 +3,375 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from pathlib import Path
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import argparse
+import calendar
+import os
+import re
 
 # Import the extract_journal_content function from utils.cleaning
-from src.utils.cleaning import extract_journal_content
-from src.config import get
+from src.utils.cleaning import extract_journal_content, read_journal_section
+from src.utils.manifest import ScanManifest, ScanResult
+from src.utils.metrics import get_metrics
+from src.config import get, get_cache_path
 
-def load_recent_entries(journal_dir: Path, since: datetime):
+# Journal notes live in month folders like "04 Apr" and are named like "Apr 17.md"
+MONTH_DIR_PATTERN = re.compile(r"[0-1][0-9] [A-Za-z]{3}")
+DAY_FILE_PATTERN = re.compile(r"[A-Za-z]{3} [0-3][0-9]\.md")
+YEAR_DIR_PATTERN = re.compile(r"\d{4}")
+
+DEFAULT_READ_WORKERS = 8
+
+
+def is_journal_file(rel_path: str) -> bool:
     """
-    Load journal entries that have been modified since the specified date.
+    Check whether a relative path names a daily journal note.
+
+    Args:
+        rel_path: POSIX-style path relative to the journal directory
+
+    Returns:
+        True if the file sits in a month folder and has a day-style name
+    """
+    parts = rel_path.split("/")
+    return (len(parts) >= 2
+            and MONTH_DIR_PATTERN.fullmatch(parts[-2]) is not None
+            and DAY_FILE_PATTERN.fullmatch(parts[-1]) is not None)
+
+
+def read_note(path: Path, section_only: bool = False) -> str:
+    """
+    Read a note.
+
+    Args:
+        path: Note file
+        section_only: Read only its "# Journal" section (falling back to the
+            whole file when it has none)
+
+    Returns:
+        Text of the note
+    """
+    metrics = get_metrics()
+    with metrics.stage("journal.read"):
+        content = None
+        if section_only:
+            section = read_journal_section(path, skip_frontmatter=False)
+            if section is not None:
+                content = section.strip()
+        if content is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+    if metrics.enabled:
+        metrics.count("journal.files_read")
+        metrics.count("journal.bytes_read", len(content.encode("utf-8")))
+    return content
+
+
+def open_manifest(journal_dir: Path, manifest_path: Optional[Path] = None) -> ScanManifest:
+    """
+    Load the scan manifest for a journal directory.
 
     Args:
         journal_dir: Directory containing journal entries
-        since: Only include entries modified after this datetime
+        manifest_path: Where the manifest is stored; defaults to the cache directory
 
     Returns:
-        List of dictionaries containing a path, content, and modified time
+        ScanManifest tracking the journal notes under journal_dir
+    """
+    if manifest_path is None:
+        manifest_path = get_cache_path("scan_manifest.json")
+    return ScanManifest(journal_dir, manifest_path, file_filter=is_journal_file).load()
+
+
+def scan_journal(journal_dir: Path, manifest_path: Optional[Path] = None) -> ScanResult:
+    """
+    Update the on-disk scan manifest and report what changed since the last run.
+
+    Args:
+        journal_dir: Directory containing journal entries
+        manifest_path: Where the manifest is stored; defaults to the cache directory
+
+    Returns:
+        ScanResult listing added, changed, removed and unchanged notes
+    """
+    manifest = open_manifest(journal_dir, manifest_path)
+    result = manifest.scan()
+    manifest.save()
+    return result
+
+
+def iter_recent_entries(journal_dir: Path, since: datetime, manifest: Optional[ScanManifest] = None,
+                        section_only: bool = False) -> Iterator[Dict]:
     """
-    entries = []
+    Yield journal entries that have been modified since the specified date.
+
+    This is the streaming form of load_recent_entries: each file is read
+    only when the next entry is requested, so a consumer that lets go of
+    entries as it goes holds one note in memory at a time.
 
+    Args:
+        journal_dir: Directory containing journal entries
+        since: Only include entries modified after this datetime
+        manifest: Optional ScanManifest for journal_dir (see open_manifest)
+        section_only: Read only the "# Journal" section of notes that have one
+            (see read_journal_section) instead of the whole note
+
+    Yields:
+        Dictionaries containing a path, content, and modified time
+    """
     if not journal_dir.exists():
         print(f"Warning: Journal directory does not exist: {journal_dir}")
-        return entries
+        return
+
+    metrics = get_metrics()
+    if manifest is not None:
+        with metrics.stage("journal.scan"):
+            manifest.scan()
+            manifest.save()
+        metrics.count("journal.files_scanned", len(manifest.files))
+        for rel_path, record in list(manifest.files.items()):
+            modified_time = datetime.fromtimestamp(record["mtime_ns"] / 1e9)
+            if modified_time >= since:
+                file = manifest.path_for(rel_path)
+                yield {
+                    "path": file,
+                    "content": read_note(file, section_only),
+                    "modified": modified_time,
+                    "sha256": record["sha256"],
+                }
+        return
 
     # Use the correct glob pattern for files like "/Users/vsyerik/Obsidian/Personal/Journal 📓/2025/04 Apr/Apr 17.md"
     glob_pattern = "**/[0-1][0-9] [A-Za-z][A-Za-z][A-Za-z]/[A-Za-z][A-Za-z][A-Za-z] [0-3][0-9].md"
-    matching_files = list(journal_dir.glob(glob_pattern))
 
     # Filter by modification time
-    for file in matching_files:
+    for file in journal_dir.glob(glob_pattern):
+        metrics.count("journal.files_scanned")
         modified_time = datetime.fromtimestamp(file.stat().st_mtime)
         if modified_time >= since:
-            with open(file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            entries.append({
+            yield {
                 "path": file,
-                "content": content,
+                "content": read_note(file, section_only),
                 "modified": modified_time
-            })
-    return entries
+            }
+
+
+def load_recent_entries(journal_dir: Path, since: datetime, manifest: Optional[ScanManifest] = None,
+                        section_only: bool = False):
+    """
+    Load journal entries that have been modified since the specified date.
+
+    When a scan manifest is given, it is updated incrementally and saved
+    instead of globbing and stat-ing the whole journal tree, and each entry
+    also carries the ``sha256`` of its content.
+
+    Args:
+        journal_dir: Directory containing journal entries
+        since: Only include entries modified after this datetime
+        manifest: Optional ScanManifest for journal_dir (see open_manifest)
+        section_only: Read only the "# Journal" section of notes that have one
+            (see read_journal_section) instead of the whole note
+
+    Returns:
+        List of dictionaries containing a path, content, and modified time
+    """
+    return list(iter_recent_entries(journal_dir, since, manifest=manifest, section_only=section_only))
+
+def _month_in_window(year: int, month: int, start: date, end: date) -> bool:
+    if not 1 <= month <= 12:
+        return False
+    first = date(year, month, 1)
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    return first <= end and last >= start
+
+
+def _note_date(year: int, month: int, file_name: str) -> Optional[date]:
+    try:
+        return date(year, month, int(file_name[4:6]))
+    except ValueError:
+        return None
+
+
+def note_date_from_path(rel_path: str) -> Optional[date]:
+    """
+    Read the date of a daily note from its path, e.g. "2025/04 Apr/Apr 17.md".
+
+    Args:
+        rel_path: Path of the note, relative to the journal or absolute ("/"-separated)
+
+    Returns:
+        The note date, or None if the path has no year folder or is not a daily note
+    """
+    parts = Path(rel_path).parts
+    if (len(parts) < 3 or not YEAR_DIR_PATTERN.fullmatch(parts[-3])
+            or not MONTH_DIR_PATTERN.fullmatch(parts[-2]) or not DAY_FILE_PATTERN.fullmatch(parts[-1])):
+        return None
+    month = int(parts[-2][:2])
+    if not 1 <= month <= 12:
+        return None
+    return _note_date(int(parts[-3]), month, parts[-1])
+
+
+def iter_journal_files(journal_dir: Path, start: date, end: date) -> Iterator[Tuple[Path, Optional[date]]]:
+    """
+    Walk the journal tree and yield the daily notes dated within a window.
+
+    The walk uses os.scandir and reads the date from the folder schema
+    (``2025/04 Apr/Apr 17.md``), so year and month folders outside the window
+    are pruned without being listed. Month folders that have no year folder
+    above them cannot be dated; their notes are yielded with a date of None
+    so that callers can fall back to the modification time.
+
+    Args:
+        journal_dir: Directory containing journal entries
+        start: First note date to include
+        end: Last note date to include
+
+    Yields:
+        Tuples of (note path, note date or None)
+    """
+    stack: List[Tuple[str, Optional[int]]] = [(str(journal_dir), None)]
+    while stack:
+        directory, year = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                subdirs = [entry for entry in it if entry.is_dir()]
+        except OSError as e:
+            print(f"Warning: could not list {directory}: {e}")
+            continue
+
+        for entry in subdirs:
+            name = entry.name
+            if YEAR_DIR_PATTERN.fullmatch(name):
+                if start.year <= int(name) <= end.year:
+                    stack.append((entry.path, int(name)))
+            elif MONTH_DIR_PATTERN.fullmatch(name):
+                month = int(name[:2])
+                if year is not None and not _month_in_window(year, month, start, end):
+                    continue
+                yield from _iter_month_dir(entry.path, year, month, start, end)
+            else:
+                stack.append((entry.path, year))
+
+
+def _iter_month_dir(directory: str, year: Optional[int], month: int, start: date, end: date):
+    try:
+        with os.scandir(directory) as it:
+            names = [entry.name for entry in it if entry.is_file() and DAY_FILE_PATTERN.fullmatch(entry.name)]
+    except OSError as e:
+        print(f"Warning: could not list {directory}: {e}")
+        return
+    for name in names:
+        if year is None:
+            yield Path(directory, name), None
+            continue
+        note_date = _note_date(year, month, name)
+        if note_date is not None and start <= note_date <= end:
+            yield Path(directory, name), note_date
+
+
+def _read_entry(item: Tuple[Path, Optional[date]], section_only: bool = False) -> dict:
+    path, note_date = item
+    return {
+        "path": path,
+        "content": read_note(path, section_only),
+        "modified": datetime.fromtimestamp(path.stat().st_mtime),
+        "date": note_date,
+    }
+
+
+def _read_ahead(read: Callable, items: Iterable, max_workers: int) -> Iterator:
+    # Keeps at most 2 * max_workers reads in flight, yielding results in order
+    window = max(1, max_workers) * 2
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(read, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_entries_by_date(journal_dir: Path, since: datetime, until: Optional[datetime] = None,
+                         max_workers: int = DEFAULT_READ_WORKERS, section_only: bool = False) -> Iterator[Dict]:
+    """
+    Yield the journal entries whose note date falls within a window, by date.
+
+    This is the streaming form of load_entries_by_date. The matching paths
+    are collected and sorted up front, but files are read on a thread pool
+    only a few entries ahead of the consumer, so memory does not grow with
+    the number of entries.
+
+    Args:
+        journal_dir: Directory containing journal entries
+        since: Only include entries dated on or after this day
+        until: Only include entries dated on or before this day (defaults to today)
+        max_workers: Maximum number of files read at once
+        section_only: Read only the "# Journal" section of notes that have one
+            (see read_journal_section) instead of the whole note
+
+    Yields:
+        Dictionaries containing a path, content, modified time and note date
+    """
+    if not journal_dir.exists():
+        print(f"Warning: Journal directory does not exist: {journal_dir}")
+        return
+
+    start = since.date()
+    end = (until or datetime.now()).date()
+    items = []
+    metrics = get_metrics()
+    with metrics.stage("journal.scan"):
+        for path, note_date in iter_journal_files(journal_dir, start, end):
+            if note_date is None:
+                # Undated notes fall back to the modification-time filter
+                modified = datetime.fromtimestamp(path.stat().st_mtime)
+                if modified < since:
+                    continue
+                items.append((modified.date(), str(path), path, None))
+            else:
+                items.append((note_date, str(path), path, note_date))
+        items.sort(key=lambda item: item[:2])
+    metrics.count("journal.files_scanned", len(items))
+
+    read = partial(_read_entry, section_only=section_only)
+    yield from _read_ahead(read, ((path, note_date) for _, _, path, note_date in items), max_workers)
+
+
+def load_entries_by_date(journal_dir: Path, since: datetime, until: Optional[datetime] = None,
+                         max_workers: int = DEFAULT_READ_WORKERS, section_only: bool = False):
+    """
+    Load the journal entries whose note date falls within a window.
+
+    Unlike load_recent_entries, entries are selected by the date encoded in
+    their folder and file names rather than by modification time, which lets
+    the walk skip every year and month outside the window. Matching files are
+    read on a bounded thread pool.
+
+    Args:
+        journal_dir: Directory containing journal entries
+        since: Only include entries dated on or after this day
+        until: Only include entries dated on or before this day (defaults to today)
+        max_workers: Maximum number of files read at once
+        section_only: Read only the "# Journal" section of notes that have one
+            (see read_journal_section) instead of the whole note
+
+    Returns:
+        List of dictionaries containing a path, content, modified time and
+        note date, ordered by date
+    """
+    return list(iter_entries_by_date(journal_dir, since, until, max_workers=max_workers,
+                                     section_only=section_only))
 
 # Re-export extract_journal_content for backward compatibility
-__all__ = ['load_recent_entries', 'extract_journal_content']
+__all__ = ['load_recent_entries', 'iter_recent_entries', 'load_entries_by_date', 'iter_entries_by_date',
+           'iter_journal_files', 'note_date_from_path', 'scan_journal', 'open_manifest', 'is_journal_file',
+           'extract_journal_content']
 
 # Standalone execution for debugging
 if __name__ == "__main__":
@@ -55,13 +381,28 @@ if __name__ == "__main__":
                         help="Directory containing journal entries")
     parser.add_argument("--days", type=int, default=2,
                         help="Number of days to look back")
+    parser.add_argument("--manifest", action="store_true",
+                        help="Use the scan manifest and report added/changed/removed notes")
+    parser.add_argument("--by-date", action="store_true",
+                        help="Select entries by the date in their path instead of modification time")
     args = parser.parse_args()
 
     journal_dir = Path(args.journal_dir)
+
+    if args.manifest:
+        result = scan_journal(journal_dir)
+        print(f"📒 Manifest scan: {len(result.added)} added, {len(result.changed)} changed, "
+              f"{len(result.removed)} removed, {len(result.unchanged)} unchanged")
+        for label, paths in (("+", result.added), ("~", result.changed), ("-", result.removed)):
+            for rel_path in paths:
+                print(f"  {label} {rel_path}")
     since_date = datetime.now() - timedelta(days=args.days)
 
     print(f"🔍 Scanning journal at {journal_dir} for the past {args.days} days...")
-    entries = load_recent_entries(journal_dir, since_date)
+    if args.by_date:
+        entries = load_entries_by_date(journal_dir, since_date)
+    else:
+        entries = load_recent_entries(journal_dir, since_date)
 
     if not entries:
         print("No recent journal entries found.")
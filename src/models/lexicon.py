@@ -0,0 +1,331 @@
+"""
+Batch lexicon sentiment scorer for ReMind Pulse.
+
+TextBlob's pattern analyzer walks every entry word by word in Python. This
+module scores a whole list of texts at once instead: the polarity lexicon
+that ships with TextBlob is compiled once into a word index with polarity,
+intensity and modifier arrays, every text is tokenized into one flat token
+array, and the analyzer's rules (intensifiers such as "very good",
+negations such as "not good", "!" boosts and emoticons) are applied with
+NumPy over the whole batch.
+
+The rules mirror textblob.en.sentiments.PatternAnalyzer, so polarities
+match TextBlob's for nearly all text; the benchmark in
+benchmarks/compare_sentiment.py reports the agreement on a sample corpus.
+"""
+
+import importlib.util
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+NEGATIONS = ("no", "not", "n't", "never")
+MODIFIER_TAGS = ("RB",)
+EXCLAMATION_BOOST = 1.25
+NEGATION_FACTOR = -0.5
+
+# Punctuation split off the start of a word (periods are not), and off its end
+LEADING_PUNCTUATION = ",;:!?()[]{}`'\"@#$^&*+-|=~_"
+TRAILING_PUNCTUATION = LEADING_PUNCTUATION + "."
+
+# Emoticons and their polarity, in TextBlob's order of precedence
+EMOTICONS = (
+    (1.00, ("<3", "♥")),
+    (1.00, (">:D", ":-D", ":D", "=-D", "=D", "X-D", "x-D", "8-D")),
+    (0.75, (">:P", ":-P", ":P", ":-p", ":p", ":-b", ":b", ":c)", ":o)", ":^)")),
+    (0.50, (">:)", ":-)", ":)", "=)", "=]", ":]", ":}", ":>", ":3", "8)", "8-)")),
+    (0.25, (">;]", ";-)", ";)", ";-]", ";]", ";D", ";^)", "*-)", "*)")),
+    (0.05, (">:o", ":-O", ":O", ":o", ":-o", "o_O", "o.O", "°O°", "°o°")),
+    (-0.25, (">:/", ":-/", ":/", ":\\", ">:\\", ":-.", ":-s", ":s", ":S", ":-S", ">.>")),
+    (-0.75, (">:[", ":-(", ":(", "=(", ":-[", ":[", ":{", ":-<", ":c", ":-c", "=/")),
+    (-1.00, (":'(", ":'''(", ";'(")),
+)
+SARCASM = "(!)"
+
+# Codes for unknown tokens that the rules look out for; known words have
+# codes from 0 up
+UNKNOWN, EXCLAMATION, APOSTROPHE, NEGATION = -1, -2, -3, -4
+
+# Quotes become separate tokens, which also splits contractions ("do n ' t")
+_QUOTES = str.maketrans({q: f" {q} " for q in "“”‘’'\""})
+_SARCASM_RE = re.compile(r"\( ?! ?\)")
+
+
+def _token_pattern() -> "re.Pattern":
+    lead = re.escape(LEADING_PUNCTUATION)
+    trail = re.escape(TRAILING_PUNCTUATION)
+    word_end = rf"(?=[{trail}]*(?:\s|$))"
+    return re.compile(
+        rf"(?![{lead}])\S*?[^\s{trail}]{word_end}"  # word without surrounding punctuation
+        rf"|\.\.\.{word_end}"                       # trailing ellipsis
+        rf"|\S"                                     # single punctuation mark
+    )
+
+
+def _emoticon_pattern(emoticons: Sequence[str]) -> "re.Pattern":
+    # Like TextBlob, emoticons are found in the space-separated tokens, so
+    # ":" and "[" split off "tags: [daily]" also make one
+    faces = sorted(emoticons, key=len, reverse=True)
+    return re.compile("({})( |$)".format("|".join(" ?".join(map(re.escape, face)) for face in faces)))
+
+
+def _default_lexicon_path() -> str:
+    # Located without importing textblob, which is slow to import
+    spec = importlib.util.find_spec("textblob")
+    if spec is None or not spec.submodule_search_locations:
+        raise FileNotFoundError("TextBlob is not installed, so its sentiment lexicon is unavailable")
+    return os.path.join(list(spec.submodule_search_locations)[0], "en", "en-sentiment.xml")
+
+
+def _average(rows):
+    return [sum(column) / len(column) for column in zip(*rows)]
+
+
+def load_lexicon(path: Optional[str] = None) -> dict:
+    """
+    Load a pattern sentiment lexicon the way TextBlob does.
+
+    Scores are averaged over the senses of each part of speech, and the
+    None entry of a word holds the average over its parts of speech. Every
+    adjective also gets an adverb form ("terrible" -> "terribly").
+
+    Args:
+        path: Path of the lexicon XML (defaults to TextBlob's en-sentiment.xml)
+
+    Returns:
+        Dictionary mapping each word to a dictionary of part-of-speech tags
+        (and None) to (polarity, subjectivity, intensity)
+    """
+    words = {}
+    for word in ElementTree.parse(path or _default_lexicon_path()).getroot().iter("word"):
+        form = word.get("form")
+        if form:
+            scores = (float(word.get("polarity", 0.0)), float(word.get("subjectivity", 0.0)),
+                      float(word.get("intensity", 1.0)))
+            words.setdefault(form, {}).setdefault(word.get("pos"), []).append(scores)
+    for form, tags in words.items():
+        averaged = {tag: _average(senses) for tag, senses in tags.items()}
+        averaged[None] = _average(list(averaged.values()))
+        words[form] = averaged
+
+    for form, tags in list(words.items()):
+        if "JJ" in tags:
+            if form.endswith("y"):
+                form = form[:-1] + "i"
+            if form.endswith("le"):
+                form = form[:-2]
+            adverb = words.setdefault(form + "ly", {})
+            adverb["RB"] = adverb[None] = tags["JJ"]
+    return words
+
+
+def _previous(mask: np.ndarray) -> np.ndarray:
+    # Index of the last position before each position where mask is set, or -1
+    index = np.where(mask, np.arange(len(mask)), -1)
+    return np.concatenate(([-1], np.maximum.accumulate(index)[:-1])) if len(mask) else index
+
+
+def _count_between(mask: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    # Number of positions strictly between start and end where mask is set
+    counts = np.concatenate(([0], np.cumsum(mask)))
+    return counts[end] - counts[np.maximum(start + 1, 0)]
+
+
+class SentimentLexicon:
+    """
+    Polarity lexicon compiled for scoring many texts at once.
+
+    Each known word (or emoticon) has an index into parallel arrays of
+    polarity, intensity and flags, so a batch of texts becomes a handful of
+    array operations after tokenizing.
+    """
+
+    def __init__(self, words: Optional[dict] = None):
+        """
+        Args:
+            words: Lexicon as returned by load_lexicon (loaded from TextBlob if None)
+        """
+        if words is None:
+            words = load_lexicon()
+        self.index = {}
+        polarity, intensity, modifier, adverb = [], [], [], []
+        for form, tags in words.items():
+            p, _, i = tags[None]
+            self.index[form] = len(polarity)
+            polarity.append(p)
+            intensity.append(i)
+            modifier.append(any(tag in tags for tag in MODIFIER_TAGS))
+            # Only modifiers ending in -ly pass a following negation on ("really not good")
+            adverb.append(form.endswith("ly"))
+
+        faces = []
+        self.first_emoticon = len(polarity)
+        for p, group in EMOTICONS:
+            for face in group:
+                if face.isalpha():
+                    continue
+                faces.append(face)
+                if face.lower() not in self.index:
+                    self.index[face.lower()] = len(polarity)
+                    polarity.append(p)
+                    intensity.append(1.0)
+                    modifier.append(False)
+                    adverb.append(False)
+        self.index[SARCASM] = len(polarity)
+        polarity.append(0.0)
+        intensity.append(1.0)
+        modifier.append(False)
+        adverb.append(False)
+        # None of the negations is in the lexicon, so they can get a code of their own
+        self.codes = dict(self.index, **{"!": EXCLAMATION, "'": APOSTROPHE})
+        self.codes.update((negation, NEGATION) for negation in NEGATIONS if negation not in self.index)
+
+        self.polarity = np.array(polarity)
+        self.intensity = np.array(intensity)
+        self.modifier = np.array(modifier)
+        self.adverb = np.array(adverb)
+        self.token_pattern = _token_pattern()
+        self.emoticon_pattern = _emoticon_pattern(faces)
+
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Split a text into lowercased tokens the way TextBlob's analyzer does.
+
+        Args:
+            text: Text to tokenize
+
+        Returns:
+            List of tokens
+        """
+        text = " ".join(self.token_pattern.findall(text.replace("n't", " n't").translate(_QUOTES)))
+        text = _SARCASM_RE.sub(SARCASM, text)
+        # Emoticons are matched before lowercasing, as TextBlob does
+        text = self.emoticon_pattern.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), text)
+        return text.lower().split()
+
+    def polarities(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Score the polarity of several texts in one pass.
+
+        Args:
+            texts: Texts to score
+
+        Returns:
+            Array of polarities between -1.0 and 1.0, in the same order as texts
+        """
+        token_lists = [self.tokenize(text) for text in texts]
+        tokens = [token for token_list in token_lists for token in token_list]
+        count = len(tokens)
+        if not count:
+            return np.zeros(len(texts))
+        doc = np.repeat(np.arange(len(texts)), [len(token_list) for token_list in token_lists])
+        lookup = self.codes.get
+        ids = np.fromiter((lookup(token, UNKNOWN) for token in tokens), dtype=np.int64, count=count)
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=count)
+        negation = ids == NEGATION
+        exclamation = ids == EXCLAMATION
+        apostrophe = ids == APOSTROPHE
+        position = np.arange(count)
+
+        safe_ids = np.maximum(ids, 0)
+        # Emoticons are scored, but otherwise behave like unknown words
+        word = (ids >= 0) & (ids < self.first_emoticon)
+        scored = ids >= 0
+        other = ~word
+        is_modifier = word & self.modifier[safe_ids]
+        is_adverb = word & self.adverb[safe_ids]
+
+        def previous(mask):
+            # Last position before each token, in the same text, where mask is set
+            found = _previous(mask)
+            found[found >= 0] = np.where(doc[found[found >= 0]] == doc[found >= 0], found[found >= 0], -1)
+            return found
+
+        # The word that may be modifying each token, and the chunk it would join
+        modifier = previous(word)
+        has_modifier = modifier >= 0
+        modifier_at = np.maximum(modifier, 0)
+        has_modifier &= is_modifier[modifier_at]
+        chunk_token = previous(scored)
+
+        # A negation after an -ly modifier negates the modifier's chunk ("really not good")
+        long_word = other & (lengths > 2)
+        absorbed = (other & negation & has_modifier & is_adverb[modifier_at]
+                    & (_count_between(long_word & ~negation, modifier, position) == 0))
+
+        # A word after a modifier joins the chunk before it ("very good");
+        # unknown words of up to two letters do not break the link ("really is a good")
+        merged = (word & has_modifier
+                  & (_count_between(long_word & ~absorbed, modifier, position) == 0))
+
+        # A negation applies to the next known word; unknown words longer than
+        # one letter in between cancel it ("not a good" is still negated)
+        sets_negation = negation & ~absorbed
+        clears_negation = (word & ~negation) | (other & ~negation & ~apostrophe & (lengths > 1)) | absorbed
+        last = previous(sets_negation | clears_negation)
+        negated = word & (last >= 0)
+        negated[negated] = sets_negation[last[negated]]
+
+        # Chunks: every scored token that does not join the chunk before starts one
+        positions = np.flatnonzero(scored)
+        if not len(positions):
+            return np.zeros(len(texts))
+        starts = ~merged[positions]
+        chunk_count = int(starts.sum())
+        chunk_at = np.full(count, -1)
+        chunk_at[positions] = np.cumsum(starts) - 1
+        ends = positions[np.append(np.flatnonzero(starts)[1:] - 1, len(positions) - 1)]
+
+        intensity = self.intensity[safe_ids]
+        intensity = np.where(negated, 1.0 / intensity, intensity)
+        polarity = self.polarity[safe_ids[ends]]
+        joined = merged[ends]
+        polarity[joined] = np.clip(polarity[joined] * intensity[chunk_token[ends[joined]]], -1.0, 1.0)
+
+        # "!" boosts the chunk before it, unless a later word joins that chunk
+        boosted = exclamation & (chunk_token >= 0)
+        targets = chunk_at[chunk_token[boosted]]
+        targets = targets[ends[targets] == chunk_token[boosted]]
+        polarity = np.clip(polarity * EXCLAMATION_BOOST ** np.bincount(targets, minlength=chunk_count), -1.0, 1.0)
+
+        negated_chunks = np.bincount(chunk_at[negated], minlength=chunk_count)
+        negated_chunks += np.bincount(chunk_at[chunk_token[absorbed]], minlength=chunk_count)
+        polarity = np.where(negated_chunks > 0, polarity * NEGATION_FACTOR, polarity)
+
+        # A text's polarity is the mean over its chunks
+        chunk_doc = doc[positions[starts]]
+        totals = np.bincount(chunk_doc, weights=polarity, minlength=len(texts))
+        counts = np.bincount(chunk_doc, minlength=len(texts))
+        return totals / np.maximum(counts, 1)
+
+
+_lexicon = None
+
+
+def get_lexicon() -> SentimentLexicon:
+    """
+    Get the shared sentiment lexicon, compiling it on first use.
+
+    Returns:
+        SentimentLexicon instance
+    """
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = SentimentLexicon()
+    return _lexicon
+
+
+def score_polarities(texts: Sequence[str]) -> np.ndarray:
+    """
+    Score the polarity of several texts with the shared lexicon.
+
+    Args:
+        texts: Texts to score
+
+    Returns:
+        Array of polarities between -1.0 and 1.0, in the same order as texts
+    """
+    return get_lexicon().polarities(texts)
@@ -0,0 +1,382 @@
+"""
+Shared Ollama client for ReMind Pulse.
+
+This module wraps the local Ollama HTTP API in a client that reuses pooled
+connections and can run a bounded number of generate requests at once. A
+shared circuit breaker makes callers fail fast while the server is down.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Union
+
+from src.config import get
+from src.utils.metrics import get_metrics
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 30
+DEFAULT_FAILURE_THRESHOLD = 1
+DEFAULT_COOLDOWN = 30.0
+DEFAULT_PROBE_TIMEOUT = 0.5
+
+
+def configured_base_url() -> str:
+    """
+    Get the Ollama server URL from the configuration.
+
+    ``ollama_url`` in the config (or REMIND_OLLAMA_URL) takes precedence,
+    then Ollama's own OLLAMA_HOST variable, which may leave out the scheme
+    and port (e.g. ``0.0.0.0`` or ``gpu-box:11434``).
+
+    Returns:
+        Base URL without a trailing slash
+    """
+    url = get("ollama_url")
+    if not url:
+        url = os.environ.get("OLLAMA_HOST")
+        if not url:
+            return DEFAULT_BASE_URL
+        if "://" not in url:
+            url = f"http://{url}"
+        if url.count(":") == 1:
+            url = f"{url}:11434"
+    return url.rstrip("/")
+
+
+class OllamaUnavailable(Exception):
+    """Raised without contacting the server while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to an unreliable service.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``cooldown`` seconds. Once the cool-down has passed it
+    lets a single trial call through (half-open): success closes the breaker
+    again, failure re-opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, cooldown: float = DEFAULT_COOLDOWN,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected."""
+        with self._lock:
+            return self.opened_at is not None and (
+                self._trial_in_flight or self.clock() - self.opened_at < self.cooldown
+            )
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go ahead.
+
+        Returns:
+            True if the breaker is closed, or if this call is the half-open trial
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial_in_flight or self.clock() - self.opened_at < self.cooldown:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        """Close the breaker after a successful call."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call, opening the breaker once the threshold is reached."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class OllamaClient:
+    """
+    Client for the Ollama ``/api/generate`` endpoint.
+
+    A single requests.Session is shared by every call, with a connection pool
+    sized to the concurrency limit, so requests reuse open connections.
+    Every call goes through the client's circuit breaker, so once the server
+    is found to be down, further calls fail immediately with
+    OllamaUnavailable until the cool-down has passed.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT, breaker: Optional[CircuitBreaker] = None,
+                 probe_timeout: float = DEFAULT_PROBE_TIMEOUT):
+        """
+        Args:
+            base_url: Root URL of the Ollama server
+            max_concurrency: Maximum number of requests in flight at once
+            timeout: Default request timeout in seconds
+            breaker: Circuit breaker guarding the server (a default one if None)
+            probe_timeout: Timeout in seconds for the availability probe
+        """
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.probe_timeout = probe_timeout
+        # requests is slow to import, so it is only loaded with the first client
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._network_errors = (requests.ConnectionError, requests.Timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, model: str, prompt: str, timeout: Optional[float] = None, **options) -> str:
+        """
+        Run a single non-streaming generate request.
+
+        Args:
+            model: Name of the Ollama model
+            prompt: Prompt to send
+            timeout: Request timeout in seconds (defaults to the client's)
+            **options: Extra fields for the request body, e.g. temperature
+
+        Returns:
+            The model's response text
+
+        Raises:
+            OllamaUnavailable: If the circuit breaker is open
+            requests.RequestException: If the request fails
+        """
+        if not self.breaker.allow_request():
+            raise OllamaUnavailable(f"Ollama at {self.base_url} is unavailable")
+        metrics = get_metrics()
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "prompt": prompt, "stream": False, **options},
+                timeout=timeout or self.timeout,
+            )
+            response.raise_for_status()
+            answer = response.json()["response"]
+        except self._network_errors:
+            self.breaker.record_failure()
+            metrics.count("ollama.errors")
+            raise
+        except Exception:
+            # The server answered, so it is up even if the request was bad
+            self.breaker.record_success()
+            metrics.count("ollama.errors")
+            raise
+        self.breaker.record_success()
+        metrics.observe("ollama.generate_seconds", time.perf_counter() - start)
+        return answer
+
+    def generate_stream(self, model: str, prompt: str, timeout: Optional[float] = None,
+                        **options) -> Iterator[str]:
+        """
+        Run a streaming generate request, yielding tokens as they arrive.
+
+        Ollama streams newline-delimited JSON objects, each carrying the next
+        piece of the response and a ``done`` flag on the last one. The request
+        is only sent once iteration starts.
+
+        Args:
+            model: Name of the Ollama model
+            prompt: Prompt to send
+            timeout: Timeout in seconds for connecting and between chunks
+            **options: Extra fields for the request body, e.g. temperature
+
+        Yields:
+            Pieces of the response text
+
+        Raises:
+            OllamaUnavailable: If the circuit breaker is open
+            requests.RequestException: If the request fails
+        """
+        if not self.breaker.allow_request():
+            raise OllamaUnavailable(f"Ollama at {self.base_url} is unavailable")
+        metrics = get_metrics()
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "prompt": prompt, "stream": True, **options},
+                timeout=timeout or self.timeout,
+                stream=True,
+            )
+            response.raise_for_status()
+        except self._network_errors:
+            self.breaker.record_failure()
+            metrics.count("ollama.errors")
+            raise
+        except Exception:
+            self.breaker.record_success()
+            metrics.count("ollama.errors")
+            raise
+        self.breaker.record_success()
+
+        first_token = True
+        with response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    if first_token:
+                        metrics.observe("ollama.first_token_seconds", time.perf_counter() - start)
+                        first_token = False
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    def embed(self, model: str, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        """
+        Compute embeddings for several texts with one ``/api/embed`` request.
+
+        Args:
+            model: Name of the Ollama embedding model
+            texts: Texts to embed
+            timeout: Request timeout in seconds (defaults to the client's)
+
+        Returns:
+            One embedding per text, in order
+
+        Raises:
+            OllamaUnavailable: If the circuit breaker is open
+            requests.RequestException: If the request fails
+        """
+        if not self.breaker.allow_request():
+            raise OllamaUnavailable(f"Ollama at {self.base_url} is unavailable")
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/embed",
+                json={"model": model, "input": texts},
+                timeout=timeout or self.timeout,
+            )
+            response.raise_for_status()
+            embeddings = response.json()["embeddings"]
+        except self._network_errors:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return embeddings
+
+    def is_available(self) -> bool:
+        """
+        Check whether the server is up, using a short probe.
+
+        While the breaker is open this returns False without any network
+        call. Otherwise the server's ``/api/tags`` endpoint is queried with
+        ``probe_timeout``, and the outcome is recorded on the breaker.
+
+        Returns:
+            True if the server answered the probe
+        """
+        if not self.breaker.allow_request():
+            return False
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=self.probe_timeout)
+            response.raise_for_status()
+        except Exception:
+            self.breaker.record_failure()
+            return False
+        self.breaker.record_success()
+        return True
+
+    def generate_many(self, model: str, prompts: List[str], timeout: Optional[float] = None,
+                      **options) -> List[Union[str, Exception]]:
+        """
+        Run generate requests for several prompts concurrently.
+
+        At most ``max_concurrency`` requests are in flight at once. A failed
+        request does not affect the others: its exception is returned in
+        place of the response. The server is probed first, so when it is down
+        every prompt gets an OllamaUnavailable straight away.
+
+        Args:
+            model: Name of the Ollama model
+            prompts: Prompts to send
+            timeout: Per-request timeout in seconds (defaults to the client's)
+            **options: Extra fields for the request body, e.g. temperature
+
+        Returns:
+            Response texts or exceptions, in the same order as prompts
+        """
+        def run(prompt):
+            try:
+                return self.generate(model, prompt, timeout=timeout, **options)
+            except Exception as e:
+                return e
+
+        if prompts and not self.is_available():
+            return [OllamaUnavailable(f"Ollama at {self.base_url} is unavailable") for _ in prompts]
+        if len(prompts) <= 1:
+            return [run(prompt) for prompt in prompts]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(prompts))) as executor:
+            return list(executor.map(run, prompts))
+
+    def close(self):
+        """Close the pooled session."""
+        self.session.close()
+
+
+_client = None
+
+
+def get_client() -> OllamaClient:
+    """
+    Get the shared Ollama client, creating it on first use.
+
+    The server URL comes from configured_base_url, the concurrency limit
+    from ``ollama_concurrency`` in the config, and the breaker settings
+    from ``ollama_failure_threshold``, ``ollama_cooldown`` and
+    ``ollama_probe_timeout``.
+
+    Returns:
+        OllamaClient instance
+    """
+    global _client
+    if _client is None:
+        breaker = CircuitBreaker(
+            failure_threshold=int(get("ollama_failure_threshold", DEFAULT_FAILURE_THRESHOLD)),
+            cooldown=float(get("ollama_cooldown", DEFAULT_COOLDOWN)),
+        )
+        _client = OllamaClient(
+            base_url=configured_base_url(),
+            max_concurrency=int(get("ollama_concurrency", DEFAULT_MAX_CONCURRENCY)),
+            breaker=breaker,
+            probe_timeout=float(get("ollama_probe_timeout", DEFAULT_PROBE_TIMEOUT)),
+        )
+    return _client
+
+
+def set_client(client: Optional[OllamaClient]):
+    """
+    Replace the shared Ollama client (e.g. with one pointing at a test server).
+
+    Args:
+        client: OllamaClient instance to use, or None to reset to the default
+    """
+    global _client
+    _client = client
@@ -1,91 +1,330 @@
-from textblob import TextBlob
-import requests
+import re
+from typing import Iterator, List, Tuple
+
+from src.config import get, get_cache_path
+from src.models.ollama import OllamaUnavailable, get_client
+from src.utils.cache import PersistentCache, content_key
+from src.utils.metrics import get_metrics
+
+SENTIMENT_MODEL = "phi4"
+# Bump these whenever the prompt or the TextBlob rules change, so that stale
+# cached answers are not reused.
+SENTIMENT_PROMPT_VERSION = 1
+TEXTBLOB_RULES_VERSION = 1
+LEXICON_RULES_VERSION = 1
+
+# Offline scorer used when Ollama cannot answer: "lexicon" scores pending
+# entries in one batch (see src.models.lexicon), "textblob" one at a time
+SENTIMENT_FALLBACK = get("sentiment_fallback", "lexicon")
+
+POSITIVE_THRESHOLD = 0.2
+NEGATIVE_THRESHOLD = -0.1
+# Entries mentioning any of these are negative whatever their polarity
+NEGATIVE_PHRASES = ("terrible day", "worst day", "hate", "awful")
+_NEGATIVE_PHRASE_RE = re.compile("|".join(map(re.escape, NEGATIVE_PHRASES)), re.IGNORECASE)
+
+_sentiment_cache = None
+
+
+def get_sentiment_cache():
+    """
+    Get the shared sentiment cache, creating it on first use.
+
+    The cache lives in the configured cache directory and can be disabled
+    with ``sentiment_cache: false``.
+
+    Returns:
+        PersistentCache instance, or None if caching is disabled
+    """
+    global _sentiment_cache
+    if _sentiment_cache is None and get("sentiment_cache", True):
+        _sentiment_cache = PersistentCache(
+            get_cache_path("sentiment.sqlite"),
+            max_entries=int(get("sentiment_cache_size", 10000)),
+        )
+    return _sentiment_cache
+
+
+def set_sentiment_cache(cache):
+    """
+    Replace the shared sentiment cache (e.g. with an in-memory one in tests).
+
+    Args:
+        cache: PersistentCache instance to use, or None to reset to the default
+    """
+    global _sentiment_cache
+    _sentiment_cache = cache
+
+
+def _cached(key: str, compute):
+    cache = get_sentiment_cache()
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.put(key, value)
+    return value
+
 
 def get_sentiment_textblob(text: str) -> str:
     """
     Get sentiment using TextBlob.
 
+    Results are cached by content hash, so unchanged entries are only
+    analyzed once.
+
     Args:
         text: The text to analyze
 
     Returns:
         String indicating sentiment: "positive", "neutral", or "negative"
     """
-    # Check for strongly negative phrases
-    negative_phrases = ["terrible day", "worst day", "hate", "awful"]
-    for phrase in negative_phrases:
-        if phrase in text.lower():
-            return "negative"
+    key = content_key(text, "textblob", TEXTBLOB_RULES_VERSION)
+    return _cached(key, lambda: _textblob_sentiment(text))
 
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
 
-    if polarity > 0.2:
+def _classify(polarity: float) -> str:
+    if polarity > POSITIVE_THRESHOLD:
         return "positive"
-    elif polarity < -0.1:
+    elif polarity < NEGATIVE_THRESHOLD:
         return "negative"
     else:
         return "neutral"
 
-def get_sentiment(text: str) -> str:
+
+def _textblob_sentiment(text: str) -> str:
+    # Check for strongly negative phrases
+    if _NEGATIVE_PHRASE_RE.search(text):
+        return "negative"
+    # TextBlob is slow to import, so it is only loaded when first needed
+    from textblob import TextBlob
+
+    return _classify(TextBlob(text).sentiment.polarity)
+
+
+def get_sentiments_lexicon(texts: List[str]) -> List[str]:
     """
-    Get sentiment using Ollama if available, falling back to TextBlob.
+    Get the sentiment of several texts with the batch lexicon scorer.
+
+    The scorer applies TextBlob's polarity lexicon and rules, with the same
+    thresholds as get_sentiment_textblob, to every uncached text in one
+    pass. Results are cached by content hash.
 
     Args:
-        text: The text to analyze
+        texts: The texts to analyze
 
     Returns:
-        String indicating sentiment: "positive", "neutral", or "negative"
+        Sentiment strings in the same order as texts
     """
-    prompt = (
+    cache = get_sentiment_cache()
+    results = [None] * len(texts)
+    pending = {}
+    for i, text in enumerate(texts):
+        key = content_key(text, "lexicon", LEXICON_RULES_VERSION)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+
+    if pending:
+        # NumPy is slow to import, so the scorer is only loaded when first needed
+        from src.models.lexicon import score_polarities
+
+        keys = list(pending)
+        batch = [texts[pending[key][0]] for key in keys]
+        with get_metrics().stage("sentiment.lexicon"):
+            polarities = score_polarities(batch)
+        for key, text, polarity in zip(keys, batch, polarities):
+            tone = "negative" if _NEGATIVE_PHRASE_RE.search(text) else _classify(polarity)
+            if cache is not None:
+                cache.put(key, tone)
+            for i in pending[key]:
+                results[i] = tone
+    return results
+
+
+def get_sentiments_offline(texts: List[str]) -> List[str]:
+    """
+    Get the sentiment of several texts without Ollama.
+
+    Uses the scorer named by ``sentiment_fallback`` in the config: the batch
+    lexicon scorer by default, or TextBlob.
+
+    Args:
+        texts: The texts to analyze
+
+    Returns:
+        Sentiment strings in the same order as texts
+    """
+    if SENTIMENT_FALLBACK == "textblob":
+        with get_metrics().stage("sentiment.textblob"):
+            return [get_sentiment_textblob(text) for text in texts]
+    return get_sentiments_lexicon(texts)
+
+
+def _sentiment_prompt(text: str) -> str:
+    return (
         "Analyze the emotional tone of the following journal entry. "
         "Reply with only one word: positive, neutral, or negative.\n\n"
         f"{text}"
     )
-    try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "phi4",
-                "prompt": prompt,
-                "stream": False,
-                "temperature": 0.5,
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        answer = response.json()["response"].strip().lower()
-        if answer not in {"positive", "neutral", "negative"}:
-            return "neutral"
-        return answer
-    except Exception as e:
-        print(f"[Ollama error] {e}")
-        # Fall back to TextBlob-based sentiment analysis
-        return get_sentiment_textblob(text)
 
 
-def get_weekly_insight(text: str) -> str:
-    prompt = (
-        "These are my journal entries from the past week.\n\n"
+def _parse_sentiment(answer: str) -> str:
+    answer = answer.strip().lower()
+    return answer if answer in {"positive", "neutral", "negative"} else "neutral"
+
+
+def get_sentiment(text: str) -> str:
+    """
+    Get sentiment using Ollama if available, falling back to TextBlob.
+
+    Ollama answers are cached by content hash, model name and prompt version;
+    failed calls are not cached, so the entry is retried on the next run.
+
+    Args:
+        text: The text to analyze
+
+    Returns:
+        String indicating sentiment: "positive", "neutral", or "negative"
+    """
+    return get_sentiments([text])[0]
+
+
+def get_sentiments(texts: List[str]) -> List[str]:
+    """
+    Get the sentiment of several texts, querying Ollama concurrently.
+
+    Cached texts are answered from the cache; the rest are sent to Ollama
+    together through the shared client, and any that fail are scored
+    together by the offline fallback (see get_sentiments_offline). If the
+    server is down, every pending text goes straight to the fallback without
+    waiting on the network.
+
+    Args:
+        texts: The texts to analyze
+
+    Returns:
+        Sentiment strings in the same order as texts
+    """
+    return [tone for tone, _ in get_sentiments_with_source(texts)]
+
+
+def get_sentiments_with_source(texts: List[str]) -> List[Tuple[str, str]]:
+    """
+    Get the sentiment of several texts, and what gave each one.
+
+    This is get_sentiments for callers that store tones themselves (see
+    src.rollups): like the sentiment cache, they should keep only Ollama's
+    answers, and score the others again once Ollama is back.
+
+    Args:
+        texts: The texts to analyze
+
+    Returns:
+        (sentiment, source) pairs in the same order as texts, where source
+        is "ollama" or the offline fallback used ("lexicon" or "textblob")
+    """
+    cache = get_sentiment_cache()
+    results = [None] * len(texts)
+    pending = {}
+    for i, text in enumerate(texts):
+        key = content_key(text, SENTIMENT_MODEL, SENTIMENT_PROMPT_VERSION)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[i] = (cached, "ollama")
+        else:
+            pending.setdefault(key, []).append(i)
+
+    metrics = get_metrics()
+    metrics.count("sentiment.cached", len(texts) - sum(len(indices) for indices in pending.values()))
+    if pending:
+        keys = list(pending)
+        prompts = [_sentiment_prompt(texts[pending[key][0]]) for key in keys]
+        with metrics.stage("sentiment.ollama"):
+            answers = get_client().generate_many(SENTIMENT_MODEL, prompts, temperature=0.5)
+        if any(isinstance(answer, OllamaUnavailable) for answer in answers):
+            print(f"[Ollama unavailable] Using {SENTIMENT_FALLBACK} sentiment")
+        failed = []
+        for key, answer in zip(keys, answers):
+            if isinstance(answer, Exception):
+                if isinstance(answer, OllamaUnavailable):
+                    metrics.count("sentiment.fallback.unavailable")
+                else:
+                    print(f"[Ollama error] {answer}")
+                    metrics.count("sentiment.fallback.error")
+                failed.append(key)
+                continue
+            tone = _parse_sentiment(answer)
+            metrics.count("sentiment.ollama")
+            if cache is not None:
+                cache.put(key, tone)
+            for i in pending[key]:
+                results[i] = (tone, "ollama")
+
+        # Fall back to offline sentiment analysis, in one batch
+        fallback = get_sentiments_offline([texts[pending[key][0]] for key in failed])
+        for key, tone in zip(failed, fallback):
+            for i in pending[key]:
+                results[i] = (tone, SENTIMENT_FALLBACK)
+    return results
+
+
+def _insight_prompt(text: str, period: str = "the past week") -> str:
+    return (
+        f"These are my journal entries from {period}.\n\n"
         "Please analyze them and describe the emotional or psychological themes that show up. "
         "Write your response in first person, as if I am reflecting on myself. "
         "Use language like 'I noticed...', 'I felt...', or 'I seem to be...'. "
         "Speak gently and with emotional intelligence.\n\n"
         f"{text}"
     )
+
+
+def get_weekly_insight(text: str, period: str = "the past week") -> str:
+    prompt = _insight_prompt(text, period)
+    client = get_client()
+    if not client.is_available():
+        print("[Ollama unavailable] Skipping weekly insight")
+        return "(Insight unavailable)"
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llama3",
-                "prompt": prompt,
-                "stream": False,
-                "temperature": 0.7,
-            },
-            timeout=60
-        )
-        response.raise_for_status()
-        return response.json()["response"].strip()
+        return client.generate("llama3", prompt, timeout=60, temperature=0.7).strip()
     except Exception as e:
         print(f"[Ollama insight error] {e}")
         return "(Insight unavailable)"
+
+
+def stream_weekly_insight(text: str, period: str = "the past week") -> Iterator[str]:
+    """
+    Stream the weekly insight token by token.
+
+    Nothing is sent to Ollama until the generator is first advanced, so it
+    can be created early and consumed once the rest of the summary is shown.
+
+    Args:
+        text: The journal text to reflect on
+        period: The time the entries cover, as said in the prompt
+
+    Yields:
+        Pieces of the insight as they are generated, or a single
+        "(Insight unavailable)" if Ollama cannot be reached
+    """
+    client = get_client()
+    if not client.is_available():
+        print("[Ollama unavailable] Skipping weekly insight")
+        yield "(Insight unavailable)"
+        return
+    started = False
+    try:
+        for token in client.generate_stream("llama3", _insight_prompt(text, period), timeout=60, temperature=0.7):
+            if not started:
+                token = token.lstrip()
+                started = bool(token)
+            if token:
+                yield token
+    except Exception as e:
+        print(f"[Ollama insight error] {e}")
+        if not started:
+            yield "(Insight unavailable)"
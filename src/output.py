@@ -1,9 +1,29 @@
-from datetime import datetime, timedelta
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
 
-def render_summary(summary: dict):
-    today = datetime.now()
-    last_week = today - timedelta(days=7)
-    header = f"🧠 ReMind Pulse — {last_week.strftime('%b %d')} to {today.strftime('%b %d')}\n"
+
+def render_summary(summary: dict, insight_stream: Optional[Iterable[str]] = None,
+                   period: Optional[Tuple[date, date]] = None):
+    """
+    Print the weekly summary.
+
+    If insight_stream is given, the insight is printed token by token as the
+    stream produces it, after the rest of the summary; the full text is then
+    stored in summary['ollama_insight']. Otherwise a precomputed
+    summary['ollama_insight'] is printed, if present.
+
+    Args:
+        summary: Summary produced by analyze_entries
+        insight_stream: Optional iterable of insight text pieces
+        period: First and last day covered (defaults to the past week)
+    """
+    if period is None:
+        today = datetime.now()
+        period = (today - timedelta(days=7), today)
+    start, end = period
+    date_format = '%b %d' if start.year == end.year == datetime.now().year else '%b %d, %Y'
+    header = f"🧠 ReMind Pulse — {start.strftime(date_format)} to {end.strftime(date_format)}\n"
 
     tone = ", ".join([f"{k}: {v}" for k, v in summary.get('tone_summary', {}).items()])
     words = ", ".join([word for word, _ in summary['most_common_words']])
@@ -27,6 +47,38 @@ Average entry length: {avg_len} words
 """
 
     print(body)
-    if 'ollama_insight' in summary:
+    if insight_stream is not None:
+        print("\n🧠 Emotional Insight (via Ollama):")
+        pieces = []
+        for piece in insight_stream:
+            pieces.append(piece)
+            sys.stdout.write(piece)
+            sys.stdout.flush()
+        print()
+        summary['ollama_insight'] = "".join(pieces).strip()
+    elif 'ollama_insight' in summary:
         print("\n🧠 Emotional Insight (via Ollama):")
         print(summary['ollama_insight'])
+
+
+def render_reminders(reminders: List[Dict], limit: int = 5, today: Optional[date] = None):
+    """
+    Print the open reminders, soonest due first.
+
+    Args:
+        reminders: Reminders as returned by a provider (see src.reminders)
+        limit: Most reminders to list; the rest are counted
+        today: Day overdue reminders are counted from (defaults to today)
+    """
+    if not reminders:
+        return
+    today = today or date.today()
+    print("\n📝 Open reminders:")
+    for reminder in reminders[:limit]:
+        details = [reminder["list"]] if reminder.get("list") else []
+        if reminder.get("due"):
+            due = date.fromisoformat(reminder["due"][:10])
+            details.append(f"due {due:%b %d}" + (", overdue" if due < today else ""))
+        print(f"- {reminder['title']}" + (f" ({', '.join(details)})" if details else ""))
+    if len(reminders) > limit:
+        print(f"  …and {len(reminders) - limit} more")
@@ -1,32 +1,412 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from functools import partial
 from pathlib import Path
-from datetime import datetime, timedelta
-from src.journal_parser import load_recent_entries
-from src.analysis import analyze_entries
-from src.output import render_summary
-from src.models.sentiment import get_weekly_insight
-from src.config import get
+from datetime import date, datetime, timedelta
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from src.journal_parser import (iter_entries_by_date, iter_recent_entries, load_entries_by_date, load_recent_entries,
+                                open_manifest, read_note)
+from src.analysis import ANALYSIS_BATCH_SIZE, aggregate_contents, analyze_entries, batched_sentiments, summarize
+from src.output import render_reminders, render_summary
+from src.models.sentiment import get_weekly_insight, stream_weekly_insight
+from src.reminders import ReminderFetch, start_fetch
+from src.rollups import open_rollups, parse_range
+from src.config import get, get_cache_path
+from src.utils.cleaning import extract_journal_content
+from src.utils.metrics import Metrics, get_metrics, set_metrics
+from src.utils.scheduler import StageGraph, StreamBuffer
 
 # --- Configuration ---
 # Get configuration from config module with fallbacks
 JOURNAL_DIR = Path(get("journal_dir", str(Path.home() / "Documents" / "Journal")))
 DAYS_BACK = get("days_back", 7)
+USE_SCAN_MANIFEST = get("use_scan_manifest", True)
+# "modified" selects notes by modification time, "date" by the date in their path
+SELECT_ENTRIES_BY = get("select_entries_by", "modified")
+STREAM_INSIGHT = get("stream_insight", True)
+# Read entries lazily while analyzing them instead of loading them all first
+STREAM_ENTRIES = get("stream_entries", True)
+# Decode only the "# Journal" section of each note (the insight sees just that section)
+READ_SECTIONS_ONLY = get("read_sections_only", True)
+# Upper bound on the journal text sent to Ollama for the weekly insight
+INSIGHT_MAX_CHARS = int(get("insight_max_chars", 60000))
+# Answer from the summary kept warm by a running watch daemon (python -m src.watch)
+USE_WATCH_SNAPSHOT = get("use_watch_snapshot", True)
+# A snapshot older than this many seconds is ignored (the daemon rewrites it every minute)
+WATCH_SNAPSHOT_MAX_AGE = float(get("watch_snapshot_max_age", 300))
+WATCH_SNAPSHOT_VERSION = 1
+# Reminders are fetched in the background while the journal is analyzed, and
+# waited for at most this many seconds once the insight has been printed
+REMINDERS_TIMEOUT = float(get("reminders_timeout", 2))
+REMINDERS_LIMIT = int(get("reminders_limit", 5))
+# Request the insight, score sentiment and count words at the same time (see
+# analysis_stages). Only windows of at most analysis_batch_size entries are read
+# up front for this; longer ones are streamed through analyze_entries as before
+CONCURRENT_STAGES = get("concurrent_stages", True)
+
+
+class InsightText:
+    """
+    Collects the text for the weekly insight from entries as they stream by.
+
+    Like ``_latest_text``, only the most recent entries that fit in
+    ``max_chars`` characters are kept (entries arrive oldest first), so the
+    prompt (and the memory it takes) stays bounded however many entries are
+    analyzed.
+    """
+
+    def __init__(self, max_chars: int = INSIGHT_MAX_CHARS):
+        self.max_chars = max_chars
+        self.parts = deque()
+        self.size = 0
+        self.entries = 0
+        self.chars = 0
+
+    def collect(self, entries):
+        """Pass entries through, keeping the content of the most recent ones."""
+        for entry in entries:
+            self.entries += 1
+            self.chars += len(entry["content"]) + 2
+            piece = entry["content"][:self.max_chars]
+            self.parts.append(piece)
+            self.size += len(piece) + 2
+            # Drop the oldest entries while the newer ones fill the cap on their own
+            while len(self.parts) > 1 and self.size - len(self.parts[0]) - 2 >= self.max_chars:
+                self.size -= len(self.parts.popleft()) + 2
+            yield entry
+
+    @property
+    def text(self) -> str:
+        """The collected text, entries separated by blank lines."""
+        # The newest entries first, each cut to what is left of the cap
+        parts, size = [], 0
+        for part in reversed(self.parts):
+            if size >= self.max_chars:
+                break
+            piece = part[:self.max_chars - size]
+            parts.append(piece)
+            size += len(piece) + 2
+        return "\n\n".join(reversed(parts))
+
+    @property
+    def truncated(self) -> bool:
+        """Whether older text was left out to stay within ``max_chars``."""
+        return self.chars - 2 > self.max_chars
+
+
+def watch_snapshot_path() -> Path:
+    """Path of the summary snapshot written by the watch daemon."""
+    return get_cache_path("watch_snapshot.json")
+
+
+def snapshot_settings() -> Dict:
+    """Settings a watch snapshot must have been made with to answer this pulse."""
+    return {
+        "journal_dir": str(JOURNAL_DIR),
+        "days_back": DAYS_BACK,
+        "select_entries_by": SELECT_ENTRIES_BY,
+        "read_sections_only": READ_SECTIONS_ONLY,
+        "insight_max_chars": INSIGHT_MAX_CHARS,
+    }
+
+
+def _process_alive(pid: int) -> bool:
+    # os.kill treats 0 and negative pids as process groups, never as a daemon
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def load_watch_snapshot(path: Optional[Path] = None, max_age: float = WATCH_SNAPSHOT_MAX_AGE) -> Optional[Dict]:
+    """
+    Load the summary kept warm by the watch daemon, if it can be trusted.
+
+    A snapshot is used only if its daemon is still running, it was updated
+    within ``max_age`` seconds, and it was made with the current settings.
+
+    Args:
+        path: Snapshot file (defaults to watch_snapshot_path())
+        max_age: Maximum age of the snapshot in seconds
+
+    Returns:
+        Snapshot with ``summary``, ``insight_text``, ``entries`` and
+        ``updated`` (a Unix time), or None
+    """
+    path = path or watch_snapshot_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (snapshot.get("version") != WATCH_SNAPSHOT_VERSION
+            or snapshot.get("settings") != snapshot_settings()
+            or time.time() - snapshot.get("updated", 0) > max_age
+            or not _process_alive(snapshot.get("pid", 0))):
+        return None
+    return snapshot
+
+
+def _insight_period(period: Optional[Tuple[date, date]]) -> str:
+    return f"{period[0]:%b %d, %Y} to {period[1]:%b %d, %Y}" if period else "the past week"
+
+
+def _render(summary: Dict, weekly_text: str, period: Optional[Tuple[date, date]] = None,
+            reminders: Optional[ReminderFetch] = None, insight: Optional[Union[str, Iterable[str]]] = None):
+    metrics = get_metrics()
+    # An insight requested by a stage is only printed here; otherwise it is requested now
+    with metrics.stage("pulse.insight" if insight is None else "pulse.render"):
+        if insight is None:
+            if STREAM_INSIGHT:
+                insight = stream_weekly_insight(weekly_text, _insight_period(period))
+            else:
+                insight = get_weekly_insight(weekly_text, _insight_period(period))
+        if isinstance(insight, str):
+            summary["ollama_insight"] = insight
+            render_summary(summary, period=period)
+        else:
+            render_summary(summary, insight_stream=insight, period=period)
+    if reminders is not None:
+        with metrics.stage("pulse.reminders"):
+            render_reminders(reminders.result(REMINDERS_TIMEOUT), limit=REMINDERS_LIMIT)
+
+
+def _merge_summary(statistics: Dict, sentiment: List[str]) -> Dict:
+    return summarize(statistics, Counter(sentiment))
+
+
+def analysis_stages(contents: List[str], weekly_text: str, insight_stream: Optional[StreamBuffer] = None,
+                    period: Optional[Tuple[date, date]] = None) -> StageGraph:
+    """
+    Build the stage graph of a pulse over loaded entries.
+
+    The insight request, the sentiment of each entry and the word
+    statistics do not depend on each other, so they run at the same time;
+    the "summary" stage merges the last two into what analyze_entries would
+    return for the same entries.
+
+    Args:
+        contents: Journal contents, already extracted from their notes
+        weekly_text: Journal text for the insight
+        insight_stream: Buffer the "insight" stage streams the insight into
+            (its result is then the whole text); without one, the insight is
+            requested in one piece
+        period: First and last day covered, as said in the insight prompt
+
+    Returns:
+        StageGraph with the stages "insight", "statistics", "sentiment" and "summary"
+    """
+    graph = StageGraph(prefix="pulse.")
+    if insight_stream is not None:
+        graph.add("insight", partial(insight_stream.fill,
+                                     stream_weekly_insight(weekly_text, _insight_period(period))))
+    else:
+        graph.add("insight", partial(get_weekly_insight, weekly_text, _insight_period(period)))
+    # One worker: forking a process pool while the other stages' threads run could deadlock
+    graph.add("statistics", partial(aggregate_contents, contents, workers=1))
+    graph.add("sentiment", partial(batched_sentiments, contents))
+    graph.add("summary", _merge_summary, after=["statistics", "sentiment"])
+    return graph
+
+
+def _latest_text(notes: List[Tuple[date, str]], max_chars: int = INSIGHT_MAX_CHARS) -> str:
+    # The most recent notes that fit in max_chars, oldest first
+    parts, size = [], 0
+    for _, rel_path in reversed(notes):
+        if size >= max_chars:
+            break
+        text = read_note(JOURNAL_DIR / rel_path, READ_SECTIONS_ONLY)[:max_chars - size]
+        parts.append(text)
+        size += len(text) + 2
+    return "\n\n".join(reversed(parts))
+
+
+def run_range(start: date, end: date, use_snapshot: bool = USE_WATCH_SNAPSHOT):
+    """
+    Summarize the entries dated within a range from the daily rollups.
+
+    The rollup store is brought up to date first (only changed notes are
+    analyzed), then the summary is merged from its day and month rollups.
+    The insight is written from the most recent entries of the range.
+
+    Args:
+        start: First day, inclusive
+        end: Last day, inclusive
+        use_snapshot: Answer from the summary the watch daemon keeps for
+            this range (``python -m src.watch --range``), when it has one
+    """
+    metrics = get_metrics()
+    if not JOURNAL_DIR.exists():
+        print(f"Warning: Journal directory does not exist: {JOURNAL_DIR}")
+        return
+    print(f"🔍 Summarizing the journal from {start:%b %d, %Y} to {end:%b %d, %Y}...")
+    reminders = start_fetch()
+    snapshot = load_watch_snapshot() if use_snapshot else None
+    warm_range = snapshot.get("range") if snapshot is not None else None
+    if warm_range is not None and (warm_range["start"], warm_range["end"]) != (start.isoformat(), end.isoformat()):
+        warm_range = None
+    store = open_rollups()
+    try:
+        if warm_range is not None:
+            age = time.time() - snapshot["updated"]
+            print(f"⚡ Using the summary kept warm by the watch daemon (updated {age:.0f}s ago)")
+            summary = warm_range["summary"]
+        else:
+            with metrics.stage("pulse.rollups_update"):
+                counts = store.update(JOURNAL_DIR)
+            if counts["updated"] or counts["removed"]:
+                print(f"Updated daily rollups for {counts['updated']} notes ({counts['removed']} removed).")
+            with metrics.stage("pulse.rollups_merge"):
+                summary = store.summarize(start, end)
+        notes = store.paths(start, end)
+    finally:
+        store.close()
+    if not summary["entries"]:
+        print("No journal entries found in that range.")
+        return
+    print(f"Analyzed {summary['entries']} entries.")
+    _render(summary, _latest_text(notes), period=(start, end), reminders=reminders)
+
+
+def _note_truncated(insight_text: InsightText):
+    if insight_text.truncated:
+        print(f"Note: the insight only sees the most recent {insight_text.max_chars} characters "
+              f"of the {insight_text.entries} entries (insight_max_chars).")
+
+
+def _run_stages(contents: List[str], weekly_text: str, reminders: Optional[ReminderFetch]):
+    insight = StreamBuffer() if STREAM_INSIGHT else None
+    with analysis_stages(contents, weekly_text, insight).start() as stages:
+        summary = stages.result("summary")
+        print(f"Analyzed {len(contents)} entries.")
+        _render(summary, weekly_text, reminders=reminders,
+                insight=insight if insight is not None else stages.result("insight"))
+        stages.wait()
+
 
 # --- Main CLI ---
-def main():
+def run(use_snapshot: bool = USE_WATCH_SNAPSHOT):
+    """
+    Load recent entries, analyze them and print the summary with the weekly insight.
+
+    Args:
+        use_snapshot: Answer from the watch daemon's snapshot when there is a
+            usable one (see load_watch_snapshot) instead of reading the journal
+    """
+    metrics = get_metrics()
+    reminders = start_fetch()
+    if use_snapshot:
+        snapshot = load_watch_snapshot()
+        if snapshot is not None and snapshot["entries"]:
+            age = time.time() - snapshot["updated"]
+            print(f"⚡ Using the summary kept warm by the watch daemon (updated {age:.0f}s ago)")
+            print(f"Analyzed {snapshot['entries']} entries.")
+            _render(snapshot["summary"], snapshot["insight_text"], reminders=reminders)
+            return
+
     print("🔍 Scanning journal for the past 7 days...")
     since_date = datetime.now() - timedelta(days=DAYS_BACK)
-    entries = load_recent_entries(JOURNAL_DIR, since_date)
+    with metrics.stage("pulse.load"):
+        if SELECT_ENTRIES_BY == "date":
+            load = iter_entries_by_date if STREAM_ENTRIES else load_entries_by_date
+            entries = load(JOURNAL_DIR, since_date, section_only=READ_SECTIONS_ONLY)
+        else:
+            manifest = open_manifest(JOURNAL_DIR) if USE_SCAN_MANIFEST else None
+            load = iter_recent_entries if STREAM_ENTRIES else load_recent_entries
+            entries = load(JOURNAL_DIR, since_date, manifest=manifest, section_only=READ_SECTIONS_ONLY)
 
-    if not entries:
+        entries = iter(entries)
+        first = next(entries, None)
+    if first is None:
         print("No recent journal entries found.")
         return
 
-    print(f"Found {len(entries)} entries. Analyzing...")
-    summary = analyze_entries(entries)
+    print("Analyzing entries...")
+    insight_text = InsightText()
+    entries = insight_text.collect(itertools.chain([first], entries))
+    if CONCURRENT_STAGES:
+        # The stages each need every entry, so the window is read up front,
+        # but only as far as one batch; longer windows are streamed below
+        with metrics.stage("pulse.load"):
+            head = list(itertools.islice(entries, ANALYSIS_BATCH_SIZE + 1))
+        if len(head) <= ANALYSIS_BATCH_SIZE:
+            _note_truncated(insight_text)
+            _run_stages([extract_journal_content(entry["content"]) for entry in head], insight_text.text, reminders)
+            return
+        entries = itertools.chain(head, entries)
+
+    # With streaming loaders, the remaining entries are read during this stage
+    with metrics.stage("pulse.analyze"):
+        summary = analyze_entries(entries)
+    print(f"Analyzed {insight_text.entries} entries.")
+    _note_truncated(insight_text)
+    _render(summary, insight_text.text, reminders=reminders)
+
+
+def write_profile(metrics: Metrics, path: Path) -> Path:
+    """
+    Write a run's metrics as a JSON trace.
+
+    Args:
+        metrics: Metrics recorded during the run
+        path: File to write
+
+    Returns:
+        The path written
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(metrics.to_dict(), indent=2), encoding="utf-8")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the past week of journal entries")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PATH",
+                        help="Record per-stage timings and counters, print a breakdown and write a JSON "
+                             "trace to PATH (default: profile-<time>.json in the cache directory)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="With --profile, also record each stage's peak memory (slower)")
+    parser.add_argument("--range", dest="date_range", metavar="RANGE",
+                        help="Summarize a date range from the daily rollups instead of the past week: "
+                             "7d, 4w, 3m, 1y or YYYY-MM-DD:YYYY-MM-DD")
+    parser.add_argument("--cold", action="store_true",
+                        help="Read and analyze the journal even if the watch daemon has a summary ready")
+    args = parser.parse_args()
+    if args.date_range:
+        try:
+            period = parse_range(args.date_range)
+        except ValueError as e:
+            parser.error(str(e))
+    use_snapshot = USE_WATCH_SNAPSHOT and not args.cold
+    if args.date_range:
+        command = partial(run_range, *period, use_snapshot)
+    else:
+        command = partial(run, use_snapshot)
+
+    if args.profile is None and not args.profile_memory:
+        command()
+        return
+
+    metrics = Metrics(trace_memory=args.profile_memory)
+    set_metrics(metrics)
+    try:
+        command()
+    finally:
+        set_metrics(None)
+        metrics.close()
+        path = Path(args.profile) if args.profile else get_cache_path(f"profile-{datetime.now():%Y%m%d-%H%M%S}.json")
+        print("\n" + metrics.render())
+        print(f"\nProfile written to {write_profile(metrics, path)}")
 
-    weekly_text = "\n\n".join([e["content"] for e in entries])
-    summary["ollama_insight"] = get_weekly_insight(weekly_text)
-    render_summary(summary)
 
 if __name__ == "__main__":
     main()
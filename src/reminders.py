@@ -1,35 +1,523 @@
+"""
+Open reminders for ReMind Pulse.
+
+Reminders come from a provider, an object with a ``name`` and a ``fetch()``
+method returning the open (not completed) reminders as dictionaries with a
+``title``, the ``list`` they belong to, a ``due`` date or date-time in ISO
+8601 (or None) and ``notes``:
+
+- AppleScriptProvider asks the Reminders app on macOS (see get_reminders.scpt)
+- FileProvider reads an ICS calendar (its VTODOs) or a JSON file
+- FakeProvider returns canned items, for tests
+
+CachedProvider keeps the last fetch on disk for a while, so that a pulse
+only asks AppleScript (which is slow) every few minutes, and falls back to
+the last items it has when the provider fails. ReminderFetch runs a fetch on
+a background thread, so that it overlaps with journal analysis and the
+pulse only waits for it up to a deadline; a fetch still running when the
+pulse is done gets a short grace period at exit to finish and be cached.
+"""
+
+import atexit
+import json
+import os
+import re
 import subprocess
-from typing import List
-from datetime import date
-
-def get_reminders():
-    script = '''
-    tell application "Reminders"
-            set theReminders to name of every reminder in every list
-            return theReminders
-        end tell
-    '''
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.config import get, get_cache_path
+from src.utils.metrics import get_metrics
+
+SCRIPT_PATH = Path(__file__).parent / "get_reminders.scpt"
+# Seconds a fetch is reused before the provider is asked again
+DEFAULT_TTL = 900
+APPLESCRIPT_TIMEOUT = 10
+# Seconds a late fetch may still run at exit, so its items get cached for the next pulse
+EXIT_GRACE = 5
+# Bump whenever the cached item format changes
+CACHE_VERSION = 1
+
+_ICS_DATE = re.compile(r"(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2})Z?)?")
+_ICS_ESCAPES = {"n": "\n", "N": "\n", ",": ",", ";": ";", "\\": "\\"}
+
+
+class RemindersUnavailable(Exception):
+    """Raised when a provider cannot fetch reminders."""
+
+
+def make_reminder(title: str, list_name: str = "", due: Optional[str] = None, notes: str = "") -> Dict:
+    """
+    Build a reminder item.
+
+    Args:
+        title: What to do
+        list_name: Name of the list the reminder belongs to
+        due: Due date or date-time in ISO 8601, or None
+        notes: Free-form notes
+
+    Returns:
+        Reminder dictionary
+    """
+    return {"title": title, "list": list_name, "due": due, "notes": notes}
+
+
+def sort_reminders(items: List[Dict]) -> List[Dict]:
+    """Sort reminders by due date (undated last), then list and title."""
+    return sorted(items, key=lambda item: (item["due"] is None, item["due"] or "", item["list"], item["title"]))
+
+
+def _normalize_due(text: str) -> Optional[str]:
+    text = text.strip()
+    if not text:
+        return None
     try:
-        result = subprocess.run(
-            ['osascript', '-e', script],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        print("STDOUT:", result.stdout)
-        print("STDERR:", result.stderr)
+        return (date.fromisoformat(text) if len(text) == 10 else datetime.fromisoformat(text)).isoformat()
+    except ValueError:
+        return None
+
+
+class AppleScriptProvider:
+    """Open reminders from the Reminders app, through osascript (macOS only)."""
+
+    name = "applescript"
+
+    def __init__(self, script_path: Path = SCRIPT_PATH, timeout: float = APPLESCRIPT_TIMEOUT, runner=subprocess.run):
+        """
+        Args:
+            script_path: AppleScript printing one tab-separated line per reminder
+            timeout: Seconds to wait for osascript
+            runner: Function with the signature of subprocess.run
+        """
+        self.script_path = Path(script_path)
+        self.timeout = timeout
+        self.runner = runner
+
+    def fetch(self) -> List[Dict]:
+        try:
+            result = self.runner(["osascript", str(self.script_path)], capture_output=True, text=True,
+                                 timeout=self.timeout)
+        except FileNotFoundError as e:
+            raise RemindersUnavailable("osascript not found; the Reminders app is only available on macOS") from e
+        except OSError as e:
+            raise RemindersUnavailable(f"Cannot run osascript: {e}") from e
+        except subprocess.TimeoutExpired as e:
+            raise RemindersUnavailable(f"Reminders did not answer within {self.timeout:g}s") from e
         if result.returncode != 0:
-            print("AppleScript error:", result.stderr)
-            return []
-        return [result.stdout.strip()] if result.stdout.strip() else []
-    except subprocess.TimeoutExpired:
-        print("AppleScript timed out. Reminders AppleScript interface may be broken on this macOS version.")
+            raise RemindersUnavailable(f"AppleScript error: {result.stderr.strip()}")
+        return parse_applescript_output(result.stdout)
+
+
+def parse_applescript_output(output: str) -> List[Dict]:
+    """
+    Parse the output of get_reminders.scpt.
+
+    Args:
+        output: One line per reminder: list name, title and due date, tab-separated
+
+    Returns:
+        Reminder dictionaries, sorted (see sort_reminders)
+    """
+    items = []
+    for line in output.splitlines():
+        fields = line.split("\t")
+        if len(fields) < 2 or not fields[1].strip():
+            continue
+        due = _normalize_due(fields[2]) if len(fields) > 2 else None
+        items.append(make_reminder(fields[1].strip(), fields[0].strip(), due))
+    return sort_reminders(items)
+
+
+class FileProvider:
+    """
+    Open reminders from a file: an ICS calendar or a JSON list.
+
+    In an ICS file, every VTODO that is not completed is a reminder; the
+    list is the calendar's X-WR-CALNAME (or the file name). A JSON file
+    holds a list of objects with ``title``, ``list``, ``due``, ``notes`` and
+    ``completed``, or an object with such a list under ``"reminders"``.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: File to read; its suffix (.ics or .json) selects the format
+        """
+        self.path = Path(path)
+        self.name = f"file:{self.path}"
+
+    def fetch(self) -> List[Dict]:
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except OSError as e:
+            raise RemindersUnavailable(f"Cannot read reminders from {self.path}: {e}") from e
+        if self.path.suffix.lower() == ".ics":
+            return parse_ics(text, default_list=self.path.stem)
+        try:
+            return parse_json(json.loads(text), default_list=self.path.stem)
+        except ValueError as e:
+            raise RemindersUnavailable(f"Invalid reminders file {self.path}: {e}") from e
+
+
+def _unescape_ics(value: str) -> str:
+    return re.sub(r"\\(.)", lambda match: _ICS_ESCAPES.get(match.group(1), match.group(1)), value)
+
+
+def _ics_due(value: str) -> Optional[str]:
+    match = _ICS_DATE.fullmatch(value.strip())
+    if match is None:
+        return None
+    year, month, day, hour, minute, second = match.groups()
+    if hour is None:
+        return f"{year}-{month}-{day}"
+    try:
+        due = datetime(*map(int, (year, month, day, hour, minute, second)))
+    except ValueError:
+        return None
+    if value.strip().endswith("Z"):
+        # UTC times are given in local time, like the other providers' (and like floating times)
+        due = due.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return due.isoformat()
+
+
+def parse_ics(text: str, default_list: str = "") -> List[Dict]:
+    """
+    Parse the open to-dos of an iCalendar file.
+
+    Args:
+        text: Content of the .ics file
+        default_list: List name when the calendar has no X-WR-CALNAME
+
+    Returns:
+        Reminder dictionaries, sorted (see sort_reminders)
+    """
+    # Long lines are folded onto continuation lines starting with a space or a tab
+    unfolded = re.sub(r"\r?\n[ \t]", "", text)
+    list_name, todo, todos = default_list, None, []
+    # Components nested in a VTODO (such as VALARM) have properties of their own
+    depth = 0
+    for line in unfolded.splitlines():
+        name, _, value = line.partition(":")
+        name = name.split(";", 1)[0].upper()
+        if todo is not None and name in ("BEGIN", "END") and (depth or value.upper() != "VTODO"):
+            depth += 1 if name == "BEGIN" else -1
+        elif name == "BEGIN" and value.upper() == "VTODO":
+            todo, depth = {}, 0
+        elif name == "END" and value.upper() == "VTODO":
+            if todo is not None:
+                todos.append(todo)
+            todo = None
+        elif todo is not None:
+            if depth == 0:
+                todo.setdefault(name, value)
+        elif name == "X-WR-CALNAME":
+            list_name = _unescape_ics(value)
+
+    items = []
+    for todo in todos:
+        if todo.get("STATUS", "").upper() in ("COMPLETED", "CANCELLED") or "COMPLETED" in todo:
+            continue
+        title = _unescape_ics(todo.get("SUMMARY", "")).strip()
+        if title:
+            items.append(make_reminder(title, list_name, _ics_due(todo.get("DUE", "")),
+                                       _unescape_ics(todo.get("DESCRIPTION", ""))))
+    return sort_reminders(items)
+
+
+def parse_json(data, default_list: str = "") -> List[Dict]:
+    """
+    Parse the open reminders of a JSON document.
+
+    Args:
+        data: List of reminder objects, or an object with one under "reminders"
+        default_list: List name for reminders without one
+
+    Returns:
+        Reminder dictionaries, sorted (see sort_reminders)
+
+    Raises:
+        ValueError: If the document does not hold a list of objects
+    """
+    if isinstance(data, dict):
+        data = data.get("reminders")
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        raise ValueError("expected a list of reminder objects")
+    items = []
+    for item in data:
+        title = str(item.get("title") or item.get("name") or "").strip()
+        if title and not item.get("completed"):
+            items.append(make_reminder(title, str(item.get("list") or default_list),
+                                       _normalize_due(str(item.get("due") or "")), str(item.get("notes") or "")))
+    return sort_reminders(items)
+
+
+class FakeProvider:
+    """Canned reminders, optionally slow or failing, for tests."""
+
+    name = "fake"
+
+    def __init__(self, items: Optional[List[Dict]] = None, delay: float = 0.0,
+                 error: Optional[Exception] = None):
+        """
+        Args:
+            items: Reminders to return
+            delay: Seconds each fetch takes
+            error: Exception each fetch raises instead of returning
+        """
+        self.items = list(items or [])
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def fetch(self) -> List[Dict]:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return sort_reminders(self.items)
+
+
+class CachedProvider:
+    """
+    Provider wrapper that reuses a fetch for ``ttl`` seconds.
+
+    The last fetch is kept in a JSON file (or in memory, if the path is
+    None), tagged with the name of the provider it came from. When the
+    provider fails, the last items are returned however old they are;
+    only if there are none is the error raised.
+    """
+
+    def __init__(self, provider, ttl: float = DEFAULT_TTL, path: Optional[Path] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            provider: Provider to fetch from
+            ttl: Seconds a fetch is fresh
+            path: JSON file for the last fetch, or None to keep it in memory
+            clock: Function returning the current Unix time
+        """
+        self.provider = provider
+        self.name = provider.name
+        self.ttl = ttl
+        self.path = Path(path) if path is not None else None
+        self.clock = clock
+        self._entry: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Optional[Dict]:
+        if self._entry is None and self.path is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if entry.get("version") == CACHE_VERSION and entry.get("source") == self.provider.name:
+                self._entry = entry
+        return self._entry
+
+    def _store(self, items: List[Dict]):
+        self._entry = {"version": CACHE_VERSION, "source": self.provider.name, "fetched": self.clock(),
+                       "items": items}
+        if self.path is not None:
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._entry, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                # The items are still kept in memory for this run
+                print(f"Warning: could not cache reminders in {self.path}: {e}")
+
+    def peek(self) -> List[Dict]:
+        """Get the last fetched items without asking the provider, however old they are."""
+        with self._lock:
+            entry = self._load()
+        return entry["items"] if entry else []
+
+    def fetch(self) -> List[Dict]:
+        metrics = get_metrics()
+        with self._lock:
+            entry = self._load()
+        if entry is not None and 0 <= self.clock() - entry["fetched"] < self.ttl:
+            metrics.count("reminders.cached")
+            return entry["items"]
+        # The lock is not held while fetching, so peek() answers during a slow fetch
+        try:
+            with metrics.stage("reminders.fetch"):
+                items = self.provider.fetch()
+        except RemindersUnavailable:
+            if entry is None:
+                raise
+            metrics.count("reminders.stale")
+            return entry["items"]
+        with self._lock:
+            self._store(items)
+        return items
+
+
+class ReminderFetch:
+    """A fetch running on a background thread."""
+
+    def __init__(self, provider, exit_grace: float = EXIT_GRACE):
+        """
+        Start fetching.
+
+        Args:
+            provider: Provider to fetch from (a CachedProvider can also
+                answer with its last items when the fetch is late)
+            exit_grace: Seconds the interpreter waits at exit for a fetch
+                that is still running, so that a CachedProvider can store
+                its items for the next pulse even when they came too late
+                for this one
+        """
+        self.provider = provider
+        self.exit_grace = exit_grace
+        self._future: Future = Future()
+        # A daemon thread: a pulse that is done waits for a hung fetch at most exit_grace seconds
+        self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+        self._thread.start()
+        if exit_grace > 0:
+            atexit.register(self._finish)
+
+    def _run(self):
+        try:
+            self._future.set_result(self.provider.fetch())
+        except BaseException as e:
+            self._future.set_exception(e)
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def _finish(self):
+        if self._thread.is_alive():
+            self._thread.join(self.exit_grace)
+
+    def _fallback(self) -> List[Dict]:
+        return self.provider.peek() if isinstance(self.provider, CachedProvider) else []
+
+    def result(self, timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Get the reminders, waiting at most ``timeout`` seconds.
+
+        Reminders are a side feature, so this never raises: a late or failed
+        fetch answers with the provider's last items (see CachedProvider.peek),
+        or an empty list.
+
+        Args:
+            timeout: Seconds to wait, or None to wait for the fetch
+
+        Returns:
+            The fetched reminders, or the fallback described above
+        """
+        try:
+            return self._future.result(timeout)
+        except FutureTimeout:
+            get_metrics().count("reminders.late")
+            return self._fallback()
+        except RemindersUnavailable:
+            return self._fallback()
+        except Exception as e:
+            print(f"[Reminders error] {type(e).__name__}: {e}")
+            return self._fallback()
+
+
+def provider_from_config():
+    """
+    Create the provider selected by the ``reminders_source`` setting.
+
+    ``"auto"`` (the default) uses the Reminders app on macOS and nothing
+    elsewhere, ``"applescript"`` always uses the app, ``"none"`` disables
+    reminders, and anything else is the path of an .ics or .json file.
+
+    Returns:
+        Provider, or None if reminders are disabled
+    """
+    source = str(get("reminders_source", "auto"))
+    if source == "none" or (source == "auto" and sys.platform != "darwin"):
+        return None
+    if source in ("auto", "applescript"):
+        return AppleScriptProvider(timeout=float(get("reminders_applescript_timeout", APPLESCRIPT_TIMEOUT)))
+    return FileProvider(Path(source).expanduser())
+
+
+_provider = None
+_provider_set = False
+
+
+def get_provider() -> Optional[CachedProvider]:
+    """
+    Get the shared reminders provider, creating it on first use.
+
+    The provider comes from provider_from_config, wrapped in a
+    CachedProvider that keeps ``reminders.json`` in the cache directory
+    fresh for ``reminders_ttl`` seconds.
+
+    Returns:
+        CachedProvider instance, or None if reminders are disabled
+    """
+    global _provider, _provider_set
+    if not _provider_set:
+        provider = provider_from_config()
+        if provider is not None:
+            _provider = CachedProvider(provider, ttl=float(get("reminders_ttl", DEFAULT_TTL)),
+                                       path=get_cache_path("reminders.json"))
+        _provider_set = True
+    return _provider
+
+
+def set_provider(provider):
+    """
+    Replace the shared reminders provider (e.g. with a FakeProvider in tests).
+
+    Args:
+        provider: Provider to use (wrap it in a CachedProvider to cache it),
+            or None to reset to the configured one
+    """
+    global _provider, _provider_set
+    _provider = provider
+    _provider_set = provider is not None
+
+
+def start_fetch() -> Optional[ReminderFetch]:
+    """
+    Start fetching reminders in the background from the shared provider.
+
+    Returns:
+        ReminderFetch to collect the result from, or None if reminders are disabled
+    """
+    provider = get_provider()
+    if provider is None:
+        return None
+    return ReminderFetch(provider, exit_grace=float(get("reminders_exit_grace", EXIT_GRACE)))
+
+
+def get_reminders() -> List[Dict]:
+    """
+    Get the open reminders from the shared provider, waiting for them.
+
+    Returns:
+        Reminder dictionaries, sorted (see sort_reminders); empty if
+        reminders are disabled or unavailable
+    """
+    provider = get_provider()
+    if provider is None:
+        return []
+    try:
+        return provider.fetch()
+    except RemindersUnavailable as e:
+        print(f"Reminders unavailable: {e}")
         return []
 
-if __name__ == "__main__":
-    reminders = get_reminders()
-    print("Reminders result:", reminders)
-    events = get_reminders()
-    for event in events:
-        print(event)
 
+if __name__ == "__main__":
+    for reminder in get_reminders():
+        due = f" (due {reminder['due']})" if reminder["due"] else ""
+        print(f"- [{reminder['list']}] {reminder['title']}{due}")
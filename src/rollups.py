@@ -0,0 +1,450 @@
+"""
+Per-day rollups of journal statistics for ReMind Pulse.
+
+The rollup store keeps, in SQLite, the partial statistics and tone of
+every daily note, and merges them into one rollup per day and one per
+month: word counts, tag counts, question counts, lengths and tone tallies.
+A summary over any date range is then a merge of a few buckets (whole
+months, plus the days at either end) instead of a pass over the notes, so
+a year in review costs about as much as a week.
+
+The store is updated incrementally: a scan manifest finds the notes whose
+content changed since the last update, only those are read and analyzed,
+and only the days and months they belong to are merged again.
+SlidingRange keeps the merged aggregate of a range that moves, adding the
+days that enter it and subtracting the days that leave (the watch daemon
+uses it to keep a long range current, see src.watch.WarmRange).
+"""
+
+import calendar
+import hashlib
+import json
+import re
+import sqlite3
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.analysis import (ANALYSIS_BATCH_SIZE, ANALYSIS_VERSION, TOKENIZER, custom_stopwords, get_partials,
+                          merge_aggregates, summarize)
+from src.config import get_cache_path
+from src.journal_parser import is_journal_file, note_date_from_path, read_note
+from src.models.ollama import get_client
+from src.models.sentiment import SENTIMENT_MODEL, SENTIMENT_PROMPT_VERSION, get_sentiments_with_source
+from src.utils.cleaning import extract_journal_content
+from src.utils.manifest import ScanManifest
+
+# Bump whenever the schema or the rollup format changes, so that the store is rebuilt
+ROLLUP_VERSION = 2
+
+_RANGE_PATTERN = re.compile(r"(\d+)\s*([dwmy])")
+
+
+def parse_range(text: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Parse a date range given on the command line.
+
+    Args:
+        text: "7d", "4w", "3m" or "1y" for the last days, weeks, months or
+            years up to today, or "YYYY-MM-DD:YYYY-MM-DD" for explicit dates
+        today: Last day of relative ranges (defaults to today)
+
+    Returns:
+        First and last day of the range, inclusive
+
+    Raises:
+        ValueError: If the range cannot be parsed or is empty
+    """
+    text = text.strip().lower()
+    if ":" in text:
+        start, end = (date.fromisoformat(part.strip()) for part in text.split(":", 1))
+    else:
+        match = _RANGE_PATTERN.fullmatch(text)
+        if match is None:
+            raise ValueError(f"Invalid range {text!r}; use e.g. 7d, 4w, 3m, 1y or 2025-01-01:2025-03-31")
+        count, unit = int(match.group(1)), match.group(2)
+        end = today or date.today()
+        if unit == "d":
+            start = end - timedelta(days=count - 1)
+        elif unit == "w":
+            start = end - timedelta(weeks=count) + timedelta(days=1)
+        else:
+            months = count if unit == "m" else 12 * count
+            year, month = divmod(end.year * 12 + end.month - 1 - months, 12)
+            month += 1
+            start = date(year, month, min(end.day, calendar.monthrange(year, month)[1])) + timedelta(days=1)
+    if start > end:
+        raise ValueError(f"Empty range {text!r}")
+    return start, end
+
+
+def new_rollup() -> Dict:
+    """Create an empty rollup: an aggregate (see analysis.new_aggregate) plus tone tallies."""
+    return {"words": {}, "tags": {}, "questions": 0, "entries": 0, "total_length": 0, "tones": {}}
+
+
+def merge_rollups(rollups: Iterable[Dict]) -> Dict:
+    """
+    Merge rollups in order.
+
+    Args:
+        rollups: Iterable of rollups
+
+    Returns:
+        The merged rollup, with Counters for words, tags and tones
+    """
+    tones = Counter()
+
+    def with_tones():
+        for rollup in rollups:
+            tones.update(rollup["tones"])
+            yield rollup
+
+    merged = merge_aggregates(with_tones())
+    merged["tones"] = tones
+    return merged
+
+
+def summarize_rollup(rollup: Dict) -> Dict:
+    """
+    Build the pulse summary of a merged rollup.
+
+    Args:
+        rollup: Rollup from merge_rollups
+
+    Returns:
+        Summary dictionary (see analysis.summarize), plus the number of entries
+    """
+    summary = summarize(rollup, Counter(rollup["tones"]))
+    summary["entries"] = rollup["entries"]
+    return summary
+
+
+def _note_rollup(partial: Dict, tone: str) -> Dict:
+    return {"words": partial["words"], "tags": partial["tags"], "questions": partial["questions"],
+            "entries": 1, "total_length": partial["length"], "tones": {tone: 1}}
+
+
+def _as_json(rollup: Dict) -> str:
+    return json.dumps({key: dict(value) if isinstance(value, Counter) else value for key, value in rollup.items()})
+
+
+def _fingerprint() -> str:
+    # The settings stored partials depend on. NLTK's own stopword list is left
+    # out: loading it would cost more than a whole update with nothing to do
+    stopwords = hashlib.sha256("\n".join(sorted(custom_stopwords)).encode("utf-8")).hexdigest()[:16]
+    return f"{ANALYSIS_VERSION}:{TOKENIZER}:{stopwords}:{SENTIMENT_MODEL}:{SENTIMENT_PROMPT_VERSION}"
+
+
+def _month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+class RollupStore:
+    """
+    SQLite store of per-note, per-day and per-month rollups.
+
+    ``notes`` holds every daily note's day, the SHA-256 it was analyzed at,
+    its partial statistics, its tone and what gave the tone ("ollama" or an
+    offline fallback); ``days`` and ``months`` hold the
+    rollups of the notes of each day (in path order) and of the days of each
+    month (in day order). A path of None keeps the store in memory.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:", isolation_level=None)
+        if self.path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != ROLLUP_VERSION:
+            for table in ("notes", "days", "months", "meta"):
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version = {ROLLUP_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "path TEXT PRIMARY KEY, day TEXT NOT NULL, sha256 TEXT NOT NULL, partial TEXT NOT NULL, "
+            "tone TEXT NOT NULL, source TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS notes_day ON notes (day)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS days (day TEXT PRIMARY KEY, rollup TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS months (month TEXT PRIMARY KEY, rollup TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _check_fingerprint(self):
+        # Partials and tones made with another tokenizer, stopword list or
+        # sentiment model are recomputed
+        fingerprint = _fingerprint()
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'analysis'").fetchone()
+        if row is None or row[0] != fingerprint:
+            for table in ("notes", "days", "months"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('analysis', ?)", (fingerprint,))
+
+    def update(self, journal_dir: Path, manifest: Optional[ScanManifest] = None,
+               batch_size: int = ANALYSIS_BATCH_SIZE) -> Dict:
+        """
+        Bring the store up to date with the journal.
+
+        Notes whose SHA-256 differs from the stored one are read (their
+        "# Journal" section), analyzed and given a tone in batches; notes
+        that no longer exist are removed; notes whose tone came from the
+        offline fallback are given a tone again if Ollama is available; then
+        the rollups of the days and months they belong to are merged again.
+        All in one transaction.
+
+        Args:
+            journal_dir: Directory containing journal entries
+            manifest: ScanManifest for journal_dir (defaults to one in the cache directory)
+            batch_size: Notes analyzed at a time
+
+        Returns:
+            Dictionary with the number of notes updated, removed, unchanged
+            and rescored (given a tone by Ollama after a fallback one), and
+            the sorted list of days whose rollup changed
+        """
+        if manifest is None:
+            manifest = ScanManifest(journal_dir, get_cache_path("rollups_manifest.json"),
+                                    file_filter=is_journal_file).load()
+        manifest.scan()
+        current = {rel_path: record["sha256"] for rel_path, record in manifest.files.items()}
+
+        self._conn.execute("BEGIN")
+        try:
+            self._check_fingerprint()
+            stored = {path: (day, sha, source)
+                      for path, day, sha, source in self._conn.execute("SELECT path, day, sha256, source FROM notes")}
+            changed = sorted(rel_path for rel_path, sha in current.items()
+                             if rel_path not in stored or stored[rel_path][1] != sha)
+            removed = sorted(set(stored) - set(current))
+            days = {stored[rel_path][0] for rel_path in removed + changed if rel_path in stored}
+            # Fallback tones are not kept for good, like in the sentiment cache:
+            # once Ollama answers again, those notes are scored again
+            rescore = sorted(rel_path for rel_path, (_, sha, source) in stored.items()
+                             if source != "ollama" and current.get(rel_path) == sha)
+            if rescore and not get_client().is_available():
+                rescore = []
+            rescored = 0
+
+            for rel_path in removed:
+                self._conn.execute("DELETE FROM notes WHERE path = ?", (rel_path,))
+            for start in range(0, len(changed), batch_size):
+                batch = changed[start:start + batch_size]
+                contents = [extract_journal_content(read_note(manifest.path_for(rel_path), section_only=True))
+                            for rel_path in batch]
+                tones = get_sentiments_with_source(contents)
+                for rel_path, partial, (tone, source) in zip(batch, get_partials(contents), tones):
+                    note_date = note_date_from_path(rel_path)
+                    if note_date is None:
+                        note_date = datetime.fromtimestamp(manifest.files[rel_path]["mtime_ns"] / 1e9).date()
+                    days.add(note_date.isoformat())
+                    self._conn.execute("INSERT OR REPLACE INTO notes (path, day, sha256, partial, tone, source) "
+                                       "VALUES (?, ?, ?, ?, ?, ?)",
+                                       (rel_path, note_date.isoformat(), current[rel_path], json.dumps(partial),
+                                        tone, source))
+            for start in range(0, len(rescore), batch_size):
+                batch = rescore[start:start + batch_size]
+                contents = [extract_journal_content(read_note(manifest.path_for(rel_path), section_only=True))
+                            for rel_path in batch]
+                for rel_path, (tone, source) in zip(batch, get_sentiments_with_source(contents)):
+                    if source == "ollama":
+                        rescored += 1
+                        days.add(stored[rel_path][0])
+                        self._conn.execute("UPDATE notes SET tone = ?, source = ? WHERE path = ?",
+                                           (tone, source, rel_path))
+            self._merge_days(days)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        manifest.save()
+        return {"updated": len(changed), "removed": len(removed), "unchanged": len(current) - len(changed),
+                "rescored": rescored, "days": sorted(days)}
+
+    def _merge_days(self, days: Iterable[str]):
+        months = set()
+        for day in days:
+            rows = self._conn.execute("SELECT partial, tone FROM notes WHERE day = ? ORDER BY path", (day,)).fetchall()
+            if rows:
+                rollup = merge_rollups(_note_rollup(json.loads(partial), tone) for partial, tone in rows)
+                self._conn.execute("INSERT OR REPLACE INTO days (day, rollup) VALUES (?, ?)", (day, _as_json(rollup)))
+            else:
+                self._conn.execute("DELETE FROM days WHERE day = ?", (day,))
+            months.add(day[:7])
+        for month in months:
+            rows = self._conn.execute("SELECT rollup FROM days WHERE day LIKE ? ORDER BY day", (f"{month}-%",))
+            rollup = merge_rollups(json.loads(row) for row, in rows)
+            if rollup["entries"]:
+                self._conn.execute("INSERT OR REPLACE INTO months (month, rollup) VALUES (?, ?)",
+                                   (month, _as_json(rollup)))
+            else:
+                self._conn.execute("DELETE FROM months WHERE month = ?", (month,))
+
+    def day_rollups(self, start: date, end: date) -> Iterator[Tuple[date, Dict]]:
+        """
+        Get the rollups of the days in a range that have notes.
+
+        Args:
+            start: First day, inclusive
+            end: Last day, inclusive
+
+        Yields:
+            Day and its rollup, in day order
+        """
+        rows = self._conn.execute("SELECT day, rollup FROM days WHERE day BETWEEN ? AND ? ORDER BY day",
+                                  (start.isoformat(), end.isoformat()))
+        for day, rollup in rows:
+            yield date.fromisoformat(day), json.loads(rollup)
+
+    def _buckets(self, start: date, end: date) -> Iterator[Dict]:
+        # Whole months come from the month rollups, the days at either end from the day rollups
+        first = start
+        while first <= end:
+            last = min(_month_end(first), end)
+            if first.day == 1 and last == _month_end(first):
+                row = self._conn.execute("SELECT rollup FROM months WHERE month = ?",
+                                         (first.isoformat()[:7],)).fetchone()
+                if row is not None:
+                    yield json.loads(row[0])
+            else:
+                for _, rollup in self.day_rollups(first, last):
+                    yield rollup
+            first = last + timedelta(days=1)
+
+    def rollup(self, start: date, end: date) -> Dict:
+        """
+        Merge the rollups of a date range.
+
+        Args:
+            start: First day, inclusive
+            end: Last day, inclusive
+
+        Returns:
+            Merged rollup (see merge_rollups)
+        """
+        return merge_rollups(self._buckets(start, end))
+
+    def summarize(self, start: date, end: date) -> Dict:
+        """
+        Summarize the notes of a date range.
+
+        Args:
+            start: First day, inclusive
+            end: Last day, inclusive
+
+        Returns:
+            Summary dictionary (see summarize_rollup)
+        """
+        return summarize_rollup(self.rollup(start, end))
+
+    def paths(self, start: date, end: date) -> List[Tuple[date, str]]:
+        """
+        Get the notes of a date range.
+
+        Args:
+            start: First day, inclusive
+            end: Last day, inclusive
+
+        Returns:
+            Days and relative paths of the notes, in day and path order
+        """
+        rows = self._conn.execute("SELECT day, path FROM notes WHERE day BETWEEN ? AND ? ORDER BY day, path",
+                                  (start.isoformat(), end.isoformat()))
+        return [(date.fromisoformat(day), path) for day, path in rows]
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+
+def open_rollups() -> RollupStore:
+    """
+    Open the rollup store in the cache directory.
+
+    Returns:
+        RollupStore stored in ``rollups.sqlite``
+    """
+    return RollupStore(get_cache_path("rollups.sqlite"))
+
+
+class SlidingRange:
+    """
+    Merged rollup of a date range that moves over time.
+
+    Moving the range only reads the rollups of the days that enter it and
+    subtracts those of the days that leave it, and days whose notes changed
+    are swapped in place, so a long-lived range (e.g. "the last 365 days")
+    stays cheap to keep current. Counts match a fresh merge; only the order
+    in which tied words and tags were first seen may differ.
+    """
+
+    def __init__(self, store: RollupStore):
+        """
+        Args:
+            store: Rollup store the days are read from
+        """
+        self.store = store
+        self.start: Optional[date] = None
+        self.end: Optional[date] = None
+        self.days: Dict[date, Dict] = {}
+        self.rollup = merge_rollups([])
+
+    def _apply(self, rollup: Dict, sign: int):
+        for field in ("words", "tags", "tones"):
+            counter = self.rollup[field]
+            for key, count in rollup[field].items():
+                counter[key] += sign * count
+                if counter[key] <= 0:
+                    del counter[key]
+        for field in ("questions", "entries", "total_length"):
+            self.rollup[field] += sign * rollup[field]
+
+    def _add_days(self, start: date, end: date):
+        if start <= end:
+            for day, rollup in self.store.day_rollups(start, end):
+                self.days[day] = rollup
+                self._apply(rollup, 1)
+
+    def move(self, start: date, end: date) -> Dict:
+        """
+        Move the range.
+
+        Args:
+            start: New first day, inclusive
+            end: New last day, inclusive
+
+        Returns:
+            The merged rollup of the new range
+        """
+        if self.start is None or start > self.end or end < self.start:
+            self.days = {}
+            self.rollup = merge_rollups([])
+            self._add_days(start, end)
+        else:
+            for day in [day for day in self.days if day < start or day > end]:
+                self._apply(self.days.pop(day), -1)
+            self._add_days(start, self.start - timedelta(days=1))
+            self._add_days(self.end + timedelta(days=1), end)
+        self.start, self.end = start, end
+        return self.rollup
+
+    def refresh(self, days: Iterable[str]) -> Dict:
+        """
+        Re-read days whose notes changed (e.g. the ``days`` from RollupStore.update).
+
+        Args:
+            days: ISO dates of the changed days
+
+        Returns:
+            The merged rollup of the range
+        """
+        for day in sorted({date.fromisoformat(day) for day in days}):
+            if self.start is None or not self.start <= day <= self.end:
+                continue
+            if day in self.days:
+                self._apply(self.days.pop(day), -1)
+            self._add_days(day, day)
+        return self.rollup
@@ -0,0 +1,261 @@
+"""
+Full-text search over the journal for ReMind.
+
+This module keeps an SQLite FTS5 index of the cleaned journal entries, so
+questions like "when did I write about X" no longer mean grepping the whole
+vault. The index is updated incrementally: a scan manifest finds the notes
+whose content changed since the last update, and only those are cleaned and
+re-indexed. Results are ranked with BM25 and come with their note dates and
+a highlighted snippet.
+
+Usage:
+    python -m src.search "walk in the rain"
+    remind-search --since 2025-01-01 anna
+"""
+
+import argparse
+import sqlite3
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config import get, get_cache_path
+from src.journal_parser import is_journal_file, note_date_from_path
+from src.utils.cleaning import clean_file
+from src.utils.manifest import ScanManifest
+
+# Bump whenever cleaning or the schema changes, so that the index is rebuilt
+INDEX_VERSION = 1
+DEFAULT_LIMIT = 10
+SNIPPET_TOKENS = 12
+
+
+def _fts_query(query: str) -> str:
+    # Quote every term so that user input is never parsed as FTS5 syntax;
+    # quoted terms are still matched after stemming.
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index of cleaned journal entries.
+
+    Every indexed note is a row in ``documents`` (path, note date and the
+    SHA-256 of the source note) with its cleaned text in the FTS5 table
+    ``entries`` under the same rowid. Words are stemmed with the Porter
+    stemmer, so "walking" also finds "walked". A path of None keeps the
+    index in memory.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:", isolation_level=None)
+        if self.path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS documents")
+            self._conn.execute("DROP TABLE IF EXISTS entries")
+            self._conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, date TEXT, sha256 TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_date ON documents (date)")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5("
+            "content, tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+
+    def indexed(self) -> Dict[str, str]:
+        """
+        Get the notes in the index.
+
+        Returns:
+            Dictionary mapping note paths to the SHA-256 they were indexed at
+        """
+        return dict(self._conn.execute("SELECT path, sha256 FROM documents"))
+
+    def put(self, path: str, content: str, sha256: str, note_date: Optional[date] = None):
+        """
+        Add a note to the index, replacing any earlier version of it.
+
+        Args:
+            path: Path of the note, relative to the journal
+            content: Cleaned text of the note
+            sha256: SHA-256 of the source note
+            note_date: Date of the note, if known
+        """
+        self.remove(path)
+        cursor = self._conn.execute(
+            "INSERT INTO documents (path, date, sha256) VALUES (?, ?, ?)",
+            (path, note_date.isoformat() if note_date else None, sha256),
+        )
+        self._conn.execute("INSERT INTO entries (rowid, content) VALUES (?, ?)", (cursor.lastrowid, content))
+
+    def remove(self, path: str):
+        """
+        Remove a note from the index, if it is there.
+
+        Args:
+            path: Path of the note, relative to the journal
+        """
+        row = self._conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM entries WHERE rowid = ?", row)
+            self._conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def update(self, journal_dir: Path, manifest: Optional[ScanManifest] = None) -> Dict[str, int]:
+        """
+        Bring the index up to date with the journal.
+
+        The scan manifest supplies the current SHA-256 of every daily note
+        (re-hashing only the files whose size or mtime changed). Notes whose
+        hash differs from the indexed one are cleaned and re-indexed, and
+        notes that no longer exist are removed, in a single transaction.
+
+        Args:
+            journal_dir: Directory containing journal entries
+            manifest: ScanManifest for journal_dir (defaults to one in the cache directory)
+
+        Returns:
+            Dictionary with the number of notes indexed, removed and unchanged
+        """
+        if manifest is None:
+            manifest = ScanManifest(journal_dir, get_cache_path("search_manifest.json"),
+                                    file_filter=is_journal_file).load()
+        manifest.scan()
+        current = {rel_path: record["sha256"] for rel_path, record in manifest.files.items()}
+        indexed = self.indexed()
+        changed = sorted(rel_path for rel_path, sha in current.items() if indexed.get(rel_path) != sha)
+        removed = sorted(set(indexed) - set(current))
+
+        self._conn.execute("BEGIN")
+        try:
+            for rel_path in removed:
+                self.remove(rel_path)
+            for rel_path in changed:
+                note_date = note_date_from_path(rel_path)
+                if note_date is None:
+                    note_date = datetime.fromtimestamp(manifest.files[rel_path]["mtime_ns"] / 1e9).date()
+                self.put(rel_path, clean_file(manifest.path_for(rel_path)), current[rel_path], note_date)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        manifest.save()
+        return {"indexed": len(changed), "removed": len(removed), "unchanged": len(current) - len(changed)}
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, since: Optional[date] = None,
+               until: Optional[date] = None, raw: bool = False,
+               highlight: tuple = ("[", "]")) -> List[Dict]:
+        """
+        Find the entries that best match a query.
+
+        Args:
+            query: Words to look for (all of them must occur)
+            limit: Maximum number of results
+            since: Only include entries dated on or after this day
+            until: Only include entries dated on or before this day
+            raw: Pass the query to FTS5 as is, allowing OR, NEAR, "phrases" and prefix*
+            highlight: Markers put around matching words in the snippet
+
+        Returns:
+            List of dictionaries with the path, date, score (higher is better)
+            and snippet of each match, best match first
+        """
+        match = query if raw else _fts_query(query)
+        if not match:
+            return []
+        sql = ("SELECT d.path, d.date, bm25(entries) AS rank, "
+               "snippet(entries, 0, ?, ?, '…', ?) "
+               "FROM entries JOIN documents d ON d.id = entries.rowid "
+               "WHERE entries MATCH ?")
+        params = [highlight[0], highlight[1], SNIPPET_TOKENS, match]
+        if since is not None:
+            sql += " AND d.date >= ?"
+            params.append(since.isoformat())
+        if until is not None:
+            sql += " AND d.date <= ?"
+            params.append(until.isoformat())
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        return [
+            {
+                "path": path,
+                "date": date.fromisoformat(note_date) if note_date else None,
+                # bm25() is negative, more so for better matches
+                "score": -rank,
+                "snippet": snippet,
+            }
+            for path, note_date, rank, snippet in self._conn.execute(sql, params)
+        ]
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+
+def open_index() -> SearchIndex:
+    """
+    Open the search index in the cache directory.
+
+    Returns:
+        SearchIndex stored in ``search.sqlite``
+    """
+    return SearchIndex(get_cache_path("search.sqlite"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the journal")
+    parser.add_argument("query", nargs="+", help="Words to look for")
+    parser.add_argument("--journal_dir", type=str, default=get("journal_dir"),
+                        help="Directory containing journal entries")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT,
+                        help="Maximum number of results")
+    parser.add_argument("--since", type=date.fromisoformat, help="Only entries on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="Only entries on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--raw", action="store_true",
+                        help="Use FTS5 query syntax (OR, NEAR, \"phrases\", prefix*)")
+    parser.add_argument("--no-update", action="store_true",
+                        help="Search the index as it is, without scanning the journal first")
+    args = parser.parse_args()
+
+    index = open_index()
+    try:
+        if not args.no_update:
+            journal_dir = Path(args.journal_dir)
+            if journal_dir.exists():
+                counts = index.update(journal_dir)
+                if counts["indexed"] or counts["removed"]:
+                    print(f"Indexed {counts['indexed']} notes, removed {counts['removed']}")
+            else:
+                print(f"Warning: Journal directory does not exist: {journal_dir}")
+
+        highlight = ("\033[1m", "\033[0m") if sys.stdout.isatty() else ("[", "]")
+        try:
+            results = index.search(" ".join(args.query), limit=args.limit, since=args.since,
+                                   until=args.until, raw=args.raw, highlight=highlight)
+        except sqlite3.OperationalError as e:
+            print(f"Invalid query: {e}")
+            sys.exit(2)
+
+        if not results:
+            print("No matching entries found.")
+        for result in results:
+            when = result["date"].isoformat() if result["date"] else "unknown date"
+            print(f"{when}  {result['path']}  (score {result['score']:.3g})")
+            print(f"    {' '.join(result['snippet'].split())}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Local theme detection for ReMind.
+
+Cleaned entries are turned into a sparse TF-IDF document-term matrix (kept
+in CSR form with plain NumPy arrays) and clustered with spherical k-means.
+Each cluster is a theme, described by the terms that weigh most in its
+centroid and by the share of entries it takes in every week or month, so
+recurring themes can be found and followed without an LLM.
+
+Usage:
+    python -m src.themes --k 8 --period month
+    python -m src.themes --journal --since 2024-01-01
+"""
+
+import argparse
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.config import get
+from src.utils.tokenizers import fast_tokenize
+
+DEFAULT_THEMES = 8
+DEFAULT_TOP_TERMS = 8
+# A theme whose share changes by less than this over the whole range is steady
+TREND_THRESHOLD = 0.05
+
+
+class DocTermMatrix:
+    """
+    Sparse document-term matrix in CSR form.
+
+    Row i holds the weights of document i in ``data[indptr[i]:indptr[i + 1]]``
+    for the terms ``vocabulary[indices[...]]``.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, vocabulary: List[str]):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.vocabulary = vocabulary
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.indptr) - 1, len(self.vocabulary)
+
+    def row_ids(self) -> np.ndarray:
+        """Row index of every stored value."""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def dense_rows(self, rows: Iterable[int]) -> np.ndarray:
+        """Return the given rows as a dense matrix."""
+        rows = list(rows)
+        dense = np.zeros((len(rows), self.shape[1]), dtype=np.float64)
+        for out, row in enumerate(rows):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            dense[out, self.indices[start:end]] = self.data[start:end]
+        return dense
+
+    def dot(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Multiply by the transpose of a dense matrix, e.g. cluster centroids.
+
+        Args:
+            matrix: Dense (k, terms) matrix
+
+        Returns:
+            Dense (documents, k) matrix of dot products
+        """
+        n_docs = self.shape[0]
+        result = np.zeros((n_docs, matrix.shape[0]), dtype=np.float64)
+        starts = self.indptr[:-1]
+        nonempty = self.indptr[1:] > starts
+        if self.data.size:
+            products = self.data[:, None] * matrix[:, self.indices].T
+            result[nonempty] = np.add.reduceat(products, starts[nonempty], axis=0)
+        return result
+
+
+def build_doc_term_matrix(texts: List[str], stopwords: Optional[Set[str]] = None, min_df: int = 2,
+                          max_df: float = 0.5, max_terms: int = 5000) -> DocTermMatrix:
+    """
+    Build an L2-normalized TF-IDF matrix of texts.
+
+    Terms are the non-stopword words of the fast tokenizer. Terms in fewer
+    than ``min_df`` documents or in more than ``max_df`` of them are left out,
+    and only the ``max_terms`` most frequent remaining terms are kept.
+
+    Args:
+        texts: Cleaned entry texts
+        stopwords: Words to leave out (defaults to the analysis stopwords)
+        min_df: Minimum number of documents a term must occur in
+        max_df: Maximum fraction of documents a term may occur in
+        max_terms: Maximum vocabulary size
+
+    Returns:
+        DocTermMatrix with one row per text
+    """
+    if stopwords is None:
+        from src.analysis import custom_stopwords, get_stopwords
+        stopwords = get_stopwords() | custom_stopwords
+
+    doc_counts = [Counter(fast_tokenize(text.lower(), stopwords)[0]) for text in texts]
+    document_frequency = Counter()
+    for counts in doc_counts:
+        document_frequency.update(counts.keys())
+    limit = max_df * len(texts)
+    candidates = [(df, term) for term, df in document_frequency.items() if min_df <= df <= limit]
+    candidates.sort(key=lambda item: (-item[0], item[1]))
+    vocabulary = sorted(term for _, term in candidates[:max_terms])
+    term_ids = {term: i for i, term in enumerate(vocabulary)}
+
+    indptr = [0]
+    indices: List[int] = []
+    counts_list: List[int] = []
+    for counts in doc_counts:
+        for term, count in counts.items():
+            term_id = term_ids.get(term)
+            if term_id is not None:
+                indices.append(term_id)
+                counts_list.append(count)
+        indptr.append(len(indices))
+
+    indptr = np.array(indptr, dtype=np.int64)
+    indices = np.array(indices, dtype=np.int64)
+    df = np.array([document_frequency[term] for term in vocabulary], dtype=np.float64)
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1
+    data = (1 + np.log(np.array(counts_list, dtype=np.float64))) * idf[indices]
+
+    # Normalize every row to unit length
+    row_ids = np.repeat(np.arange(len(texts)), np.diff(indptr))
+    norms = np.sqrt(np.bincount(row_ids, weights=data ** 2, minlength=len(texts)))
+    norms[norms == 0] = 1
+    data /= norms[row_ids]
+    return DocTermMatrix(indptr, indices, data, vocabulary)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def spherical_kmeans(matrix: DocTermMatrix, k: int, seed: int = 0,
+                     max_iter: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster the rows of a normalized matrix by cosine similarity.
+
+    Centroids are seeded with k-means++ and kept at unit length. Each
+    iteration is one sparse-dense product for the assignments and one
+    bincount for the new centroids.
+
+    Args:
+        matrix: Normalized document-term matrix (rows without terms are not allowed)
+        k: Number of clusters
+        seed: Random seed, so results are reproducible
+        max_iter: Maximum number of iterations
+
+    Returns:
+        Tuple of (cluster label per row, normalized centroids)
+    """
+    n_docs, n_terms = matrix.shape
+    k = min(k, n_docs)
+    rng = np.random.default_rng(seed)
+
+    # k-means++ on cosine distance
+    chosen = [int(rng.integers(n_docs))]
+    centroids = matrix.dense_rows(chosen)
+    closest = 1 - matrix.dot(centroids)[:, 0]
+    for _ in range(1, k):
+        weights = np.clip(closest, 0, None) ** 2
+        total = weights.sum()
+        row = int(rng.choice(n_docs, p=weights / total)) if total > 0 else int(rng.integers(n_docs))
+        chosen.append(row)
+        new = matrix.dense_rows([row])
+        centroids = np.vstack([centroids, new])
+        closest = np.minimum(closest, 1 - matrix.dot(new)[:, 0])
+
+    row_ids = matrix.row_ids()
+    labels = np.full(n_docs, -1)
+    for _ in range(max_iter):
+        similarities = matrix.dot(centroids)
+        new_labels = similarities.argmax(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sums = np.bincount(labels[row_ids] * n_terms + matrix.indices, weights=matrix.data,
+                           minlength=k * n_terms).reshape(k, n_terms)
+        empty = np.flatnonzero(np.bincount(labels, minlength=k) == 0)
+        if empty.size:
+            # Re-seed empty clusters with the documents that fit their cluster worst
+            fit = similarities[np.arange(n_docs), labels]
+            for cluster, row in zip(empty, np.argsort(fit)[:empty.size]):
+                sums[cluster] = matrix.dense_rows([row])[0]
+        centroids = _normalize(sums)
+    return labels, centroids
+
+
+def period_key(day: date, period: str) -> str:
+    """
+    Name the week or month a day belongs to.
+
+    Args:
+        day: The day
+        period: "week" (ISO weeks, e.g. "2025-W16") or "month" (e.g. "2025-04")
+
+    Returns:
+        The period name; names sort chronologically
+    """
+    if period == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "month":
+        return f"{day.year}-{day.month:02d}"
+    raise ValueError(f"Unknown period {period!r}; expected 'week' or 'month'")
+
+
+def _entry_day(entry: Dict) -> Optional[date]:
+    day = entry.get("date") or entry.get("modified")
+    return day.date() if isinstance(day, datetime) else day
+
+
+def find_themes(entries: Iterable[Dict], k: int = DEFAULT_THEMES, period: str = "month",
+                top_n: int = DEFAULT_TOP_TERMS, seed: int = 0, stopwords: Optional[Set[str]] = None) -> Dict:
+    """
+    Find recurring themes in cleaned entries and follow them over time.
+
+    Args:
+        entries: Dictionaries with the cleaned ``content`` and the ``date``
+            (or ``modified`` time) of each entry
+        k: Number of themes
+        period: Trend granularity, "week" or "month"
+        top_n: Number of top terms reported per theme
+        seed: Random seed for clustering
+        stopwords: Words to leave out (defaults to the analysis stopwords)
+
+    Returns:
+        Dictionary with the sorted ``periods``, the ``themes`` (largest first,
+        each with its size, top terms, share of entries per period and
+        direction: "rising", "falling" or "steady") and the number of entries
+        left ``unclustered`` because none of their words are in the vocabulary
+    """
+    texts, days = [], []
+    for entry in entries:
+        texts.append(entry["content"])
+        days.append(_entry_day(entry))
+
+    matrix = build_doc_term_matrix(texts, stopwords=stopwords) if texts else None
+    if matrix is None or not matrix.vocabulary:
+        return {"periods": [], "themes": [], "unclustered": len(texts)}
+
+    # Entries without any vocabulary term cannot be placed in a theme
+    keep = np.flatnonzero(np.diff(matrix.indptr) > 0)
+    if keep.size < len(texts):
+        matrix = _select_rows(matrix, keep)
+    labels, centroids = spherical_kmeans(matrix, k, seed=seed)
+
+    keys = [period_key(days[i], period) if days[i] else None for i in keep]
+    periods = sorted({key for key in keys if key})
+    period_index = {key: i for i, key in enumerate(periods)}
+    counts = np.zeros((len(centroids), len(periods)))
+    for label, key in zip(labels, keys):
+        if key:
+            counts[label, period_index[key]] += 1
+    totals = counts.sum(axis=0)
+    shares = counts / np.where(totals == 0, 1, totals)
+
+    # Least-squares slope of each theme's share, scaled to the whole range
+    x = np.arange(len(periods)) - (len(periods) - 1) / 2
+    change = (shares @ x) / (x @ x) * (len(periods) - 1) if len(periods) > 1 else np.zeros(len(centroids))
+
+    sizes = np.bincount(labels, minlength=len(centroids))
+    themes = []
+    for cluster in np.argsort(-sizes, kind="stable"):
+        if sizes[cluster] == 0:
+            continue
+        top = np.argsort(-centroids[cluster], kind="stable")[:top_n]
+        direction = "steady"
+        if change[cluster] >= TREND_THRESHOLD:
+            direction = "rising"
+        elif change[cluster] <= -TREND_THRESHOLD:
+            direction = "falling"
+        themes.append({
+            "size": int(sizes[cluster]),
+            "top_terms": [matrix.vocabulary[i] for i in top if centroids[cluster, i] > 0],
+            "trend": {key: round(float(share), 3) for key, share in zip(periods, shares[cluster])},
+            "direction": direction,
+        })
+    return {"periods": periods, "themes": themes, "unclustered": len(texts) - int(keep.size)}
+
+
+def _select_rows(matrix: DocTermMatrix, rows: np.ndarray) -> DocTermMatrix:
+    starts, ends = matrix.indptr[rows], matrix.indptr[rows + 1]
+    take = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if rows.size else np.array([], int)
+    indptr = np.concatenate([[0], np.cumsum(ends - starts)])
+    return DocTermMatrix(indptr, matrix.indices[take], matrix.data[take], matrix.vocabulary)
+
+
+def load_cleaned_entries(directory: Path, since: Optional[date] = None) -> List[Dict]:
+    """
+    Load the cleaned entries written by ingest (files named like "2025-04-17.md").
+
+    Args:
+        directory: Directory of cleaned entries
+        since: Only include entries dated on or after this day
+
+    Returns:
+        List of dictionaries with the content and date of each entry, by date
+    """
+    entries = []
+    for path in sorted(Path(directory).glob("*.md")):
+        try:
+            day = date.fromisoformat(path.stem)
+        except ValueError:
+            continue
+        if since is None or day >= since:
+            entries.append({"content": path.read_text(encoding="utf-8"), "date": day})
+    return entries
+
+
+def render_themes(result: Dict):
+    """
+    Print themes and their trends.
+
+    Args:
+        result: Result of find_themes
+    """
+    if not result["themes"]:
+        print("No themes found.")
+        return
+    arrows = {"rising": "↑", "falling": "↓", "steady": "→"}
+    periods = result["periods"]
+    recent = periods[-6:]
+    if periods:
+        print(f"\n🧭 {len(result['themes'])} themes over {len(periods)} periods ({periods[0]} – {periods[-1]})")
+    else:
+        # Entries without dates have no trend
+        print(f"\n🧭 {len(result['themes'])} themes (the entries have no dates, so there are no trends)")
+    for number, theme in enumerate(result["themes"], 1):
+        print(f"\n{number}. {', '.join(theme['top_terms'])}")
+        if periods:
+            shares = "  ".join(f"{key}: {theme['trend'][key]:.0%}" for key in recent)
+            print(f"   {theme['size']} entries, {arrows[theme['direction']]} {theme['direction']}   {shares}")
+        else:
+            print(f"   {theme['size']} entries")
+    if result["unclustered"]:
+        print(f"\n({result['unclustered']} entries had no words in common with the rest)")
+
+
+def main():
+    from src.utils.ingest import OUTPUT_DIR
+
+    parser = argparse.ArgumentParser(description="Find recurring themes in the journal")
+    parser.add_argument("--k", type=int, default=DEFAULT_THEMES, help="Number of themes")
+    parser.add_argument("--period", choices=["week", "month"], default="month", help="Trend granularity")
+    parser.add_argument("--since", type=date.fromisoformat, help="Only entries on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--source", type=str, default=str(OUTPUT_DIR), help="Directory of cleaned entries")
+    parser.add_argument("--journal", action="store_true",
+                        help="Read and clean the journal directly instead of the cleaned entries")
+    args = parser.parse_args()
+
+    if args.journal:
+        from src.journal_parser import iter_journal_files
+        from src.utils.cleaning import clean_file
+
+        start = args.since or date(1970, 1, 1)
+        entries = [{"content": clean_file(path), "date": day or datetime.fromtimestamp(path.stat().st_mtime).date()}
+                   for path, day in iter_journal_files(Path(get("journal_dir")), start, date.today())]
+    else:
+        entries = load_cleaned_entries(Path(args.source), since=args.since)
+    render_themes(find_themes(entries, k=args.k, period=args.period))
+
+
+if __name__ == "__main__":
+    main()
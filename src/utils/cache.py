@@ -0,0 +1,135 @@
+"""
+Persistent key-value cache for ReMind Pulse.
+
+This module provides a small SQLite-backed cache with least-recently-used
+eviction and hit/miss counters. Values are stored as JSON, so anything that
+round-trips through json can be cached.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def content_key(text: str, *parts: Any) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        text: The content the cached value was computed from
+        *parts: Anything else the value depends on (model name, versions, ...)
+
+    Returns:
+        Key made of the parts followed by the SHA-256 of the content
+    """
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return ":".join([str(part) for part in parts] + [digest])
+
+
+class PersistentCache:
+    """
+    SQLite-backed cache with LRU eviction.
+
+    The cache holds at most ``max_entries`` values; when it grows past that,
+    the least recently used entries are evicted. A path of None keeps the
+    cache in memory. The cache is safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 10000):
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:",
+                                     check_same_thread=False, isolation_level=None)
+        if self.path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_used ON cache (last_used)")
+        self._size, last_used = self._conn.execute("SELECT COUNT(*), MAX(last_used) FROM cache").fetchone()
+        # Recency is tracked with a logical clock so that eviction order is exact
+        self._clock = last_used or 0
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Look up a value and mark it as recently used.
+
+        Args:
+            key: The cache key
+            default: Value returned when the key is not cached
+
+        Returns:
+            The cached value or default
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._conn.execute("UPDATE cache SET last_used = ? WHERE key = ?", (self._tick(), key))
+            return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        """
+        Store a value, evicting the least recently used entries if needed.
+
+        Args:
+            key: The cache key
+            value: JSON-serializable value to store
+        """
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(value), self._tick()),
+            )
+            if exists is None:
+                self._size += 1
+            if self._size > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY last_used ASC LIMIT ?)",
+                    (self._size - self.max_entries,),
+                )
+                self._size = self.max_entries
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dictionary with hits, misses and the number of cached entries
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        return self._size
@@ -1,21 +1,127 @@
 """
 NLTK resource initialization for ReMind Pulse.
 
-This module ensures that the required NLTK resources are downloaded
-before they are used in the application.
+This module makes sure the required NLTK resources are available, but only
+when they are first needed. Resources are looked up locally with
+nltk.data.find (no network access) and downloaded only if missing. Verified
+resources are remembered in-process and in a small file in the cache
+directory, so later runs skip the lookup altogether. Since that record can
+outlive the resources (nltk_data removed, another interpreter sharing the
+cache directory), callers load them through call_with_nltk_resources, which
+checks again when NLTK cannot find them.
 """
 
-import nltk
-import os
-from nltk.downloader import Downloader
+import json
+from typing import Callable, Set, TypeVar
 
-# Check if resources are already downloaded before attempting to download them
-downloader = Downloader()
+T = TypeVar("T")
 
-# Download required NLTK resources if not already downloaded
-if not downloader.is_installed('stopwords'):
-    nltk.download('stopwords')
-if not downloader.is_installed('punkt'):
-    nltk.download('punkt')
-if not downloader.is_installed('punkt_tab'):
-    nltk.download('punkt_tab')
+from src.config import get_cache_path
+
+# NLTK data paths of the resources ReMind uses, keyed by download name
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+}
+
+_verified: Set[str] = set()
+_loaded_state = False
+
+
+def _state_path():
+    return get_cache_path("nltk_resources.json")
+
+
+def _load_state():
+    global _loaded_state
+    if _loaded_state:
+        return
+    _loaded_state = True
+    try:
+        with open(_state_path(), "r", encoding="utf-8") as f:
+            _verified.update(json.load(f).get("verified", []))
+    except (OSError, ValueError):
+        pass
+
+
+def _save_state():
+    path = _state_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"verified": sorted(_verified)}, f)
+    except OSError as e:
+        print(f"Warning: could not record NLTK resources in {path}: {e}")
+
+
+def ensure_nltk_resources(*names: str):
+    """
+    Make sure NLTK resources are installed, downloading any that are missing.
+
+    A resource whose download fails is not recorded as verified, so it is
+    looked up (and downloaded) again on the next call.
+
+    Args:
+        *names: Download names of the resources, e.g. "stopwords"
+    """
+    _load_state()
+    missing = [name for name in names if name not in _verified]
+    if not missing:
+        return
+
+    import nltk
+
+    added = False
+    for name in missing:
+        try:
+            nltk.data.find(NLTK_RESOURCES.get(name, name))
+        except LookupError:
+            # nltk.download reports failure (e.g. when offline) by returning False
+            if not nltk.download(name):
+                print(f"Warning: could not download NLTK resource {name!r}; will retry on the next run")
+                continue
+        _verified.add(name)
+        added = True
+    if added:
+        _save_state()
+
+
+def forget_nltk_resources(*names: str):
+    """
+    Stop treating NLTK resources as verified, so they are looked up again.
+
+    Args:
+        *names: Download names of the resources, e.g. "stopwords"
+    """
+    _load_state()
+    if _verified.intersection(names):
+        _verified.difference_update(names)
+        _save_state()
+
+
+def call_with_nltk_resources(func: Callable[[], T], *names: str) -> T:
+    """
+    Call a function that uses NLTK resources, making sure they are installed.
+
+    If NLTK cannot find a resource recorded as verified (func raises
+    LookupError), the resources are forgotten, checked (and downloaded)
+    again, and func is called once more.
+
+    Args:
+        func: Function to call, without arguments
+        *names: Download names of the resources it uses, e.g. "stopwords"
+
+    Returns:
+        What func returns
+
+    Raises:
+        LookupError: If the resources are still missing after the retry
+    """
+    ensure_nltk_resources(*names)
+    try:
+        return func()
+    except LookupError:
+        forget_nltk_resources(*names)
+        ensure_nltk_resources(*names)
+        return func()
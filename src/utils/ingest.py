@@ -1,13 +1,17 @@
 from pathlib import Path
+import argparse
+import json
 import os
-import re
-from src.utils.cleaning import clean_content  # Import from the new src package
-from src.config import get
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from src.utils.cleaning import clean_file  # Import from the new src package
+from src.utils.manifest import ScanManifest, ScanResult
+from src.config import get, get_cache_path
 
 # --- CONFIG ---
 JOURNAL_ROOT = Path(get("journal_dir"))
 OUTPUT_DIR = Path("data/cleaned")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+INGEST_WORKERS = int(get("ingest_workers", os.cpu_count() or 1))
 
 
 def get_all_markdown_files(root_path: Path):
@@ -16,19 +20,18 @@ def get_all_markdown_files(root_path: Path):
 
 def extract_date_from_path(file_path: Path):
     """
-    Extract date from a path like /root/04 Apr/17 Apr.md
-    Returns date string in YYYY-MM-DD format (using current year if not found)
+    Extract date from a path like /root/2025/04 Apr/Apr 17.md (or /root/04 Apr/17 Apr.md)
+    Returns date string in YYYY-MM-DD format (using 2025 if the year folder is missing)
     """
     try:
         # Get folder and file name
         month_folder = file_path.parent.name  # e.g., '04 Apr'
-        day_file = file_path.stem  # e.g., '17 Apr'
+        day_file = file_path.stem  # e.g., 'Apr 17' or '17 Apr'
         # Extract month and day
         month_num, month_str = month_folder.split()
-        day_num, _ = day_file.split()
-        year = str(Path().cwd().year)  # fallback to current year if not specified
-        # Use current year (or you can make this configurable)
-        year = str(2025)  # hardcoded for now, can be dynamic
+        day_num = next(part for part in day_file.split() if part.isdigit())
+        year_folder = file_path.parent.parent.name
+        year = year_folder if len(year_folder) == 4 and year_folder.isdigit() else str(2025)
         month_num = int(month_num)
         day_num = int(day_num)
         return f"{year}-{month_num:02d}-{day_num:02d}"
@@ -42,28 +45,170 @@ def read_file_content(file_path: Path):
         return f.read()
 
 
+def write_atomic(path: Path, text: str):
+    """
+    Write a text file atomically: to a temp file first, then rename it.
+
+    Readers never see a half-written file, and an interrupted write leaves
+    the previous version in place.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
 def write_cleaned_file(date_str: str, cleaned_text: str, output_dir: Path):
     if date_str == "unknown-date":
-        return
+        return None
     out_path = output_dir / f"{date_str}.md"
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(cleaned_text)
+    write_atomic(out_path, cleaned_text)
+    return out_path
 
 
-def process_file(file_path: Path):
+def process_file(file_path: Path, output_dir: Path = OUTPUT_DIR) -> Optional[Path]:
     date_str = extract_date_from_path(file_path)
-    raw_text = read_file_content(file_path)
-    cleaned = clean_content(raw_text)  # Use the imported cleaning function
-    write_cleaned_file(date_str, cleaned, Path(OUTPUT_DIR))
+    if date_str == "unknown-date":
+        return None
+    # Only the journal section of the note is decoded and cleaned
+    cleaned = clean_file(file_path)
+    return write_cleaned_file(date_str, cleaned, Path(output_dir))
+
+
+def _process_item(item: Tuple[str, Path, Path]) -> Tuple[str, Optional[str], Optional[str]]:
+    # Runs in a worker process; errors are returned rather than raised so
+    # that one bad note does not abort the whole ingest.
+    rel_path, file_path, output_dir = item
+    try:
+        out_path = process_file(file_path, output_dir)
+    except Exception as e:
+        return rel_path, None, str(e)
+    return rel_path, out_path.name if out_path else None, None
+
+
+class IngestResult:
+    """What an ingest run did."""
+
+    def __init__(self, scan: ScanResult):
+        self.scan = scan
+        self.written: List[str] = []
+        self.deleted: List[str] = []
+        self.failed: Dict[str, str] = {}
+
+    def __repr__(self):
+        return (f"IngestResult(processed={len(self.scan.added) + len(self.scan.changed)}, "
+                f"written={len(self.written)}, deleted={len(self.deleted)}, failed={len(self.failed)})")
+
+
+def _load_outputs(path: Path) -> Dict[str, Optional[str]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ingest(journal_root: Path, output_dir: Path = OUTPUT_DIR, state_dir: Optional[Path] = None,
+           workers: int = INGEST_WORKERS, prune: bool = True, full: bool = False) -> IngestResult:
+    """
+    Incrementally clean the journal into output_dir.
+
+    A scan manifest of the journal's Markdown files records the content hash
+    seen at the last ingest, together with the output each source produced.
+    Only sources that were added or changed since then (or whose output has
+    gone missing) are cleaned, on a pool of worker processes, and outputs are
+    written atomically.
+
+    Args:
+        journal_root: Root of the journal to ingest
+        output_dir: Where cleaned files are written
+        state_dir: Where the ingest manifest is kept (defaults to the cache directory)
+        workers: Number of worker processes
+        prune: Delete outputs whose sources have all been removed
+        full: Ignore the manifest and re-ingest every file
+
+    Returns:
+        IngestResult describing the run
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = (state_dir / "ingest_manifest.json") if state_dir else get_cache_path("ingest_manifest.json")
+    outputs_path = manifest_path.with_name("ingest_outputs.json")
+
+    manifest = ScanManifest(journal_root, manifest_path, file_filter=lambda rel: rel.endswith(".md"))
+    outputs = {}
+    if not full:
+        manifest.load()
+        outputs = _load_outputs(outputs_path)
+
+    scan = manifest.scan()
+    result = IngestResult(scan)
+    todo = scan.added + scan.changed
+    # Unchanged sources whose output was deleted are regenerated too
+    todo += [rel for rel in scan.unchanged
+             if rel not in outputs or (outputs[rel] and not (output_dir / outputs[rel]).exists())]
+
+    items = [(rel, manifest.path_for(rel), output_dir) for rel in todo]
+    if workers > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(items))) as executor:
+            processed = list(executor.map(_process_item, items, chunksize=16))
+    else:
+        processed = [_process_item(item) for item in items]
+
+    for rel_path, out_name, error in processed:
+        if error is not None:
+            result.failed[rel_path] = error
+            # Forget the file so that it is retried on the next run
+            manifest.files.pop(rel_path, None)
+            outputs.pop(rel_path, None)
+            continue
+        outputs[rel_path] = out_name
+        if out_name:
+            result.written.append(out_name)
+
+    removed_outputs = {outputs.pop(rel) for rel in scan.removed if rel in outputs}
+    if prune:
+        still_produced = set(outputs.values())
+        for out_name in sorted(name for name in removed_outputs if name and name not in still_produced):
+            out_path = output_dir / out_name
+            if out_path.exists():
+                out_path.unlink()
+                result.deleted.append(out_name)
+
+    manifest.save()
+    write_atomic(outputs_path, json.dumps(outputs))
+    return result
 
 
 def main():
-    all_files = get_all_markdown_files(JOURNAL_ROOT)
-    print("Files to be analyzed:")
-    for file_path in all_files:
-        print(f"- {file_path}")
-    for file_path in all_files:
-        process_file(file_path)
+    parser = argparse.ArgumentParser(description="Clean journal notes into data/cleaned")
+    parser.add_argument("--journal_dir", type=str, default=str(JOURNAL_ROOT),
+                        help="Directory containing journal entries")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="Number of worker processes")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-ingest every file, ignoring the manifest")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="Keep outputs whose source notes were removed")
+    parser.add_argument("--verbose", action="store_true",
+                        help="List every file that was processed")
+    args = parser.parse_args()
+
+    result = ingest(Path(args.journal_dir), OUTPUT_DIR, workers=args.workers,
+                    prune=not args.no_prune, full=args.full)
+    scan = result.scan
+    print(f"Ingest: {len(scan.added)} added, {len(scan.changed)} changed, "
+          f"{len(scan.removed)} removed, {len(scan.unchanged)} unchanged")
+    print(f"Wrote {len(result.written)} files, deleted {len(result.deleted)}")
+    if args.verbose:
+        for out_name in result.written:
+            print(f"- {out_name}")
+    for rel_path, error in result.failed.items():
+        print(f"Error ingesting {rel_path}: {error}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+"""
+Persistent scan manifest for journal trees.
+
+This module keeps an on-disk record of the files under a journal root
+(size, modification time and content hash) together with the modification
+time and listing of every directory. Rescans only list directories whose
+mtime changed and only re-hash files whose size or mtime changed, and report
+which files were added, changed or removed since the previous scan.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    """
+    Hash raw bytes with SHA-256.
+
+    Args:
+        data: The bytes to hash
+
+    Returns:
+        Hex digest of the data
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 16) -> str:
+    """
+    Hash a file's content with SHA-256, reading it in chunks.
+
+    Args:
+        path: Path of the file to hash
+        chunk_size: Number of bytes to read at a time
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScanResult:
+    """Relative paths grouped by how they changed since the previous scan."""
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.changed: List[str] = []
+        self.removed: List[str] = []
+        self.unchanged: List[str] = []
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self):
+        return (f"ScanResult(added={len(self.added)}, changed={len(self.changed)}, "
+                f"removed={len(self.removed)}, unchanged={len(self.unchanged)})")
+
+
+class ScanManifest:
+    """
+    Incrementally maintained record of the files under a root directory.
+
+    File records are keyed by their POSIX-style path relative to the root and
+    hold ``size``, ``mtime_ns`` and ``sha256``. Directory records hold the
+    directory's ``mtime_ns`` and the names of its subdirectories and matching
+    files, so that unchanged directories do not have to be listed again.
+    """
+
+    def __init__(self, root: Path, path: Optional[Path] = None,
+                 file_filter: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            root: Directory to scan
+            path: Where the manifest is stored; None keeps it in memory only
+            file_filter: Predicate on a file's relative path deciding whether
+                it is tracked; defaults to tracking every file
+        """
+        self.root = Path(root)
+        self.path = Path(path) if path is not None else None
+        self.file_filter = file_filter or (lambda rel_path: True)
+        self.files: Dict[str, Dict] = {}
+        self.dirs: Dict[str, Dict] = {}
+
+    def load(self) -> "ScanManifest":
+        """
+        Load the manifest from disk, if it exists and belongs to this root.
+
+        Returns:
+            The manifest itself
+        """
+        if self.path is None or not self.path.exists():
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable manifest {self.path}: {e}")
+            return self
+        if data.get("version") == MANIFEST_VERSION and data.get("root") == str(self.root):
+            self.files = data.get("files", {})
+            self.dirs = data.get("dirs", {})
+        return self
+
+    def save(self):
+        """Write the manifest to disk atomically (temp file, then rename)."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "root": str(self.root),
+            "files": self.files,
+            "dirs": self.dirs,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def path_for(self, rel_path: str) -> Path:
+        """Return the absolute path of a tracked file."""
+        return self.root / rel_path
+
+    def scan(self) -> ScanResult:
+        """
+        Bring the manifest up to date with the directory tree.
+
+        Directories whose mtime is unchanged reuse their recorded listing.
+        Files are re-hashed only when their size or mtime changed; a file
+        whose content hash is the same as before counts as unchanged.
+
+        Returns:
+            ScanResult describing what changed since the previous scan
+        """
+        result = ScanResult()
+        files: Dict[str, Dict] = {}
+        dirs: Dict[str, Dict] = {}
+        stack = [""]
+
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = self.root / rel_dir if rel_dir else self.root
+            try:
+                dir_mtime_ns = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+
+            known = self.dirs.get(rel_dir)
+            if known is not None and known["mtime_ns"] == dir_mtime_ns:
+                subdirs, names = known["dirs"], known["files"]
+            else:
+                subdirs, names = self._list_dir(abs_dir, rel_dir)
+            dirs[rel_dir] = {"mtime_ns": dir_mtime_ns, "dirs": subdirs, "files": names}
+            stack.extend(_join(rel_dir, name) for name in subdirs)
+
+            for name in names:
+                rel_path = _join(rel_dir, name)
+                record = self._check_file(rel_path, result)
+                if record is not None:
+                    files[rel_path] = record
+
+        result.removed = [rel_path for rel_path in self.files if rel_path not in files]
+        self.files = files
+        self.dirs = dirs
+        return result
+
+    def _list_dir(self, abs_dir: Path, rel_dir: str):
+        subdirs, names = [], []
+        try:
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif entry.is_file() and self.file_filter(_join(rel_dir, entry.name)):
+                        names.append(entry.name)
+        except OSError as e:
+            print(f"Warning: could not list {abs_dir}: {e}")
+        return subdirs, names
+
+    def _check_file(self, rel_path: str, result: ScanResult) -> Optional[Dict]:
+        abs_path = self.path_for(rel_path)
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return None
+
+        known = self.files.get(rel_path)
+        if known is not None and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            result.unchanged.append(rel_path)
+            return known
+
+        try:
+            digest = hash_file(abs_path)
+        except OSError:
+            return None
+        if known is None:
+            result.added.append(rel_path)
+        elif known["sha256"] == digest:
+            result.unchanged.append(rel_path)
+        else:
+            result.changed.append(rel_path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
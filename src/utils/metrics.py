@@ -0,0 +1,288 @@
+"""
+Lightweight run metrics for ReMind Pulse.
+
+A Metrics recorder collects, for one run:
+
+- stage timings: wall time and call count per stage, keyed by the path of
+  enclosing stages (e.g. "pulse.analyze/analysis.tokenize"), with a trace
+  of the individual spans and, optionally, the tracemalloc peak per stage
+- counters, e.g. files scanned, bytes read, sentiment fallbacks
+- histograms, e.g. Ollama request latency
+
+The shared recorder is disabled by default, and a disabled recorder does
+nothing, so instrumented code costs close to nothing outside a profiled
+run. ``pulse --profile`` enables it and reports the result as a JSON trace
+and a human-readable breakdown.
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Spans and histogram values kept for the trace; totals keep counting past these
+MAX_SPANS = 5000
+MAX_VALUES = 10000
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class _Frame:
+    __slots__ = ("path", "start", "peak")
+
+    def __init__(self, path: str, start: float, peak: int):
+        self.path = path
+        self.start = start
+        self.peak = peak
+
+
+class Metrics:
+    """
+    Recorder of stage timings, counters and histograms for one run.
+
+    The recorder is safe to use from several threads. Stages nest per
+    thread; a stage entered on a worker thread is recorded at the top
+    level, so stages that overlap in time can add up to more than the
+    wall time of the run.
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = False, clock=time.perf_counter):
+        """
+        Args:
+            enabled: Record anything at all (a disabled recorder ignores every call)
+            trace_memory: Record the tracemalloc peak of each stage (starts tracemalloc)
+            clock: Monotonic clock in seconds
+        """
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.clock = clock
+        self.started = clock()
+        self.stages: Dict[str, Dict] = {}
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Dict] = {}
+        self.spans: List[Dict] = []
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stage(self, name: str):
+        """
+        Time a stage of the run.
+
+        Args:
+            name: Name of the stage, e.g. "journal.read"
+
+        Returns:
+            Context manager that records the stage when it exits
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    @contextlib.contextmanager
+    def _stage(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        path = f"{stack[-1].path}/{name}" if stack else name
+        if self.trace_memory:
+            # The peak is reset for this stage; the enclosing stage keeps its
+            # own peak so far and takes the larger one when this stage exits
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        frame = _Frame(path, self.clock(), 0)
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            end = self.clock()
+            if self.trace_memory:
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, frame.peak)
+            self._record_stage(frame, end, threading.current_thread().name)
+
+    def _record_stage(self, frame: _Frame, end: float, thread: str):
+        duration = end - frame.start
+        with self._lock:
+            stage = self.stages.get(frame.path)
+            if stage is None:
+                stage = self.stages[frame.path] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0}
+            stage["calls"] += 1
+            stage["seconds"] += duration
+            stage["max_seconds"] = max(stage["max_seconds"], duration)
+            if self.trace_memory:
+                stage["peak_bytes"] = max(stage.get("peak_bytes", 0), frame.peak)
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append({"stage": frame.path, "start": frame.start - self.started,
+                                   "seconds": duration, "thread": thread})
+            else:
+                self.dropped_spans += 1
+
+    def count(self, name: str, value: float = 1):
+        """
+        Add to a counter.
+
+        Args:
+            name: Name of the counter, e.g. "journal.bytes_read"
+            value: Amount to add
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS):
+        """
+        Record a value in a histogram.
+
+        Args:
+            name: Name of the histogram, e.g. "ollama.generate_seconds"
+            value: Value to record
+            buckets: Upper bounds of the buckets, used when the histogram is created
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {
+                    "buckets": list(buckets), "counts": [0] * (len(buckets) + 1),
+                    "count": 0, "sum": 0.0, "min": value, "max": value, "values": [],
+                }
+            histogram["counts"][bisect.bisect_left(histogram["buckets"], value)] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+            histogram["min"] = min(histogram["min"], value)
+            histogram["max"] = max(histogram["max"], value)
+            if len(histogram["values"]) < MAX_VALUES:
+                histogram["values"].append(value)
+
+    def close(self):
+        """Stop tracemalloc if this recorder started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def to_dict(self) -> Dict:
+        """
+        Get everything recorded so far as a JSON-serializable trace.
+
+        Returns:
+            Dictionary with the run's wall time, stages, counters, histogram
+            summaries (with percentiles) and spans
+        """
+        with self._lock:
+            histograms = {name: _summarize(histogram) for name, histogram in self.histograms.items()}
+            return {
+                "wall_seconds": self.clock() - self.started,
+                "stages": {path: dict(stage) for path, stage in self.stages.items()},
+                "counters": dict(self.counters),
+                "histograms": histograms,
+                "spans": list(self.spans),
+                "dropped_spans": self.dropped_spans,
+            }
+
+    def render(self) -> str:
+        """
+        Format the recorded metrics as a human-readable breakdown.
+
+        Returns:
+            Multi-line report: stages as a tree with their share of the wall
+            time, then counters and histograms
+        """
+        trace = self.to_dict()
+        wall = trace["wall_seconds"] or 1e-9
+        lines = [f"Profile ({trace['wall_seconds']:.3f}s wall time)", "", "Stages:"]
+        memory = self.trace_memory
+        header = f"  {'stage':44}{'calls':>7}{'total':>11}{'share':>8}"
+        lines.append(header + (f"{'peak mem':>11}" if memory else ""))
+        for path in sorted(trace["stages"], key=lambda path: _tree_key(path, trace["stages"])):
+            stage = trace["stages"][path]
+            depth = path.count("/")
+            label = "  " * depth + path.rsplit("/", 1)[-1]
+            line = (f"  {label:44}{stage['calls']:>7}{stage['seconds'] * 1000:>9.1f}ms"
+                    f"{stage['seconds'] / wall:>8.1%}")
+            if memory:
+                line += f"{stage.get('peak_bytes', 0) / 1e6:>9.1f}MB"
+            lines.append(line)
+        if trace["counters"]:
+            lines += ["", "Counters:"]
+            lines += [f"  {name:44}{_format_number(value):>12}" for name, value in sorted(trace["counters"].items())]
+        if trace["histograms"]:
+            lines += ["", "Histograms:"]
+            for name, histogram in sorted(trace["histograms"].items()):
+                lines.append(f"  {name}: n={histogram['count']} mean={histogram['mean'] * 1000:.1f}ms "
+                             f"p50={histogram['p50'] * 1000:.1f}ms p90={histogram['p90'] * 1000:.1f}ms "
+                             f"p99={histogram['p99'] * 1000:.1f}ms max={histogram['max'] * 1000:.1f}ms")
+        return "\n".join(lines)
+
+
+def _tree_key(path: str, stages: Dict[str, Dict]):
+    # Siblings are ordered by the time they took, slowest first, under their parent
+    parts = path.split("/")
+    return [(-stages.get("/".join(parts[:i + 1]), {"seconds": 0})["seconds"], parts[i]) for i in range(len(parts))]
+
+
+def _format_number(value: float) -> str:
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.3f}"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _summarize(histogram: Dict) -> Dict:
+    values = histogram["values"]
+    return {
+        "count": histogram["count"],
+        "sum": histogram["sum"],
+        "mean": histogram["sum"] / histogram["count"] if histogram["count"] else 0.0,
+        "min": histogram["min"],
+        "max": histogram["max"],
+        "p50": _percentile(values, 0.50),
+        "p90": _percentile(values, 0.90),
+        "p99": _percentile(values, 0.99),
+        "buckets": [{"le": bound, "count": count}
+                    for bound, count in zip(histogram["buckets"] + ["+Inf"], histogram["counts"])],
+    }
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """
+    Get the shared metrics recorder, a disabled one unless set_metrics was called.
+
+    Returns:
+        Metrics instance
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics(enabled=False)
+    return _metrics
+
+
+def set_metrics(metrics: Optional[Metrics]):
+    """
+    Replace the shared metrics recorder (e.g. with an enabled one for a profiled run).
+
+    Args:
+        metrics: Metrics instance to use, or None to reset to a disabled one
+    """
+    global _metrics
+    _metrics = metrics
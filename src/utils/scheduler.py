@@ -0,0 +1,226 @@
+"""
+Dependency-aware stage scheduler for ReMind Pulse.
+
+A StageGraph holds named stages and the stages each one depends on. When
+started, every stage runs on a thread pool as soon as the stages it
+depends on have finished, and receives their results as keyword
+arguments, so independent stages (e.g. the insight request, sentiment and
+local statistics) overlap and the run takes about as long as its longest
+chain of dependent stages instead of the sum of all of them.
+
+Stages are timed with the shared metrics recorder under their own names.
+A StreamBuffer lets a stage hand a stream (e.g. the insight, token by
+token) to the main thread while the stage is still producing it.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.utils.metrics import get_metrics
+
+
+class StageGraph:
+    """Named stages and their dependencies."""
+
+    def __init__(self, prefix: str = ""):
+        """
+        Args:
+            prefix: Prefix of the stages' names in the metrics, e.g. "pulse."
+        """
+        self.prefix = prefix
+        self.stages: Dict[str, Callable[..., Any]] = {}
+        self.dependencies: Dict[str, List[str]] = {}
+
+    def add(self, name: str, func: Callable[..., Any], after: Iterable[str] = ()) -> "StageGraph":
+        """
+        Add a stage.
+
+        Args:
+            name: Name of the stage (an identifier); with the prefix, also its metrics stage
+            func: Function run for the stage; it is called with the result
+                of each stage in ``after`` as a keyword argument of the same name
+            after: Stages that must finish first (they must already be added)
+
+        Returns:
+            The graph, so that calls can be chained
+
+        Raises:
+            ValueError: If the name is taken or a dependency is unknown
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} is already defined")
+        after = list(after)
+        unknown = [dependency for dependency in after if dependency not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {name!r} depends on unknown stages: {', '.join(unknown)}")
+        # Dependencies must be added first, so the graph cannot have cycles
+        self.stages[name] = func
+        self.dependencies[name] = after
+        return self
+
+    def start(self, max_workers: Optional[int] = None) -> "StageRun":
+        """
+        Start running the stages.
+
+        Args:
+            max_workers: Threads to run stages on (defaults to one per stage)
+
+        Returns:
+            StageRun to collect the results from
+        """
+        return StageRun(self, max_workers or max(1, len(self.stages)))
+
+    def run(self, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run the stages and wait for all of them.
+
+        Args:
+            max_workers: Threads to run stages on (defaults to one per stage)
+
+        Returns:
+            Result of every stage, by name
+
+        Raises:
+            Exception: The exception of the first stage that failed
+        """
+        with self.start(max_workers) as run:
+            return run.wait()
+
+
+class StageRun:
+    """
+    Stages of a StageGraph being run.
+
+    A stage whose dependency failed is not run; asking for its result
+    raises the dependency's exception. Use it as a context manager, or call
+    close(), to release the threads.
+    """
+
+    def __init__(self, graph: StageGraph, max_workers: int):
+        self.graph = graph
+        self.futures: Dict[str, Future] = {name: Future() for name in graph.stages}
+        self._waiting = {name: set(after) for name, after in graph.dependencies.items()}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+        for name in [name for name, after in self._waiting.items() if not after]:
+            self._submit(name)
+
+    def _submit(self, name: str):
+        self.futures[name].set_running_or_notify_cancel()
+        self._executor.submit(self._run, name)
+
+    def _run(self, name: str):
+        kwargs = {dependency: self.futures[dependency].result() for dependency in self.graph.dependencies[name]}
+        try:
+            with get_metrics().stage(f"{self.graph.prefix}{name}"):
+                result = self.graph.stages[name](**kwargs)
+        except BaseException as e:
+            self._finish(name, error=e)
+        else:
+            self._finish(name, result=result)
+
+    def _finish(self, name: str, result: Any = None, error: Optional[BaseException] = None):
+        ready = []
+        with self._lock:
+            if error is None:
+                self.futures[name].set_result(result)
+                for dependent, waiting in self._waiting.items():
+                    if name in waiting:
+                        waiting.discard(name)
+                        if not waiting:
+                            ready.append(dependent)
+            else:
+                # Dependents of a failed stage fail with its exception, transitively;
+                # clearing what they wait for keeps them from being failed twice or run
+                failed = [name]
+                while failed:
+                    failed_name = failed.pop()
+                    self.futures[failed_name].set_exception(error)
+                    for dependent, waiting in self._waiting.items():
+                        if failed_name in waiting:
+                            waiting.clear()
+                            failed.append(dependent)
+        for dependent in ready:
+            self._submit(dependent)
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for a stage and get its result.
+
+        Args:
+            name: Name of the stage
+            timeout: Seconds to wait, or None to wait until it finishes
+
+        Returns:
+            The stage's result
+
+        Raises:
+            Exception: The stage's exception, or that of a dependency that failed
+        """
+        return self.futures[name].result(timeout)
+
+    def wait(self) -> Dict[str, Any]:
+        """
+        Wait for every stage.
+
+        Returns:
+            Result of every stage, by name
+
+        Raises:
+            Exception: The exception of the first stage (in the order they
+                were added) that failed
+        """
+        return {name: future.result() for name, future in self.futures.items()}
+
+    def close(self):
+        """Wait for the stages that are running and release the threads."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "StageRun":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StreamBuffer:
+    """
+    Pieces of a stream produced in one stage and read on another thread.
+
+    The stage calls fill() with the stream; iterating the buffer yields the
+    pieces as they arrive, including those that arrived before, and ends
+    when fill() returns or fails. The buffer can be iterated once.
+    """
+
+    _DONE = object()
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+
+    def fill(self, pieces: Iterable[str]) -> str:
+        """
+        Consume a stream into the buffer.
+
+        Args:
+            pieces: Pieces of text
+
+        Returns:
+            The whole text
+        """
+        parts = []
+        try:
+            for piece in pieces:
+                parts.append(piece)
+                self._queue.put(piece)
+        finally:
+            self._queue.put(self._DONE)
+        return "".join(parts)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            piece = self._queue.get()
+            if piece is self._DONE:
+                return
+            yield piece
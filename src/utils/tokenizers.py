@@ -0,0 +1,82 @@
+"""
+Word tokenizers for journal analysis.
+
+Each tokenizer takes lowercased text and a stopword set, and returns the
+alphabetic non-stopword words together with the total number of tokens
+(used for entry lengths). The "nltk" backend is the reference; the "fast"
+backend uses a precompiled regex and filters stopwords in the same pass.
+"""
+
+import re
+from typing import Callable, Dict, List, Set, Tuple
+
+Tokenizer = Callable[[str, Set[str]], Tuple[List[str], int]]
+
+# Approximates Treebank: "n't" and "'s"-style clitics split off their word,
+# hyphenated words, domains, paths and times stay in one piece, and other
+# punctuation marks are tokens of their own (except "..." and "--").
+_TOKEN_RE = re.compile(r"\w+?(?=n't\b)|n't\b|'\w+|\w+(?:[-./:]\w+)*|\.\.\.|--|[^\w\s]")
+
+
+def nltk_tokenize(text: str, stopwords: Set[str]) -> Tuple[List[str], int]:
+    """
+    Tokenize with NLTK's word_tokenize (Punkt + Treebank).
+
+    Args:
+        text: Lowercased text
+        stopwords: Words to leave out
+
+    Returns:
+        Tuple of (filtered words, total token count)
+    """
+    from nltk.tokenize import word_tokenize
+    from src.utils.imports import call_with_nltk_resources
+
+    words = call_with_nltk_resources(lambda: word_tokenize(text), "punkt", "punkt_tab")
+    filtered = [w for w in words if w.isalpha() and w not in stopwords]
+    return filtered, len(words)
+
+
+def fast_tokenize(text: str, stopwords: Set[str]) -> Tuple[List[str], int]:
+    """
+    Tokenize with a single precompiled regex.
+
+    Contractions and possessives split as in NLTK ("couldn't" gives "could",
+    "n't"). Token counts still differ slightly, mainly on URLs and emoji;
+    see benchmarks/compare_tokenizers.py.
+
+    Args:
+        text: Lowercased text
+        stopwords: Words to leave out
+
+    Returns:
+        Tuple of (filtered words, total token count)
+    """
+    tokens = _TOKEN_RE.findall(text)
+    filtered = [t for t in tokens if t.isalpha() and t not in stopwords]
+    return filtered, len(tokens)
+
+
+TOKENIZERS: Dict[str, Tokenizer] = {
+    "nltk": nltk_tokenize,
+    "fast": fast_tokenize,
+}
+
+
+def get_tokenizer(name: str) -> Tokenizer:
+    """
+    Look up a tokenizer backend by name.
+
+    Args:
+        name: "nltk" or "fast"
+
+    Returns:
+        The tokenizer function
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    try:
+        return TOKENIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown tokenizer {name!r}; expected one of {sorted(TOKENIZERS)}") from None
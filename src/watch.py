@@ -0,0 +1,541 @@
+"""
+Watch mode for ReMind Pulse.
+
+A long-running process that keeps the pulse summary warm: it subscribes to
+filesystem change notifications on the journal directory (inotify on Linux,
+polling elsewhere), re-processes only the notes that were touched through
+the usual cleaning and analysis path, and keeps each note's partial
+statistics and tone in memory. After every change, and at least once per
+refresh interval so that the window keeps sliding, it writes the merged
+summary to a snapshot that ``python -m main`` answers from instantly (see
+src.pulse.load_watch_snapshot).
+
+With ``--range``, it also keeps the summary of a long range (e.g. the last
+365 days) current for ``python -m main --range``: each round brings the
+rollup store up to date and slides the range over it (see
+src.rollups.SlidingRange), so only the days that changed, entered or left
+the range are merged.
+
+Usage:
+    python -m src.watch [--poll] [--interval 2] [--refresh 60] [--range 365d]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.analysis import add_partial, get_partials, new_aggregate, summarize
+from src.config import get
+from src.journal_parser import is_journal_file, note_date_from_path, read_note
+from src.models.sentiment import get_sentiments
+from src.pulse import (DAYS_BACK, INSIGHT_MAX_CHARS, JOURNAL_DIR, READ_SECTIONS_ONLY, SELECT_ENTRIES_BY,
+                       WATCH_SNAPSHOT_VERSION, InsightText, snapshot_settings, watch_snapshot_path)
+from src.rollups import RollupStore, SlidingRange, open_rollups, parse_range, summarize_rollup
+from src.utils.cleaning import extract_journal_content
+from src.utils.manifest import ScanManifest
+
+# Seconds between polls when inotify is not available
+WATCH_POLL_INTERVAL = float(get("watch_poll_interval", 2.0))
+# The snapshot is rewritten at least this often, so that the window slides
+WATCH_REFRESH_SECONDS = float(get("watch_refresh_seconds", 60))
+# Events arriving within this many seconds of each other are handled together
+WATCH_DEBOUNCE = 0.2
+
+# inotify constants from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Recursive watch of a directory tree with Linux inotify, through ctypes.
+
+    Every directory under the root gets its own watch; directories created
+    later are added as they appear. Only the paths of files that were
+    written, moved, deleted or touched are reported.
+    """
+
+    backend = "inotify"
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Directory to watch
+
+        Raises:
+            OSError: If inotify is unavailable or the watch limit is reached
+        """
+        self.root = Path(root)
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs: Dict[int, Path] = {}
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory: Path) -> List[Path]:
+        # Returns the files already in the tree, which no event will report
+        files = []
+        for current, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            self._add_watch(Path(current))
+            files.extend(Path(current, name) for name in filenames)
+        return files
+
+    def wait(self, timeout: Optional[float] = None) -> Tuple[Set[Path], bool]:
+        """
+        Wait for changes.
+
+        Once a first event arrives, events are collected until none has
+        arrived for WATCH_DEBOUNCE seconds, so that a burst of writes from
+        one save is handled at once.
+
+        Args:
+            timeout: Maximum seconds to wait for a first event (None waits forever)
+
+        Returns:
+            Paths of the changed files, and whether the whole tree must be
+            rescanned (after an event queue overflow or a directory move)
+        """
+        paths: Set[Path] = set()
+        rescan = False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            rescan |= self._read_events(paths)
+            ready, _, _ = select.select([self.fd], [], [], WATCH_DEBOUNCE)
+        return paths, rescan
+
+    def _read_events(self, paths: Set[Path]) -> bool:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        rescan = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0"))
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            directory = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if directory is None or mask & IN_DELETE_SELF:
+                continue
+            path = directory / name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        paths.update(self._add_tree(path))
+                    except OSError:
+                        rescan = True
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    # The notes under it are gone; working out which is a rescan
+                    rescan = True
+            elif not name.startswith("."):
+                paths.add(path)
+        return rescan
+
+    def close(self):
+        """Release the inotify file descriptor."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """
+    Portable watch of a directory tree by periodic scans.
+
+    Uses an in-memory ScanManifest, so that unchanged directories are not
+    listed again and unchanged files are only stat-ed.
+    """
+
+    backend = "polling"
+
+    def __init__(self, root: Path, interval: float = WATCH_POLL_INTERVAL):
+        """
+        Args:
+            root: Directory to watch
+            interval: Seconds between scans
+        """
+        self.root = Path(root)
+        self.interval = interval
+        self.manifest = ScanManifest(self.root, file_filter=is_journal_file)
+        self.manifest.scan()
+
+    def wait(self, timeout: Optional[float] = None) -> Tuple[Set[Path], bool]:
+        """
+        Scan every ``interval`` seconds until something changed or ``timeout`` passed.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            Paths of the changed files, and False (a rescan is never needed)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+            mtimes = {rel_path: record["mtime_ns"] for rel_path, record in self.manifest.files.items()}
+            result = self.manifest.scan()
+            # Touched notes keep their hash but move in or out of the mtime window
+            touched = [rel_path for rel_path, record in self.manifest.files.items()
+                       if mtimes.get(rel_path, record["mtime_ns"]) != record["mtime_ns"]]
+            changed = set(result.added + result.changed + result.removed + touched)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return {self.manifest.path_for(rel_path) for rel_path in changed}, False
+
+    def close(self):
+        pass
+
+
+def open_watcher(root: Path, poll: bool = False, interval: float = WATCH_POLL_INTERVAL):
+    """
+    Watch a directory tree with inotify, or by polling where inotify is unavailable.
+
+    Args:
+        root: Directory to watch
+        poll: Use polling even if inotify is available
+        interval: Seconds between scans when polling
+
+    Returns:
+        InotifyWatcher or PollingWatcher
+    """
+    if not poll:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"[watch] inotify unavailable ({e}); polling every {interval:g}s")
+    return PollingWatcher(root, interval)
+
+
+class WarmSummary:
+    """
+    Per-note statistics of the notes in the pulse window, kept in memory.
+
+    Notes are selected like the pulse selects them: by modification time, or
+    by the date in their path when ``select_entries_by`` is "date". Each note
+    keeps the text the weekly insight is built from, its partial statistics
+    and its tone, so the summary can be rebuilt by merging partials without
+    reading or analyzing the other notes again.
+    """
+
+    def __init__(self, journal_dir: Path = JOURNAL_DIR, days_back: int = DAYS_BACK,
+                 select_by: str = SELECT_ENTRIES_BY, section_only: bool = READ_SECTIONS_ONLY):
+        """
+        Args:
+            journal_dir: Directory containing journal entries
+            days_back: Size of the window in days
+            select_by: "modified" or "date" (see src.pulse)
+            section_only: Read only the "# Journal" section of notes
+        """
+        self.journal_dir = Path(journal_dir)
+        self.days_back = days_back
+        self.select_by = select_by
+        self.section_only = section_only
+        self.notes: Dict[str, Dict] = {}
+
+    def since(self) -> datetime:
+        """Start of the window."""
+        return datetime.now() - timedelta(days=self.days_back)
+
+    def _in_window(self, rel_path: str, mtime: float, since: datetime) -> bool:
+        note_date = note_date_from_path(rel_path) if self.select_by == "date" else None
+        if note_date is not None:
+            return note_date >= since.date()
+        return datetime.fromtimestamp(mtime) >= since
+
+    def reload(self) -> int:
+        """
+        Rebuild the window from the journal directory.
+
+        Notes already held with an unchanged modification time are kept as
+        they are.
+
+        Returns:
+            Number of notes (re)processed
+        """
+        paths = []
+        for current, dirnames, filenames in os.walk(self.journal_dir):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            paths.extend(Path(current, name) for name in filenames)
+        on_disk = {path.relative_to(self.journal_dir).as_posix() for path in paths}
+        for rel_path in set(self.notes) - on_disk:
+            del self.notes[rel_path]
+        return self.update(paths)
+
+    def update(self, paths: Iterable[Path]) -> int:
+        """
+        Re-process changed files.
+
+        Files that are gone, are not journal notes or fall outside the
+        window are dropped; the others are read, cleaned and analyzed again
+        unless their modification time is unchanged.
+
+        Args:
+            paths: Absolute paths of changed files
+
+        Returns:
+            Number of notes (re)processed
+        """
+        since = self.since()
+        pending = []
+        for path in paths:
+            try:
+                rel_path = Path(path).relative_to(self.journal_dir).as_posix()
+            except ValueError:
+                continue
+            if not is_journal_file(rel_path):
+                continue
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                self.notes.pop(rel_path, None)
+                continue
+            if not self._in_window(rel_path, mtime_ns / 1e9, since):
+                self.notes.pop(rel_path, None)
+            elif self.notes.get(rel_path, {}).get("mtime_ns") != mtime_ns:
+                pending.append((rel_path, Path(path), mtime_ns))
+
+        texts, kept = [], []
+        for rel_path, path, mtime_ns in pending:
+            try:
+                texts.append(read_note(path, self.section_only))
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"[watch] Skipping {rel_path}: {e}")
+                self.notes.pop(rel_path, None)
+                continue
+            kept.append((rel_path, mtime_ns))
+        if not kept:
+            return 0
+
+        contents = [extract_journal_content(text) for text in texts]
+        partials = get_partials(contents)
+        tones = get_sentiments(contents)
+        for (rel_path, mtime_ns), text, partial, tone in zip(kept, texts, partials, tones):
+            self.notes[rel_path] = {"mtime_ns": mtime_ns, "text": text, "partial": partial, "tone": tone}
+        return len(kept)
+
+    def prune(self) -> int:
+        """
+        Drop the notes that have slid out of the window.
+
+        Returns:
+            Number of notes dropped
+        """
+        since = self.since()
+        expired = [rel_path for rel_path, note in self.notes.items()
+                   if not self._in_window(rel_path, note["mtime_ns"] / 1e9, since)]
+        for rel_path in expired:
+            del self.notes[rel_path]
+        return len(expired)
+
+    def _ordered(self) -> List[Dict]:
+        # Paths sort chronologically in the YYYY/MM Mon/Mon DD.md layout
+        return [self.notes[rel_path] for rel_path in sorted(self.notes)]
+
+    def summary(self) -> Dict:
+        """
+        Summary of the notes in the window, as analyze_entries gives for
+        the same notes in path order.
+        """
+        aggregate = new_aggregate()
+        tone_counts = Counter()
+        for note in self._ordered():
+            add_partial(aggregate, note["partial"])
+            tone_counts[note["tone"]] += 1
+        return summarize(aggregate, tone_counts)
+
+    def insight_text(self, max_chars: int = INSIGHT_MAX_CHARS) -> str:
+        """Journal text for the weekly insight, capped like the pulse caps it."""
+        insight_text = InsightText(max_chars)
+        for _ in insight_text.collect({"content": note["text"]} for note in self._ordered()):
+            pass
+        return insight_text.text
+
+
+class WarmRange:
+    """
+    Summary of a long date range kept current from the rollup store.
+
+    The range is given as on the command line (e.g. "365d"), so that a
+    relative range moves along as the days go by.
+    """
+
+    def __init__(self, spec: str, store: RollupStore, journal_dir: Path = JOURNAL_DIR,
+                 manifest: Optional[ScanManifest] = None):
+        """
+        Args:
+            spec: Range, as parse_range takes it
+            store: Rollup store to keep up to date
+            journal_dir: Directory containing journal entries
+            manifest: ScanManifest for journal_dir (defaults to the store's)
+
+        Raises:
+            ValueError: If the range cannot be parsed
+        """
+        parse_range(spec)
+        self.spec = spec
+        self.store = store
+        self.journal_dir = journal_dir
+        self.manifest = manifest
+        self.sliding = SlidingRange(store)
+
+    def update(self, today: Optional[date] = None) -> Dict:
+        """
+        Bring the store up to date and move the range to today.
+
+        Args:
+            today: Last day of relative ranges (defaults to today)
+
+        Returns:
+            Dictionary with the ``start`` and ``end`` of the range (ISO
+            dates) and its ``summary`` (see src.rollups.summarize_rollup)
+        """
+        start, end = parse_range(self.spec, today)
+        self.sliding.refresh(self.store.update(self.journal_dir, self.manifest)["days"])
+        rollup = self.sliding.move(start, end)
+        return {"start": start.isoformat(), "end": end.isoformat(), "summary": summarize_rollup(rollup)}
+
+
+def write_snapshot(state: WarmSummary, path: Optional[Path] = None, warm_range: Optional[Dict] = None) -> Path:
+    """
+    Write the summary for the pulse to answer from (see src.pulse.load_watch_snapshot).
+
+    Args:
+        state: Notes in the window
+        path: Snapshot file (defaults to src.pulse.watch_snapshot_path())
+        warm_range: Result of WarmRange.update to include, if any
+
+    Returns:
+        The path written
+    """
+    path = path or watch_snapshot_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = {
+        "version": WATCH_SNAPSHOT_VERSION,
+        "pid": os.getpid(),
+        "updated": time.time(),
+        "settings": snapshot_settings(),
+        "entries": len(state.notes),
+        "summary": state.summary(),
+        "insight_text": state.insight_text(),
+        "range": warm_range,
+    }
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def watch(state: WarmSummary, watcher, refresh: float = WATCH_REFRESH_SECONDS,
+          snapshot_path: Optional[Path] = None, rounds: Optional[int] = None,
+          warm_range: Optional[WarmRange] = None):
+    """
+    Keep the snapshot up to date with the journal until interrupted.
+
+    Args:
+        state: Notes in the window, already loaded
+        watcher: InotifyWatcher or PollingWatcher on the journal directory
+        refresh: Seconds between snapshot rewrites when nothing changes
+        snapshot_path: Snapshot file (defaults to src.pulse.watch_snapshot_path())
+        rounds: Stop after this many waits (None runs until interrupted)
+        warm_range: Long range to keep current as well, if any
+    """
+    while rounds is None or rounds > 0:
+        paths, rescan = watcher.wait(timeout=refresh)
+        start = time.perf_counter()
+        processed = state.reload() if rescan else state.update(paths)
+        expired = state.prune()
+        write_snapshot(state, snapshot_path, warm_range.update() if warm_range is not None else None)
+        if paths or rescan or expired:
+            print(f"[{datetime.now():%H:%M:%S}] {processed} notes updated, {expired} expired, "
+                  f"{len(state.notes)} in the window ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        if rounds is not None:
+            rounds -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the pulse summary warm while the journal changes")
+    parser.add_argument("--poll", action="store_true", help="Poll for changes instead of using inotify")
+    parser.add_argument("--interval", type=float, default=WATCH_POLL_INTERVAL, help="Seconds between polls")
+    parser.add_argument("--refresh", type=float, default=WATCH_REFRESH_SECONDS,
+                        help="Seconds between snapshot rewrites when nothing changes")
+    parser.add_argument("--range", dest="date_range", metavar="RANGE",
+                        help="Also keep the summary of a date range current for `python -m main --range`: "
+                             "7d, 4w, 3m, 1y or YYYY-MM-DD:YYYY-MM-DD")
+    args = parser.parse_args()
+    if args.date_range:
+        try:
+            parse_range(args.date_range)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if not JOURNAL_DIR.exists():
+        print(f"Warning: Journal directory does not exist: {JOURNAL_DIR}")
+        return
+    state = WarmSummary()
+    store = open_rollups() if args.date_range else None
+    warm_range = WarmRange(args.date_range, store) if store is not None else None
+    start = time.perf_counter()
+    state.reload()
+    snapshot_path = write_snapshot(state, warm_range=warm_range.update() if warm_range is not None else None)
+    watcher = open_watcher(JOURNAL_DIR, poll=args.poll, interval=args.interval)
+    print(f"Watching {JOURNAL_DIR} ({watcher.backend}); {len(state.notes)} notes in the window, "
+          f"loaded in {time.perf_counter() - start:.1f}s. Press Ctrl-C to stop.")
+    try:
+        watch(state, watcher, refresh=args.refresh, snapshot_path=snapshot_path, warm_range=warm_range)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if store is not None:
+            store.close()
+        snapshot_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
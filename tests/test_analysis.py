@@ -1,11 +1,29 @@
 import unittest
+from unittest.mock import patch
 
-from src.analysis import analyze_entries
+from src.analysis import analyze_entries, set_partials_cache
+from src.models.ollama import OllamaClient, set_client
+from src.models.sentiment import set_sentiment_cache
+from src.utils.cache import PersistentCache
 
 
 # from analysis import analyze_entries
 
 class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = PersistentCache()
+        set_partials_cache(self.cache)
+        # Keep tones independent of the cache in the working tree and of a local Ollama
+        set_sentiment_cache(PersistentCache())
+        client = OllamaClient()
+        client.is_available = lambda: False
+        set_client(client)
+
+    def tearDown(self):
+        set_partials_cache(None)
+        set_sentiment_cache(None)
+        set_client(None)
+
     def test_analyze_simple_entry(self):
         entries = [
             {
@@ -46,5 +64,71 @@ class MyTestCase(unittest.TestCase):
         # self.assertIn("neutral", result['tone_summary'])
         self.assertIn("negative", result['tone_summary'])
 
+    def test_fast_tokenizer_matches_nltk_words(self):
+        entries = [
+            {"content": "Stillness matters. Stillness heals. Why do I still feel tired? #calm", "path": "mock/a.md", "modified": None},
+            {"content": "I couldn't sleep; Anna's e-mail kept me up.", "path": "mock/b.md", "modified": None},
+        ]
+        reference = analyze_entries(entries, tokenizer="nltk")
+        fast = analyze_entries(entries, tokenizer="fast")
+        self.assertEqual(reference['most_common_words'], fast['most_common_words'])
+        self.assertEqual(reference['repeated_words'], fast['repeated_words'])
+        self.assertEqual(reference['tags'], fast['tags'])
+
+    def test_parallel_matches_serial(self):
+        texts = [
+            "Stillness matters. Why do I feel tired? #calm",
+            "Work was busy, meetings and more meetings. #work #busy",
+            "Walked in the rain with Anna. Grateful for friends! #grateful",
+            "Tired again? Maybe I need rest. Rest and stillness. #calm",
+        ]
+        entries = [{"content": texts[i % len(texts)] + f" Day {i}.", "path": f"mock/{i}.md", "modified": None}
+                   for i in range(40)]
+        serial = analyze_entries(entries, tokenizer="fast", workers=1)
+        self.cache.clear()
+        parallel = analyze_entries(entries, tokenizer="fast", workers=3)
+        self.assertEqual(serial, parallel)
+
+    def test_cached_partials_are_merged(self):
+        entries = [
+            {"content": "# Journal\nStillness matters. Why? #calm", "path": "mock/a.md", "modified": None},
+            {"content": "# Journal\nStillness heals. Rest. #calm #rest", "path": "mock/b.md", "modified": None},
+        ]
+        first = analyze_entries(entries, tokenizer="fast")
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+        entries.append({"content": "# Journal\nRest again?", "path": "mock/c.md", "modified": None})
+        second = analyze_entries(entries, tokenizer="fast")
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(self.cache.stats()["entries"], 3)
+        self.assertEqual(second['questions_count'], first['questions_count'] + 1)
+
+        self.cache.clear()
+        self.assertEqual(analyze_entries(entries, tokenizer="fast"), second)
+
+    def test_streamed_entries_match_list(self):
+        texts = ["Stillness matters. Why? #calm", "Rest and stillness. #rest", "Busy day at work!"]
+        entries = [{"content": texts[i % 3], "path": f"mock/{i}.md", "modified": None} for i in range(7)]
+        pulled = []
+
+        def stream():
+            for entry in entries:
+                pulled.append(entry)
+                yield entry
+
+        batch_sizes = []
+
+        def fake_sentiments(contents):
+            # Record how far the input had been read when each batch was analyzed
+            batch_sizes.append((len(contents), len(pulled)))
+            return ["neutral"] * len(contents)
+
+        with patch("src.analysis.get_sentiments", side_effect=fake_sentiments):
+            streamed = analyze_entries(stream(), tokenizer="fast", batch_size=3)
+            self.cache.clear()
+            listed = analyze_entries(entries, tokenizer="fast")
+        self.assertEqual(streamed, listed)
+        self.assertEqual(batch_sizes[:3], [(3, 3), (3, 6), (1, 7)])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,77 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+from benchmarks.suite import STAGES, best_times, compare, run_suite
+from benchmarks.vault import generate_vault, note_path
+from src.journal_parser import is_journal_file, note_date_from_path
+
+
+class TestSyntheticVault(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_layout_and_modification_times(self):
+        paths = generate_vault(self.test_dir, days=45, end=date(2025, 3, 10), skip_days=0)
+        self.assertEqual(len(paths), 45)
+        self.assertEqual(paths[-1], self.test_dir / "2025" / "03 Mar" / "Mar 10.md")
+        self.assertEqual(paths[0], note_path(self.test_dir, date(2025, 1, 25)))
+        for path in paths:
+            rel_path = path.relative_to(self.test_dir).as_posix()
+            self.assertTrue(is_journal_file(rel_path))
+            self.assertEqual(datetime.fromtimestamp(path.stat().st_mtime).date(), note_date_from_path(rel_path))
+        self.assertIn("# Journal\n", paths[0].read_text(encoding="utf-8"))
+
+    def test_same_arguments_give_the_same_vault(self):
+        first = generate_vault(self.test_dir / "a", days=20, images=1.0, wiki_links=1.0)
+        second = generate_vault(self.test_dir / "b", days=20, images=1.0, wiki_links=1.0)
+        self.assertEqual([p.relative_to(self.test_dir / "a") for p in first],
+                         [p.relative_to(self.test_dir / "b") for p in second])
+        for a, b in zip(first, second):
+            self.assertEqual(a.read_bytes(), b.read_bytes())
+        self.assertIn("[[", first[0].read_text(encoding="utf-8"))
+        other = generate_vault(self.test_dir / "c", days=20, seed=8)
+        self.assertNotEqual(first[0].read_bytes(), other[0].read_bytes())
+
+    def test_years_and_frontmatter(self):
+        paths = generate_vault(self.test_dir, years=2, frontmatter=0.0, skip_days=0, note_words=20)
+        self.assertIn(len(paths), (730, 731))
+        self.assertFalse(any(path.read_text(encoding="utf-8").startswith("---") for path in paths))
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        generate_vault(self.test_dir / "vault", days=30, note_words=40)
+        (self.test_dir / "state").mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_every_stage_is_timed_and_serializable(self):
+        stages = run_suite(self.test_dir / "vault", self.test_dir / "state", repeat=1, sentiment_entries=5)
+        self.assertEqual(set(stages), set(STAGES))
+        times = best_times(json.loads(json.dumps(stages)))
+        self.assertIn("ingest.incremental", times)
+        self.assertIn("sentiment.ollama", times)
+        self.assertTrue(all(seconds >= 0 for seconds in times.values()))
+        self.assertEqual(stages["sentiment"]["entries"], 5)
+
+    def test_compare_flags_slower_stages(self):
+        baseline = {"parameters": {},
+                    "stages": {"clean_content": {"seconds": 1.0}, "ingest": {"full": {"seconds": 2.0}}}}
+        current = {"parameters": {},
+                   "stages": {"clean_content": {"seconds": 1.5}, "ingest": {"full": {"seconds": 1.0}}}}
+        lines = compare(baseline, current)
+        self.assertTrue(lines[1].startswith("clean_content") and lines[1].endswith("slower"))
+        self.assertTrue(lines[2].startswith("ingest.full") and not lines[2].endswith("slower"))
+
+
+if __name__ == "__main__":
+    unittest.main()
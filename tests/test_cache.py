@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.models import lexicon, sentiment
+from src.models.ollama import OllamaClient, set_client
+from src.utils.cache import PersistentCache, content_key
+
+
+class TestPersistentCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_hits_misses_and_persistence(self):
+        path = self.test_dir / "cache.sqlite"
+        cache = PersistentCache(path)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", {"tone": "positive"})
+        self.assertEqual(cache.get("a"), {"tone": "positive"})
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+        cache.close()
+
+        reopened = PersistentCache(path)
+        self.assertEqual(reopened.get("a"), {"tone": "positive"})
+        reopened.close()
+
+    def test_lru_eviction(self):
+        cache = PersistentCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_content_key_depends_on_all_parts(self):
+        self.assertEqual(content_key("text", "phi4", 1), content_key("text", "phi4", 1))
+        self.assertNotEqual(content_key("text", "phi4", 1), content_key("text", "phi4", 2))
+        self.assertNotEqual(content_key("text", "phi4", 1), content_key("other", "phi4", 1))
+
+
+class TestSentimentCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PersistentCache()
+        sentiment.set_sentiment_cache(self.cache)
+        self.client = OllamaClient()
+        set_client(self.client)
+
+    def tearDown(self):
+        sentiment.set_sentiment_cache(None)
+        set_client(None)
+        self.client.close()
+
+    def test_ollama_answer_is_cached(self):
+        with mock.patch.object(self.client, "is_available", return_value=True), \
+                mock.patch.object(self.client, "generate", return_value="Positive\n") as post:
+            self.assertEqual(sentiment.get_sentiment("A lovely day."), "positive")
+            self.assertEqual(sentiment.get_sentiment("A lovely day."), "positive")
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_textblob_fallback_is_cached_separately(self):
+        with mock.patch.object(self.client, "is_available", return_value=False), \
+                mock.patch.object(sentiment, "SENTIMENT_FALLBACK", "textblob"):
+            self.assertEqual(sentiment.get_sentiment("I hate this."), "negative")
+        self.assertEqual(sentiment.get_sentiment_textblob("I hate this."), "negative")
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_lexicon_fallback_scores_pending_texts_in_one_batch(self):
+        texts = ["A lovely, happy day.", "I hate this.", "A lovely, happy day.", "I walked to the shop."]
+        with mock.patch.object(self.client, "is_available", return_value=False), \
+                mock.patch.object(lexicon, "score_polarities", wraps=lexicon.score_polarities) as score:
+            self.assertEqual(sentiment.get_sentiments(texts), ["positive", "negative", "positive", "neutral"])
+            self.assertEqual(sentiment.get_sentiments(texts[:2]), ["positive", "negative"])
+        self.assertEqual(score.call_count, 1)
+        self.assertEqual(len(score.call_args[0][0]), 3)
+        self.assertEqual(len(self.cache), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
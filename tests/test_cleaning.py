@@ -1,11 +1,20 @@
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
+
 from src.utils.cleaning import (
     strip_yaml,
     remove_images,
     simplify_internal_links,
     extract_journal_content,
     clean_content,
-    remove_date_like_headers
+    remove_date_like_headers,
+    CleaningEngine,
+    clean_file,
+    read_journal_section,
+    InlineRule,
+    LineRule,
 )
 
 
@@ -196,5 +205,80 @@ class TestCleaningFunctions(unittest.TestCase):
         expected = "This is some text."
 
 
+class TestCleaningEngine(unittest.TestCase):
+
+    def test_matches_step_by_step_cleaning(self):
+        text = (
+            "---\ntitle: Entry\n---\n"
+            "# Tasks\n- [ ] Call [[Mom]] ![x](y.png)\n"
+            "# Journal\n# Dec 30 🟢\nWalked with [[Anna]]. ![photo](a.jpg)\nSlept well?\n"
+            "# Resources\n![[embed.png]]"
+        )
+        step_by_step = remove_date_like_headers(extract_journal_content(
+            simplify_internal_links(remove_images(strip_yaml(text)))))
+        self.assertEqual(step_by_step, clean_content(text))
+        self.assertEqual("Walked with Anna. \nSlept well?", clean_content(text))
+
+    def test_without_journal_section(self):
+        text = "---\ntitle: x\n---\nJust [[notes]] here.\n# 12\nMore.\n"
+        self.assertEqual("Just notes here.\nMore.", clean_content(text))
+
+    def test_custom_rules(self):
+        engine = CleaningEngine(
+            inline_rules=[InlineRule("mention", r"@(?P<who>\w+)", r"\g<who>", trigger="@")],
+            line_rules=[LineRule("todo", r"^- \[ \]"), LineRule("done", r"^- \[x\]", replacement="(done)")],
+            journal_only=False,
+        )
+        text = "Met @sam today.\n- [ ] laundry\n- [x] groceries"
+        self.assertEqual("Met sam today.\n(done)", engine.clean(text))
+
+
+class TestReadJournalSection(unittest.TestCase):
+    NOTES = {
+        "frontmatter": "---\ntitle: Entry\n---\n# Tasks\n- [ ] x\n# Journal\nWalked with [[Anna]].\n# Resources\nlinks",
+        "no_frontmatter": "# Journal\nJust the journal.\n",
+        "last_section": "---\na: b\n---\n# Journal\nÜnïcödé 🟢 text\n",
+        "no_heading": "---\na: b\n---\nNo journal here.\n# Dec 30\n",
+        "heading_in_frontmatter": "---\nx: |\n  # Journal\n  y\n---\nBody\n# Journal\nReal one.\n",
+        "multibyte_after_yaml": "---\na: b\n---é# Journal\nText after.\n",
+        "crlf": "---\r\na: b\r\n---\r\n# Journal\r\nWindows note.\r\n# Next\r\n",
+        "empty": "",
+    }
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.paths = {}
+        for name, text in self.NOTES.items():
+            path = self.test_dir / f"{name}.md"
+            path.write_bytes(text.encode("utf-8"))
+            self.paths[name] = path
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _read_text(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_section_matches_extract_journal_content(self):
+        for name, path in self.paths.items():
+            section = read_journal_section(path, skip_frontmatter=False)
+            if section is not None:
+                self.assertEqual(section.strip(), extract_journal_content(self._read_text(path)), name)
+
+    def test_clean_file_matches_clean_content(self):
+        for name, path in self.paths.items():
+            self.assertEqual(clean_file(path), clean_content(self._read_text(path)), name)
+
+    def test_falls_back_when_section_cannot_be_sliced(self):
+        self.assertIsNone(read_journal_section(self.paths["no_heading"]))
+        self.assertIsNone(read_journal_section(self.paths["crlf"]))
+        self.assertIsNone(read_journal_section(self.paths["empty"]))
+
+    def test_reads_only_the_section(self):
+        self.assertEqual(read_journal_section(self.paths["frontmatter"]), "Walked with [[Anna]].")
+        self.assertEqual(read_journal_section(self.paths["heading_in_frontmatter"]), "Real one.\n")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from src.embeddings import EmbeddingIndex, HashingVectorizer, OllamaEmbedder
+from src.utils.manifest import ScanManifest
+
+STOPWORDS = {"the", "a", "and", "i", "in", "to", "of", "with", "was"}
+
+ENTRIES = {
+    "2025-04-17.md": "Long walk by the sea with Anna. The waves and the wind were calm.",
+    "2025-04-18.md": "Work meeting ran late. Deadlines, emails and more meetings.",
+    "2025-04-19.md": "Walked to the sea again. Calm waves, cold wind, quiet beach.",
+    "2025-04-20.md": "Budget meeting at work, then emails until late.",
+}
+
+
+class TestHashingVectorizer(unittest.TestCase):
+    def test_vectors_are_normalized_and_stable(self):
+        vectorizer = HashingVectorizer(dim=64, stopwords=STOPWORDS)
+        matrix = vectorizer.transform(["walk by the sea", "walk by the sea", ""])
+        self.assertEqual(matrix.shape, (3, 64))
+        self.assertAlmostEqual(float(np.linalg.norm(matrix[0])), 1.0, places=5)
+        np.testing.assert_array_equal(matrix[0], matrix[1])
+        self.assertFalse(matrix[2].any())
+
+    def test_stopwords_are_ignored(self):
+        vectorizer = HashingVectorizer(dim=64, stopwords=STOPWORDS)
+        np.testing.assert_array_equal(*vectorizer.transform(["the sea", "sea"]))
+
+
+class TestEmbeddingIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source = self.test_dir / "cleaned"
+        self.source.mkdir()
+        for name, text in ENTRIES.items():
+            (self.source / name).write_text(text)
+        self.vectorizer = HashingVectorizer(dim=256, stopwords=STOPWORDS)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _index(self, quantize=False):
+        return EmbeddingIndex(self.test_dir / "index", self.vectorizer, quantize=quantize).load()
+
+    def _update(self, index):
+        manifest = ScanManifest(self.source, self.test_dir / "manifest.json").load()
+        return index.update(self.source, manifest)
+
+    def test_similar_entries(self):
+        index = self._index()
+        self.assertEqual(self._update(index), {"vectorized": 4, "removed": 0, "unchanged": 0})
+        results = index.similar_to_entry("2025-04-17.md", k=2)
+        self.assertEqual(results[0]["path"], "2025-04-19.md")
+        self.assertEqual(results[0]["date"], date(2025, 4, 19))
+        self.assertNotIn("2025-04-17.md", [r["path"] for r in results])
+        self.assertEqual(index.similar_to_text("emails after the meeting", k=1)[0]["path"], "2025-04-20.md")
+
+    def test_index_is_memory_mapped_after_reload(self):
+        self._update(self._index())
+        index = self._index()
+        self.assertEqual(len(index), 4)
+        self.assertIsInstance(index.vectors, np.memmap)
+        self.assertTrue(index.vectors.flags["C_CONTIGUOUS"])
+        self.assertEqual(index.similar_to_entry("2025-04-18.md", k=1)[0]["path"], "2025-04-20.md")
+
+    def test_incremental_update(self):
+        index = self._index()
+        self._update(index)
+        self.assertEqual(self._update(self._index()), {"vectorized": 0, "removed": 0, "unchanged": 4})
+
+        path = self.source / "2025-04-18.md"
+        path.write_text("Swam in the cold sea, calm waves.")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        (self.source / "2025-04-20.md").unlink()
+        index = self._index()
+        self.assertEqual(self._update(index), {"vectorized": 1, "removed": 1, "unchanged": 2})
+        self.assertEqual(sorted(index.paths), ["2025-04-17.md", "2025-04-18.md", "2025-04-19.md"])
+        fresh = self.vectorizer.transform([path.read_text()])[0]
+        np.testing.assert_allclose(index.dequantized([index.paths.index("2025-04-18.md")])[0], fresh)
+
+    def test_quantized_index_ranks_like_float(self):
+        exact, quantized = self._index(), EmbeddingIndex(self.test_dir / "q", self.vectorizer, quantize=True)
+        self._update(exact)
+        quantized.update(self.source, ScanManifest(self.source).load())
+        self.assertEqual(quantized.vectors.dtype, np.int8)
+        query = self.vectorizer.transform(["calm sea walk"])[0]
+        np.testing.assert_allclose(quantized.similarities(query), exact.similarities(query), atol=0.02)
+        self.assertEqual([r["path"] for r in quantized.most_similar(query, k=4)],
+                         [r["path"] for r in exact.most_similar(query, k=4)])
+
+
+class TestOllamaEmbedder(unittest.TestCase):
+    def test_batches_and_normalizes(self):
+        client = MagicMock(max_concurrency=2)
+        client.is_available.return_value = True
+        client.embed.side_effect = lambda model, texts: [[3.0, 4.0] for _ in texts]
+        embedder = OllamaEmbedder("test-model", client=client, batch_size=2)
+        matrix = embedder.transform(["a", "b", "c"])
+        self.assertEqual(matrix.shape, (3, 2))
+        np.testing.assert_allclose(matrix[0], [0.6, 0.8])
+        self.assertEqual(client.embed.call_count, 2)
+        self.assertEqual(embedder.name, "ollama-test-model")
+
+
+if __name__ == "__main__":
+    unittest.main()
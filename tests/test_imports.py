@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import nltk
+
+from src.utils import imports
+
+
+class TestEnsureNltkResources(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        patcher = mock.patch("src.utils.imports._state_path", return_value=self.root / "nltk_resources.json")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(imports._verified.clear)
+        imports._verified.clear()
+        imports._loaded_state = True
+
+    def test_failed_download_is_retried(self):
+        with mock.patch.object(nltk.data, "find", side_effect=LookupError), \
+                mock.patch.object(nltk, "download", return_value=False) as download, \
+                mock.patch("builtins.print"):
+            imports.ensure_nltk_resources("stopwords")
+            imports.ensure_nltk_resources("stopwords")
+        self.assertEqual(download.call_count, 2)
+        self.assertNotIn("stopwords", imports._verified)
+        self.assertFalse((self.root / "nltk_resources.json").exists())
+
+    def test_successful_download_is_recorded(self):
+        with mock.patch.object(nltk.data, "find", side_effect=LookupError), \
+                mock.patch.object(nltk, "download", return_value=True) as download:
+            imports.ensure_nltk_resources("stopwords")
+            imports.ensure_nltk_resources("stopwords")
+        self.assertEqual(download.call_count, 1)
+        self.assertIn("stopwords", (self.root / "nltk_resources.json").read_text())
+
+    def test_vanished_resource_is_checked_again(self):
+        imports._verified.add("stopwords")
+        load = mock.Mock(side_effect=[LookupError("gone"), ["the", "a"]])
+        with mock.patch.object(nltk.data, "find", side_effect=LookupError), \
+                mock.patch.object(nltk, "download", return_value=True) as download:
+            self.assertEqual(imports.call_with_nltk_resources(load, "stopwords"), ["the", "a"])
+        self.assertEqual((load.call_count, download.call_count), (2, 1))
+        self.assertIn("stopwords", imports._verified)
+
+    def test_still_missing_resource_raises(self):
+        imports._verified.add("stopwords")
+        with mock.patch.object(nltk.data, "find", side_effect=LookupError), \
+                mock.patch.object(nltk, "download", return_value=False), mock.patch("builtins.print"):
+            with self.assertRaises(LookupError):
+                imports.call_with_nltk_resources(mock.Mock(side_effect=LookupError("gone")), "stopwords")
+        self.assertNotIn("stopwords", imports._verified)
+
+
+if __name__ == "__main__":
+    unittest.main()
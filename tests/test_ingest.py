@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.utils import ingest
+
+
+class TestIncrementalIngest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.journal = self.test_dir / "Journal"
+        self.month = self.journal / "04 Apr"
+        self.month.mkdir(parents=True)
+        (self.month / "17 Apr.md").write_text("---\ntags: x\n---\n# Journal\nFirst entry.")
+        (self.month / "18 Apr.md").write_text("# Journal\nSecond entry.")
+        self.output = self.test_dir / "cleaned"
+        self.state = self.test_dir / "state"
+        self.state.mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _ingest(self, **kwargs):
+        kwargs.setdefault("workers", 1)
+        return ingest.ingest(self.journal, self.output, state_dir=self.state, **kwargs)
+
+    def _bump_mtime(self, path: Path):
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def test_first_run_cleans_every_file(self):
+        result = self._ingest()
+        self.assertEqual(sorted(result.written), ["2025-04-17.md", "2025-04-18.md"])
+        self.assertEqual((self.output / "2025-04-17.md").read_text(), "First entry.")
+        self.assertEqual(list(self.output.glob(".*.tmp")), [])
+
+    def test_unchanged_vault_is_a_no_op(self):
+        self._ingest()
+        with patch.object(ingest, "clean_file") as clean:
+            result = self._ingest()
+        clean.assert_not_called()
+        self.assertEqual(result.written, [])
+        self.assertEqual(len(result.scan.unchanged), 2)
+
+    def test_only_changed_files_are_reprocessed(self):
+        self._ingest()
+        path = self.month / "18 Apr.md"
+        path.write_text("# Journal\nSecond entry, edited.")
+        self._bump_mtime(path)
+        result = self._ingest()
+        self.assertEqual(result.written, ["2025-04-18.md"])
+        self.assertEqual((self.output / "2025-04-18.md").read_text(), "Second entry, edited.")
+
+    def test_missing_output_is_regenerated(self):
+        self._ingest()
+        (self.output / "2025-04-17.md").unlink()
+        result = self._ingest()
+        self.assertEqual(result.written, ["2025-04-17.md"])
+
+    def test_removed_source_deletes_its_output(self):
+        self._ingest()
+        (self.month / "17 Apr.md").unlink()
+        result = self._ingest()
+        self.assertEqual(result.deleted, ["2025-04-17.md"])
+        self.assertFalse((self.output / "2025-04-17.md").exists())
+        self.assertTrue((self.output / "2025-04-18.md").exists())
+
+    def test_no_prune_keeps_outputs(self):
+        self._ingest()
+        (self.month / "17 Apr.md").unlink()
+        result = self._ingest(prune=False)
+        self.assertEqual(result.deleted, [])
+        self.assertTrue((self.output / "2025-04-17.md").exists())
+
+    def test_worker_pool_matches_serial(self):
+        for day in range(1, 10):
+            (self.month / f"0{day} Apr.md").write_text(f"# Journal\nEntry {day}.")
+        result = self._ingest(workers=2)
+        self.assertEqual(len(result.written), 11)
+        self.assertEqual(result.failed, {})
+        self.assertEqual((self.output / "2025-04-05.md").read_text(), "Entry 5.")
+
+    def test_date_from_vault_layout(self):
+        path = Path("/vault/2024/12 Dec/Dec 03.md")
+        self.assertEqual(ingest.extract_date_from_path(path), "2024-12-03")
+        self.assertEqual(ingest.extract_date_from_path(Path("/vault/04 Apr/17 Apr.md")), "2025-04-17")
+
+    def test_failed_file_is_retried(self):
+        with patch.object(ingest, "clean_file", side_effect=ValueError("boom")):
+            result = self._ingest()
+        self.assertEqual(set(result.failed), {"04 Apr/17 Apr.md", "04 Apr/18 Apr.md"})
+        result = self._ingest()
+        self.assertEqual(len(result.written), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+from src.journal_parser import (iter_entries_by_date, iter_journal_files, iter_recent_entries, load_entries_by_date,
+                                load_recent_entries)
+
+
+class TestDateAwareWalk(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        for year, month_dir, day_file in [
+            ("2024", "12 Dec", "Dec 31.md"),
+            ("2025", "01 Jan", "Jan 01.md"),
+            ("2025", "01 Jan", "Jan 02.md"),
+            ("2025", "03 Mar", "Mar 05.md"),
+            ("2023", "06 Jun", "Jun 10.md"),
+        ]:
+            folder = self.test_dir / "Journal" / year / month_dir
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / day_file).write_text(f"# Journal\nEntry for {day_file}")
+        (self.test_dir / "Journal" / "2025" / "01 Jan" / "todo.md").write_text("Not a note.")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_walk_prunes_outside_window(self):
+        found = sorted(d for _, d in iter_journal_files(self.test_dir, date(2024, 12, 30), date(2025, 1, 1)))
+        self.assertEqual(found, [date(2024, 12, 31), date(2025, 1, 1)])
+
+    def test_load_entries_by_date(self):
+        entries = load_entries_by_date(self.test_dir, datetime(2025, 1, 1), until=datetime(2025, 3, 31), max_workers=2)
+        self.assertEqual([e["date"] for e in entries], [date(2025, 1, 1), date(2025, 1, 2), date(2025, 3, 5)])
+        self.assertEqual(entries[0]["content"], "# Journal\nEntry for Jan 01.md")
+
+    def test_iter_entries_by_date_is_lazy(self):
+        entries = iter_entries_by_date(self.test_dir, datetime(2023, 1, 1), until=datetime(2025, 3, 31), max_workers=1)
+        first = next(entries)
+        self.assertEqual(first["date"], date(2023, 6, 10))
+        self.assertEqual([e["date"] for e in entries], [date(2024, 12, 31), date(2025, 1, 1),
+                                                        date(2025, 1, 2), date(2025, 3, 5)])
+
+    def test_iter_recent_entries_matches_load(self):
+        since = datetime(2000, 1, 1)
+        streamed = iter_recent_entries(self.test_dir, since)
+        self.assertNotIsInstance(streamed, list)
+        key = lambda e: str(e["path"])
+        self.assertEqual(sorted(streamed, key=key), sorted(load_recent_entries(self.test_dir, since), key=key))
+
+
+if __name__ == "__main__":
+    unittest.main()
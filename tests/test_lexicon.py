@@ -0,0 +1,57 @@
+import unittest
+
+from textblob import TextBlob
+
+from src.models.lexicon import get_lexicon, score_polarities
+
+SENTENCES = [
+    "This is not good.",
+    "Not a good day at all.",
+    "I am very happy!",
+    "I'm really not happy",
+    "not really happy",
+    "It was very very good!!!",
+    "I don't feel great",
+    "Never felt so bad :(",
+    "Love it <3",
+    "Great (!) another meeting",
+    "Quite tired, very, very sad.",
+    "The food was extremely bad... but the company was wonderful!",
+    "really is a good day",
+    "I can't believe how terribly wrong it went.",
+    "Happy.\n\nSad but okay.",
+    "What a beautiful, sunny morning :-)",
+    "\"Amazing\" she said",
+    "Work was boring; the evening was fun.",
+    "Ran 5km with Sam & Jo; we're training for the half-marathon (12 weeks to go!).",
+]
+
+
+class TestSentimentLexicon(unittest.TestCase):
+    def test_polarities_match_textblob(self):
+        polarities = score_polarities(SENTENCES)
+        for sentence, polarity in zip(SENTENCES, polarities):
+            with self.subTest(sentence=sentence):
+                self.assertAlmostEqual(polarity, TextBlob(sentence).sentiment.polarity)
+
+    def test_batch_scores_texts_independently(self):
+        batch = score_polarities(SENTENCES)
+        alone = [score_polarities([sentence])[0] for sentence in SENTENCES]
+        self.assertEqual(list(batch), alone)
+
+    def test_negation_and_intensifiers(self):
+        good, not_good, very_good = score_polarities(["good", "not good", "very good"])
+        self.assertAlmostEqual(not_good, -0.5 * good)
+        self.assertGreater(very_good, good)
+
+    def test_texts_without_known_words_score_zero(self):
+        self.assertEqual(list(score_polarities(["", "the bus", "..."])), [0.0, 0.0, 0.0])
+        self.assertEqual(len(score_polarities([])), 0)
+
+    def test_tokenize_splits_punctuation_and_contractions(self):
+        self.assertEqual(get_lexicon().tokenize("Didn't sleep—well. (Great!) :-)"),
+                         ["did", "n", "'", "t", "sleep—well", ".", "(", "great", "!", ")", ":-)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.journal_parser import is_journal_file, load_recent_entries, open_manifest
+from src.utils.manifest import ScanManifest
+
+
+class TestScanManifest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.journal = self.test_dir / "Journal"
+        (self.journal / "2025" / "04 Apr").mkdir(parents=True)
+        (self.journal / "2025" / "04 Apr" / "Apr 17.md").write_text("# Journal\nFirst entry.")
+        (self.journal / "2025" / "04 Apr" / "Apr 18.md").write_text("# Journal\nSecond entry.")
+        (self.journal / "2025" / "04 Apr" / "notes.md").write_text("Not a daily note.")
+        self.manifest_path = self.test_dir / "manifest.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _manifest(self):
+        return ScanManifest(self.journal, self.manifest_path, file_filter=is_journal_file).load()
+
+    def _bump_mtime(self, path: Path):
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def test_first_scan_adds_matching_files(self):
+        result = self._manifest().scan()
+        self.assertEqual(sorted(result.added), ["2025/04 Apr/Apr 17.md", "2025/04 Apr/Apr 18.md"])
+        self.assertFalse(result.changed or result.removed)
+
+    def test_rescan_reports_changes(self):
+        manifest = self._manifest()
+        manifest.scan()
+        manifest.save()
+
+        manifest = self._manifest()
+        self.assertFalse(manifest.scan().has_changes)
+
+        edited = self.journal / "2025" / "04 Apr" / "Apr 17.md"
+        edited.write_text("# Journal\nEdited entry.")
+        self._bump_mtime(edited)
+        touched = self.journal / "2025" / "04 Apr" / "Apr 18.md"
+        self._bump_mtime(touched)
+        (self.journal / "2025" / "05 May").mkdir()
+        (self.journal / "2025" / "05 May" / "May 01.md").write_text("New month.")
+
+        result = manifest.scan()
+        self.assertEqual(result.changed, ["2025/04 Apr/Apr 17.md"])
+        self.assertEqual(result.added, ["2025/05 May/May 01.md"])
+        self.assertIn("2025/04 Apr/Apr 18.md", result.unchanged)
+
+        (self.journal / "2025" / "05 May" / "May 01.md").unlink()
+        result = manifest.scan()
+        self.assertEqual(result.removed, ["2025/05 May/May 01.md"])
+
+    def test_load_recent_entries_with_manifest(self):
+        since = datetime.now() - timedelta(days=1)
+        plain = load_recent_entries(self.journal, since)
+        manifest = open_manifest(self.journal, self.manifest_path)
+        cached = load_recent_entries(self.journal, since, manifest=manifest)
+
+        self.assertEqual(sorted(e["path"] for e in plain), sorted(e["path"] for e in cached))
+        self.assertTrue(self.manifest_path.exists())
+        self.assertTrue(all(len(e["sha256"]) == 64 for e in cached))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import json
+import threading
+import unittest
+
+from src.analysis import analyze_entries, set_partials_cache
+from src.models.sentiment import set_sentiment_cache
+from src.utils.cache import PersistentCache
+from src.utils.metrics import Metrics, get_metrics, set_metrics
+from unittest.mock import patch
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetrics(unittest.TestCase):
+    def test_stages_nest_and_accumulate(self):
+        clock = FakeClock()
+        metrics = Metrics(clock=clock)
+        for _ in range(2):
+            with metrics.stage("outer"):
+                clock.now += 1
+                with metrics.stage("inner"):
+                    clock.now += 0.5
+        stages = metrics.to_dict()["stages"]
+        self.assertEqual(stages["outer"], {"calls": 2, "seconds": 3.0, "max_seconds": 1.5})
+        self.assertEqual(stages["outer/inner"], {"calls": 2, "seconds": 1.0, "max_seconds": 0.5})
+        self.assertEqual(len(metrics.spans), 4)
+
+    def test_stage_is_recorded_when_it_raises(self):
+        metrics = Metrics()
+        with self.assertRaises(ValueError):
+            with metrics.stage("failing"):
+                raise ValueError
+        with metrics.stage("next"):
+            pass
+        self.assertEqual(set(metrics.stages), {"failing", "next"})
+
+    def test_stages_on_other_threads_start_at_the_top_level(self):
+        metrics = Metrics()
+
+        def work():
+            with metrics.stage("worker"):
+                metrics.count("items")
+
+        with metrics.stage("main"):
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(metrics.stages["worker"]["calls"], 4)
+        self.assertEqual(metrics.counters["items"], 4)
+
+    def test_histogram_summary(self):
+        metrics = Metrics()
+        for value in [0.005, 0.02, 0.2, 0.2, 3.0]:
+            metrics.observe("latency", value)
+        histogram = metrics.to_dict()["histograms"]["latency"]
+        self.assertEqual(histogram["count"], 5)
+        self.assertAlmostEqual(histogram["mean"], 3.425 / 5)
+        self.assertEqual((histogram["min"], histogram["p50"], histogram["max"]), (0.005, 0.2, 3.0))
+        counts = {bucket["le"]: bucket["count"] for bucket in histogram["buckets"]}
+        self.assertEqual((counts[0.01], counts[0.025], counts[0.25], counts[5.0]), (1, 1, 2, 1))
+
+    def test_memory_peaks(self):
+        metrics = Metrics(trace_memory=True)
+        try:
+            with metrics.stage("outer"):
+                with metrics.stage("allocate"):
+                    data = bytearray(2_000_000)
+                del data
+        finally:
+            metrics.close()
+        self.assertGreaterEqual(metrics.stages["outer/allocate"]["peak_bytes"], 2_000_000)
+        self.assertGreaterEqual(metrics.stages["outer"]["peak_bytes"], 2_000_000)
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics = Metrics(enabled=False)
+        with metrics.stage("stage"):
+            metrics.count("counter")
+            metrics.observe("histogram", 1.0)
+        trace = metrics.to_dict()
+        self.assertEqual((trace["stages"], trace["counters"], trace["histograms"]), ({}, {}, {}))
+        self.assertFalse(get_metrics().enabled)
+
+    def test_trace_is_json_and_render_lists_everything(self):
+        metrics = Metrics()
+        with metrics.stage("pulse.analyze"):
+            with metrics.stage("analysis.tokenize"):
+                pass
+        metrics.count("journal.bytes_read", 1234)
+        metrics.observe("ollama.generate_seconds", 0.1)
+        json.dumps(metrics.to_dict())
+        report = metrics.render()
+        for name in ("pulse.analyze", "    analysis.tokenize", "journal.bytes_read", "1,234",
+                     "ollama.generate_seconds: n=1"):
+            self.assertIn(name, report)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        set_metrics(self.metrics)
+        set_partials_cache(PersistentCache())
+        set_sentiment_cache(PersistentCache())
+
+    def tearDown(self):
+        set_metrics(None)
+        set_partials_cache(None)
+        set_sentiment_cache(None)
+
+    def test_analyze_entries_records_stages_and_counters(self):
+        entries = [{"content": "# Journal\nA calm walk in the park."}, {"content": "# Journal\nBusy day?"}]
+        with patch("src.models.sentiment.SENTIMENT_FALLBACK", "lexicon"), \
+                patch("src.models.sentiment.get_client") as get_client:
+            get_client.return_value.generate_many.side_effect = lambda model, prompts, **options: [
+                "positive" if "calm" in prompt else RuntimeError("boom") for prompt in prompts]
+            analyze_entries(entries)
+            analyze_entries(entries)
+
+        for stage in ("analysis.extract", "analysis.cache_lookup", "analysis.tokenize", "analysis.sentiment",
+                      "analysis.sentiment/sentiment.ollama", "analysis.sentiment/sentiment.lexicon"):
+            self.assertIn(stage, self.metrics.stages)
+        self.assertEqual(self.metrics.stages["analysis.tokenize"]["calls"], 1)
+        self.assertEqual(self.metrics.counters["analysis.entries"], 4)
+        self.assertEqual(self.metrics.counters["analysis.cache_misses"], 2)
+        self.assertEqual(self.metrics.counters["sentiment.ollama"], 1)
+        self.assertEqual(self.metrics.counters["sentiment.cached"], 1)
+        self.assertEqual(self.metrics.counters["sentiment.fallback.error"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from src.models import sentiment
+from src.models.ollama import CircuitBreaker, OllamaClient, OllamaUnavailable, configured_base_url, set_client
+from src.utils.cache import PersistentCache
+
+
+class TestOllamaClient(unittest.TestCase):
+    def setUp(self):
+        self.client = OllamaClient(max_concurrency=4)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_generate_many_runs_concurrently_and_keeps_order(self):
+        in_flight = []
+        lock = threading.Lock()
+        peak = [0]
+
+        def fake_generate(model, prompt, timeout=None, **options):
+            with lock:
+                in_flight.append(prompt)
+                peak[0] = max(peak[0], len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(prompt)
+            if prompt == "bad":
+                raise ConnectionError("boom")
+            return prompt.upper()
+
+        with mock.patch.object(self.client, "is_available", return_value=True), \
+                mock.patch.object(self.client, "generate", side_effect=fake_generate):
+            results = self.client.generate_many("phi4", ["a", "b", "bad", "c", "d", "e"])
+
+        self.assertEqual(results[:2], ["A", "B"])
+        self.assertIsInstance(results[2], ConnectionError)
+        self.assertEqual(results[3:], ["C", "D", "E"])
+        self.assertGreater(peak[0], 1)
+        self.assertLessEqual(peak[0], 4)
+
+    def test_generate_posts_to_pooled_session(self):
+        response = mock.Mock()
+        response.json.return_value = {"response": "neutral"}
+        with mock.patch.object(self.client.session, "post", return_value=response) as post:
+            self.assertEqual(self.client.generate("phi4", "hello", temperature=0.5), "neutral")
+        url = post.call_args[0][0]
+        body = post.call_args[1]["json"]
+        self.assertEqual(url, "http://localhost:11434/api/generate")
+        self.assertEqual(body, {"model": "phi4", "prompt": "hello", "stream": False, "temperature": 0.5})
+
+    def test_generate_stream_yields_ndjson_tokens(self):
+        response = mock.MagicMock()
+        response.iter_lines.return_value = [
+            b'{"response": "I ", "done": false}',
+            b'',
+            b'{"response": "noticed", "done": false}',
+            b'{"response": "", "done": true}',
+            b'{"response": "ignored", "done": false}',
+        ]
+        with mock.patch.object(self.client.session, "post", return_value=response) as post:
+            tokens = list(self.client.generate_stream("llama3", "reflect"))
+        self.assertEqual(tokens, ["I ", "noticed"])
+        self.assertTrue(post.call_args[1]["stream"])
+        self.assertTrue(post.call_args[1]["json"]["stream"])
+
+    def test_embed_sends_one_batch(self):
+        response = mock.Mock()
+        response.json.return_value = {"embeddings": [[0.1, 0.2], [0.3, 0.4]]}
+        with mock.patch.object(self.client.session, "post", return_value=response) as post:
+            self.assertEqual(self.client.embed("nomic-embed-text", ["a", "b"]), [[0.1, 0.2], [0.3, 0.4]])
+        self.assertEqual(post.call_args[0][0], "http://localhost:11434/api/embed")
+        self.assertEqual(post.call_args[1]["json"], {"model": "nomic-embed-text", "input": ["a", "b"]})
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_recovers_after_cooldown(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        self.assertFalse(breaker.allow_request())
+
+        now[0] = 11
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())  # only one half-open trial
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+
+        now[0] = 22
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+        self.assertTrue(breaker.allow_request())
+
+
+class TestServerDown(unittest.TestCase):
+    def setUp(self):
+        # Nothing listens on port 9 (discard) locally, so connections are refused
+        self.client = OllamaClient(base_url="http://127.0.0.1:9", breaker=CircuitBreaker(cooldown=60))
+        set_client(self.client)
+        sentiment.set_sentiment_cache(PersistentCache())
+
+    def tearDown(self):
+        set_client(None)
+        sentiment.set_sentiment_cache(None)
+        self.client.close()
+
+    def test_fails_fast_when_server_is_down(self):
+        texts = [f"Entry {i} was a wonderful and happy day." for i in range(30)]
+        start = time.perf_counter()
+        with mock.patch.object(self.client.session, "get", wraps=self.client.session.get) as probe:
+            tones = sentiment.get_sentiments(texts)
+            insight = sentiment.get_weekly_insight("\n\n".join(texts))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(tones, ["positive"] * 30)
+        self.assertEqual(insight, "(Insight unavailable)")
+        self.assertEqual(probe.call_count, 1)
+        self.assertLess(elapsed, 1.0)
+        with self.assertRaises(OllamaUnavailable):
+            self.client.generate("phi4", "hello")
+
+class TestConfiguredBaseUrl(unittest.TestCase):
+    def test_config_then_ollama_host_then_default(self):
+        with mock.patch("src.models.ollama.get", return_value="http://gpu-box:8080/"), \
+                mock.patch.dict("os.environ", {"OLLAMA_HOST": "ignored"}):
+            self.assertEqual(configured_base_url(), "http://gpu-box:8080")
+        with mock.patch("src.models.ollama.get", return_value=None):
+            for host, url in [("0.0.0.0", "http://0.0.0.0:11434"), ("gpu-box:9000", "http://gpu-box:9000"),
+                              ("https://ollama.example.com:443", "https://ollama.example.com:443")]:
+                with mock.patch.dict("os.environ", {"OLLAMA_HOST": host}):
+                    self.assertEqual(configured_base_url(), url)
+            with mock.patch.dict("os.environ", {}, clear=True):
+                self.assertEqual(configured_base_url(), "http://localhost:11434")
+
+
+class TestFakeServer(unittest.TestCase):
+    def start(self, **options):
+        server = FakeOllamaServer(**options).start()
+        self.addCleanup(server.stop)
+        client = OllamaClient(base_url=server.url, max_concurrency=3, breaker=CircuitBreaker(cooldown=60))
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_generate_and_stream(self):
+        server, client = self.start(answers={"phi4": "positive", "llama3": lambda prompt: f"I noticed {prompt}"})
+        self.assertTrue(client.is_available())
+        self.assertEqual(client.generate("phi4", "hello", temperature=0.5), "positive")
+        self.assertEqual(list(client.generate_stream("llama3", "the rain")), ["I", " noticed", " the", " rain"])
+        self.assertEqual(server.requests[0], {"model": "phi4", "prompt": "hello", "stream": False, "temperature": 0.5})
+        self.assertTrue(server.requests[1]["stream"])
+
+    def test_generate_many_is_bounded_by_max_concurrency(self):
+        server, client = self.start(latency=0.05)
+        start = time.perf_counter()
+        answers = client.generate_many("phi4", [f"entry {i}" for i in range(9)])
+        elapsed = time.perf_counter() - start
+        self.assertEqual(answers, ["neutral"] * 9)
+        self.assertEqual(server.peak_in_flight, 3)
+        self.assertLess(elapsed, 9 * 0.05)
+
+    def test_errors_fall_back_to_offline_sentiment(self):
+        server, client = self.start(error_rate=0.5, seed=3)
+        set_client(client)
+        sentiment.set_sentiment_cache(PersistentCache())
+        self.addCleanup(set_client, None)
+        self.addCleanup(sentiment.set_sentiment_cache, None)
+        texts = [f"Entry {i}: a wonderful and happy day." for i in range(20)]
+        with mock.patch("builtins.print"):
+            tones = sentiment.get_sentiments(texts)
+        # The fake answers "neutral"; failed requests are scored offline instead
+        self.assertIn("neutral", tones)
+        self.assertIn("positive", tones)
+        self.assertFalse(client.breaker.is_open)
+
+    def test_timeouts_and_dropped_connections_open_the_breaker(self):
+        server, client = self.start(latency=0.5)
+        with self.assertRaises(requests.Timeout):
+            client.generate("phi4", "slow", timeout=0.05)
+        self.assertTrue(client.breaker.is_open)
+        with self.assertRaises(OllamaUnavailable):
+            client.generate("phi4", "again")
+
+        server, client = self.start(disconnect_rate=1.0)
+        with self.assertRaises(requests.ConnectionError):
+            client.generate("phi4", "dropped")
+        self.assertTrue(client.breaker.is_open)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from src.output import render_summary
+
+
+class TestRenderSummary(unittest.TestCase):
+    def setUp(self):
+        self.summary = {
+            'most_common_words': [("stillness", 2)],
+            'questions_count': 1,
+            'tags': [("grateful", 1)],
+            'average_length': 12,
+            'repeated_words': ["stillness"],
+            'tone_summary': {"positive": 1},
+        }
+
+    def test_streamed_insight_renders_after_summary(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            render_summary(self.summary, insight_stream=iter(["I noticed ", "calm."]))
+        text = out.getvalue()
+        self.assertLess(text.index("Most used words"), text.index("I noticed calm."))
+        self.assertEqual(self.summary['ollama_insight'], "I noticed calm.")
+
+    def test_precomputed_insight(self):
+        self.summary['ollama_insight'] = "I seem rested."
+        out = io.StringIO()
+        with redirect_stdout(out):
+            render_summary(self.summary)
+        self.assertIn("I seem rested.", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+from src import pulse
+from src.analysis import aggregate_contents, analyze_entries, batched_sentiments, set_partials_cache
+from src.pulse import InsightText, analysis_stages
+from src.utils.cache import PersistentCache
+from src.utils.scheduler import StreamBuffer
+
+
+class TestInsightText(unittest.TestCase):
+    def test_collect_passes_entries_through(self):
+        entries = [{"content": "First."}, {"content": "Second."}]
+        insight_text = InsightText(max_chars=1000)
+        self.assertEqual(list(insight_text.collect(entries)), entries)
+        self.assertEqual(insight_text.entries, 2)
+        self.assertEqual(insight_text.text, "First.\n\nSecond.")
+
+    def test_text_is_capped(self):
+        entries = [{"content": "a" * 10} for _ in range(100)]
+        insight_text = InsightText(max_chars=25)
+        for _ in insight_text.collect(entries):
+            pass
+        self.assertEqual(insight_text.entries, 100)
+        self.assertLessEqual(len(insight_text.text), 25)
+        self.assertEqual(insight_text.text, "a" + "\n\n" + "a" * 10 + "\n\n" + "a" * 10)
+        self.assertLessEqual(len(insight_text.parts), 3)
+        self.assertTrue(insight_text.truncated)
+
+    def test_most_recent_text_is_kept(self):
+        notes = [(date(2025, 4, day), f"{day}.md") for day in range(1, 8)]
+        texts = {f"{day}.md": f"Day {day}: " + "x" * day for day in range(1, 8)}
+        for max_chars in (5, 20, 40, 1000):
+            insight_text = InsightText(max_chars)
+            for _ in insight_text.collect({"content": texts[path]} for _, path in notes):
+                pass
+            with mock.patch("src.pulse.read_note", side_effect=lambda path, _: texts[path.name]):
+                self.assertEqual(insight_text.text, pulse._latest_text(notes, max_chars), msg=max_chars)
+            self.assertEqual(insight_text.truncated, max_chars < 1000)
+        self.assertTrue(insight_text.text.endswith("Day 7: xxxxxxx"))
+
+
+def fake_sentiments(texts):
+    return ["positive" if "happy" in text.lower() else "neutral" for text in texts]
+
+
+class TestAnalysisStages(unittest.TestCase):
+    def setUp(self):
+        set_partials_cache(PersistentCache())
+        self.contents = ["Happy walk? #walk", "Rainy day, calm evening. Calm.", "Work work #work", "happy again?"]
+
+    def tearDown(self):
+        set_partials_cache(None)
+
+    def test_summary_matches_analyze_entries(self):
+        with mock.patch("src.analysis.get_sentiments", side_effect=fake_sentiments), \
+                mock.patch("src.pulse.get_weekly_insight", return_value="I seem rested."):
+            results = analysis_stages(self.contents, "text").run()
+        with mock.patch("src.analysis.get_sentiments", side_effect=fake_sentiments):
+            expected = analyze_entries({"content": content} for content in self.contents)
+        self.assertEqual(results["summary"], expected)
+        self.assertEqual(results["insight"], "I seem rested.")
+
+    def test_insight_is_streamed(self):
+        buffer = StreamBuffer()
+        with mock.patch("src.analysis.get_sentiments", side_effect=fake_sentiments), \
+                mock.patch("src.pulse.stream_weekly_insight", return_value=iter(["I noticed ", "calm."])):
+            with analysis_stages(self.contents, "text", insight_stream=buffer).start() as stages:
+                self.assertEqual(list(buffer), ["I noticed ", "calm."])
+                self.assertEqual(stages.wait()["insight"], "I noticed calm.")
+
+    def test_stages_batch_and_stay_in_process(self):
+        graph = analysis_stages(self.contents, "text")
+        self.assertEqual(graph.stages["statistics"].keywords, {"workers": 1})
+        self.assertEqual(aggregate_contents(self.contents, batch_size=3), aggregate_contents(self.contents))
+        with mock.patch("src.analysis.get_sentiments", side_effect=fake_sentiments) as sentiments:
+            self.assertEqual(batched_sentiments(self.contents, batch_size=3), fake_sentiments(self.contents))
+        self.assertEqual([len(call[0][0]) for call in sentiments.call_args_list], [3, 1])
+
+
+class TestRunPaths(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        today = date.today()
+        for offset in range(5):
+            day = today - timedelta(days=offset)
+            path = self.root / f"{day.year}" / f"{day.month:02d} {day:%b}" / f"{day:%b} {day.day:02d}.md"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"# Journal\nDay {offset}.\n")
+        for name, value in [("JOURNAL_DIR", self.root), ("SELECT_ENTRIES_BY", "date"), ("CONCURRENT_STAGES", True),
+                            ("start_fetch", lambda: None)]:
+            patcher = mock.patch.object(pulse, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_pulse(self, batch_size):
+        with mock.patch.object(pulse, "ANALYSIS_BATCH_SIZE", batch_size), \
+                mock.patch.object(pulse, "_run_stages") as stages, \
+                mock.patch.object(pulse, "analyze_entries", return_value={}) as analyze, \
+                mock.patch.object(pulse, "_render"), mock.patch("builtins.print"):
+            pulse.run(use_snapshot=False)
+        return stages, analyze
+
+    def test_short_window_runs_stages(self):
+        stages, analyze = self.run_pulse(batch_size=10)
+        self.assertEqual(len(stages.call_args[0][0]), 5)
+        analyze.assert_not_called()
+
+    def test_long_window_is_streamed(self):
+        stages, analyze = self.run_pulse(batch_size=2)
+        stages.assert_not_called()
+        # The entries read ahead come first, then the rest of the stream
+        self.assertEqual(len(list(analyze.call_args[0][0])), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import io
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from datetime import date, datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+from src.output import render_reminders
+from src.reminders import (AppleScriptProvider, CachedProvider, FakeProvider, FileProvider, ReminderFetch,
+                           RemindersUnavailable, make_reminder, parse_ics, provider_from_config)
+
+ICS = """BEGIN:VCALENDAR\r
+VERSION:2.0\r
+X-WR-CALNAME:Home\r
+BEGIN:VTODO\r
+UID:1\r
+SUMMARY:Water the plants\\, all of them\r
+DUE;VALUE=DATE:20250418\r
+DESCRIPTION:Kitchen first\\nthen the balcony\r
+END:VTODO\r
+BEGIN:VTODO\r
+UID:2\r
+SUMMARY:Call Anna about the long weekend and the train tick\r
+ ets\r
+DUE:20250417T090000Z\r
+END:VTODO\r
+BEGIN:VTODO\r
+UID:3\r
+SUMMARY:Already done\r
+STATUS:COMPLETED\r
+END:VTODO\r
+BEGIN:VTODO\r
+UID:4\r
+SUMMARY:Someday\r
+BEGIN:VALARM\r
+ACTION:DISPLAY\r
+DESCRIPTION:Reminder\r
+TRIGGER:-PT15M\r
+END:VALARM\r
+END:VTODO\r
+END:VCALENDAR\r
+"""
+
+
+class TestParsers(unittest.TestCase):
+    def test_parse_ics(self):
+        # The UTC due time is given in local time
+        due = datetime(2025, 4, 17, 9, tzinfo=timezone.utc).astimezone().replace(tzinfo=None).isoformat()
+        self.assertEqual(parse_ics(ICS), [
+            make_reminder("Call Anna about the long weekend and the train tickets", "Home", due),
+            make_reminder("Water the plants, all of them", "Home", "2025-04-18", "Kitchen first\nthen the balcony"),
+            make_reminder("Someday", "Home"),
+        ])
+
+    def test_file_provider_json(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        path = root / "todo.json"
+        path.write_text(json.dumps({"reminders": [
+            {"title": "Book dentist", "due": "2025-05-02"},
+            {"title": "Old one", "completed": True},
+            {"name": "Read", "list": "Books"},
+        ]}))
+        self.assertEqual(FileProvider(path).fetch(),
+                         [make_reminder("Book dentist", "todo", "2025-05-02"), make_reminder("Read", "Books")])
+        path.write_text("{not json")
+        with self.assertRaises(RemindersUnavailable):
+            FileProvider(path).fetch()
+        with self.assertRaises(RemindersUnavailable):
+            FileProvider(root / "missing.ics").fetch()
+
+    def test_applescript_provider(self):
+        output = "Home\tWater plants\t2025-04-18T09:00:00\nWork\tSend report\t\n\n"
+        runner = mock.Mock(return_value=subprocess.CompletedProcess([], 0, stdout=output, stderr=""))
+        self.assertEqual(AppleScriptProvider(runner=runner).fetch(), [
+            make_reminder("Water plants", "Home", "2025-04-18T09:00:00"),
+            make_reminder("Send report", "Work"),
+        ])
+        self.assertEqual(runner.call_args[0][0][0], "osascript")
+
+        for failure in (mock.Mock(return_value=subprocess.CompletedProcess([], 1, stdout="", stderr="denied")),
+                        mock.Mock(side_effect=subprocess.TimeoutExpired("osascript", 10)),
+                        mock.Mock(side_effect=FileNotFoundError("osascript")),
+                        mock.Mock(side_effect=PermissionError("osascript"))):
+            with self.assertRaises(RemindersUnavailable):
+                AppleScriptProvider(runner=failure).fetch()
+
+    def test_provider_from_config(self):
+        with mock.patch("src.reminders.get", return_value="none"):
+            self.assertIsNone(provider_from_config())
+        with mock.patch("src.reminders.get", return_value="auto"), mock.patch("src.reminders.sys.platform", "linux"):
+            self.assertIsNone(provider_from_config())
+        with mock.patch("src.reminders.get", return_value="~/todo.ics"):
+            self.assertIsInstance(provider_from_config(), FileProvider)
+
+
+class TestCachedProvider(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        self.now = 1000.0
+        self.fake = FakeProvider([make_reminder("Water plants")])
+
+    def cached(self, provider=None) -> CachedProvider:
+        return CachedProvider(provider or self.fake, ttl=60, path=self.root / "reminders.json", clock=lambda: self.now)
+
+    def test_fetch_is_reused_within_ttl_and_across_instances(self):
+        self.assertEqual(self.cached().fetch(), [make_reminder("Water plants")])
+        self.now += 30
+        self.assertEqual(self.cached().fetch(), [make_reminder("Water plants")])
+        self.assertEqual(self.fake.calls, 1)
+        self.now += 31
+        self.cached().fetch()
+        self.assertEqual(self.fake.calls, 2)
+
+    def test_stale_items_when_provider_fails(self):
+        self.cached().fetch()
+        self.now += 3600
+        self.fake.error = RemindersUnavailable("down")
+        self.assertEqual(self.cached().fetch(), [make_reminder("Water plants")])
+        with self.assertRaises(RemindersUnavailable):
+            CachedProvider(self.fake, path=self.root / "other.json").fetch()
+
+    def test_other_source_is_not_reused(self):
+        self.cached().fetch()
+        other = FakeProvider([make_reminder("Other")])
+        other.name = "other"
+        self.assertEqual(self.cached(other).fetch(), [make_reminder("Other")])
+
+
+class TestReminderFetch(unittest.TestCase):
+    def test_fetch_runs_in_background(self):
+        slow = FakeProvider([make_reminder("Water plants")], delay=0.2)
+        started = time.perf_counter()
+        fetch = ReminderFetch(slow)
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertEqual(fetch.result(timeout=2), [make_reminder("Water plants")])
+
+    def test_late_fetch_answers_with_last_items(self):
+        cached = CachedProvider(FakeProvider([make_reminder("Old")]), ttl=0)
+        cached.fetch()
+        cached.provider = FakeProvider([make_reminder("New")], delay=0.5)
+        fetch = ReminderFetch(cached)
+        self.assertEqual(fetch.result(timeout=0.05), [make_reminder("Old")])
+        self.assertEqual(fetch.result(timeout=2), [make_reminder("New")])
+
+    def test_failed_fetch_gives_no_items(self):
+        fetch = ReminderFetch(FakeProvider(error=RemindersUnavailable("down")))
+        self.assertEqual(fetch.result(timeout=1), [])
+
+    def test_unexpected_errors_never_raise(self):
+        with mock.patch("builtins.print") as printed:
+            fetch = ReminderFetch(CachedProvider(FakeProvider(error=PermissionError("denied"))))
+            self.assertEqual(fetch.result(timeout=1), [])
+        self.assertIn("PermissionError", printed.call_args[0][0])
+
+        cached = CachedProvider(FakeProvider([make_reminder("Old")]), ttl=0)
+        cached.fetch()
+        cached.provider = FakeProvider(error=ValueError("bad answer"))
+        with mock.patch("builtins.print"):
+            self.assertEqual(ReminderFetch(cached).result(timeout=1), [make_reminder("Old")])
+
+    def test_late_fetch_is_cached_at_exit(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        path = root / "reminders.json"
+        fetch = ReminderFetch(CachedProvider(FakeProvider([make_reminder("Water plants")], delay=0.2), path=path),
+                              exit_grace=2)
+        self.assertEqual(fetch.result(timeout=0.01), [])
+        fetch._finish()
+        self.assertEqual(CachedProvider(FakeProvider(), path=path).peek(), [make_reminder("Water plants")])
+
+    def test_unwritable_cache_keeps_items(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        (root / "file").write_text("")
+        cached = CachedProvider(FakeProvider([make_reminder("Water plants")]), path=root / "file" / "reminders.json")
+        with mock.patch("builtins.print") as printed:
+            self.assertEqual(ReminderFetch(cached).result(timeout=1), [make_reminder("Water plants")])
+        self.assertIn("could not cache reminders", printed.call_args[0][0])
+
+
+class TestRenderReminders(unittest.TestCase):
+    def test_render(self):
+        reminders = [make_reminder("Call Anna", "Home", "2025-04-15T09:00:00"),
+                     make_reminder("Water plants", "Home", "2025-04-18"), make_reminder("Read")]
+        out = io.StringIO()
+        with redirect_stdout(out):
+            render_reminders(reminders, limit=2, today=date(2025, 4, 17))
+        text = out.getvalue()
+        self.assertIn("- Call Anna (Home, due Apr 15, overdue)", text)
+        self.assertIn("- Water plants (Home, due Apr 18)\n", text)
+        self.assertIn("and 1 more", text)
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            render_reminders([])
+        self.assertEqual(out.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
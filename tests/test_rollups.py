@@ -0,0 +1,187 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from src.analysis import analyze_entries, set_partials_cache
+from src.journal_parser import is_journal_file
+from src.models.ollama import OllamaClient, set_client
+from src.models.sentiment import set_sentiment_cache
+from src.rollups import RollupStore, SlidingRange, merge_rollups, parse_range, summarize_rollup
+from src.utils.cache import PersistentCache
+from src.utils.manifest import ScanManifest
+
+WORDS = ["walk", "rain", "work", "tea", "friend", "book", "garden"]
+
+
+def fake_sentiments(texts):
+    return ["positive" if "happy" in text.lower() else "neutral" for text in texts]
+
+
+def fake_sentiments_with_source(texts):
+    return [(tone, "ollama") for tone in fake_sentiments(texts)]
+
+
+def note_path(root: Path, day: date) -> Path:
+    return root / f"{day.year}" / f"{day.month:02d} {day:%b}" / f"{day:%b} {day.day:02d}.md"
+
+
+class TestParseRange(unittest.TestCase):
+    def test_relative_ranges(self):
+        today = date(2025, 3, 31)
+        self.assertEqual(parse_range("7d", today), (date(2025, 3, 25), today))
+        self.assertEqual(parse_range("2w", today), (date(2025, 3, 18), today))
+        self.assertEqual(parse_range("1m", today), (date(2025, 3, 1), today))
+        self.assertEqual(parse_range("1y", today), (date(2024, 4, 1), today))
+        # The day of month is clamped to the shorter month
+        self.assertEqual(parse_range("1m", date(2025, 3, 30)), (date(2025, 3, 1), date(2025, 3, 30)))
+
+    def test_explicit_range(self):
+        self.assertEqual(parse_range("2025-01-01:2025-02-15"), (date(2025, 1, 1), date(2025, 2, 15)))
+
+    def test_invalid_ranges(self):
+        for text in ("", "week", "0d", "3x", "2025-02-01:2025-01-01", "2025-13-01:2025-12-31"):
+            with self.assertRaises(ValueError, msg=text):
+                parse_range(text, date(2025, 3, 31))
+
+
+class TestRollupStore(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        first = date(2025, 1, 20)
+        for offset in range(0, 50, 2):
+            day = first + timedelta(days=offset)
+            words = " ".join(WORDS[(offset + i) % len(WORDS)] for i in range(offset % 5 + 2))
+            mood = "happy" if offset % 3 == 0 else "tired"
+            self.write(day, f"{mood} {words}? #{WORDS[offset % 3]}")
+        set_partials_cache(PersistentCache())
+        patcher = mock.patch("src.rollups.get_sentiments_with_source", side_effect=fake_sentiments_with_source)
+        self.sentiments = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = RollupStore()
+        self.addCleanup(self.store.close)
+        self.manifest = ScanManifest(self.root, file_filter=is_journal_file)
+
+    def tearDown(self):
+        set_partials_cache(None)
+        shutil.rmtree(self.root)
+
+    def write(self, day: date, text: str) -> Path:
+        path = note_path(self.root, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# Journal\n{text}\n")
+        return path
+
+    def cold_summary(self, start: date, end: date):
+        entries = [{"content": (self.root / path).read_text()} for _, path in self.store.paths(start, end)]
+        with mock.patch("src.analysis.get_sentiments", side_effect=fake_sentiments):
+            return analyze_entries(entries)
+
+    def test_summary_matches_analyze_entries(self):
+        self.assertEqual(self.store.update(self.root, self.manifest)["updated"], 25)
+        # Whole months from the month rollups, edge days from the day rollups
+        for start, end in [(date(2025, 1, 25), date(2025, 3, 5)), (date(2025, 2, 1), date(2025, 2, 28)),
+                           (date(2025, 2, 3), date(2025, 2, 3)), (date(2024, 1, 1), date(2025, 12, 31))]:
+            summary = self.store.summarize(start, end)
+            self.assertEqual(summary.pop("entries"), len(self.store.paths(start, end)))
+            self.assertEqual(summary, self.cold_summary(start, end), msg=f"{start}:{end}")
+
+    def test_month_buckets_match_day_buckets(self):
+        self.store.update(self.root, self.manifest)
+        start, end = date(2025, 1, 1), date(2025, 3, 31)
+        days = merge_rollups(rollup for _, rollup in self.store.day_rollups(start, end))
+        self.assertEqual(self.store.rollup(start, end), days)
+
+    def test_update_is_incremental(self):
+        self.store.update(self.root, self.manifest)
+        self.sentiments.reset_mock()
+        self.assertEqual(self.store.update(self.root, self.manifest),
+                         {"updated": 0, "removed": 0, "unchanged": 25, "rescored": 0, "days": []})
+        self.sentiments.assert_not_called()
+
+        self.write(date(2025, 2, 1), "happy happy garden? #garden")
+        self.write(date(2025, 2, 2), "A happy new note")
+        note_path(self.root, date(2025, 3, 9)).unlink()
+        result = self.store.update(self.root, self.manifest)
+        self.assertEqual((result["updated"], result["removed"], result["unchanged"]), (2, 1, 23))
+        self.assertEqual(result["days"], ["2025-02-01", "2025-02-02", "2025-03-09"])
+        self.assertEqual(len(self.sentiments.call_args[0][0]), 2)
+
+        start, end = date(2025, 1, 1), date(2025, 3, 31)
+        summary = self.store.summarize(start, end)
+        self.assertEqual(summary.pop("entries"), 25)
+        self.assertEqual(summary, self.cold_summary(start, end))
+
+    def test_analysis_settings_change_rebuilds(self):
+        self.store.update(self.root, self.manifest)
+        with mock.patch("src.rollups.TOKENIZER", "fast"):
+            self.assertEqual(self.store.update(self.root, self.manifest)["updated"], 25)
+
+    def test_sliding_range_matches_store(self):
+        self.store.update(self.root, self.manifest)
+        sliding = SlidingRange(self.store)
+        start = date(2025, 1, 15)
+        for step in range(0, 60, 4):
+            window = (start + timedelta(days=step), start + timedelta(days=step + 20))
+            rollup = sliding.move(*window)
+            expected = self.store.rollup(*window)
+            self.assertEqual(summarize_rollup(rollup)["tone_summary"], summarize_rollup(expected)["tone_summary"])
+            for field in ("questions", "entries", "total_length"):
+                self.assertEqual(rollup[field], expected[field])
+            self.assertEqual(dict(rollup["words"]), dict(expected["words"]))
+            self.assertEqual(dict(rollup["tags"]), dict(expected["tags"]))
+
+        sliding.move(date(2025, 1, 20), date(2025, 2, 28))
+        self.write(date(2025, 2, 13), "happy #joy")
+        days = self.store.update(self.root, self.manifest)["days"]
+        rollup = sliding.refresh(days)
+        self.assertEqual(dict(rollup["tags"]), dict(self.store.rollup(date(2025, 1, 20), date(2025, 2, 28))["tags"]))
+        self.assertEqual(rollup["tags"]["joy"], 1)
+
+
+class TestFallbackTones(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        for day in range(1, 4):
+            path = note_path(self.root, date(2025, 4, day))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"# Journal\nA plain day number {day}.\n")
+        set_partials_cache(PersistentCache())
+        set_sentiment_cache(PersistentCache())
+        self.addCleanup(set_partials_cache, None)
+        self.addCleanup(set_sentiment_cache, None)
+        self.addCleanup(set_client, None)
+        self.store = RollupStore()
+        self.addCleanup(self.store.close)
+        self.manifest = ScanManifest(self.root, file_filter=is_journal_file)
+
+    def test_fallback_tones_are_rescored_when_ollama_recovers(self):
+        server = FakeOllamaServer(answer="positive")
+        with server:
+            url = server.url
+        # Nothing listens there any more: every note gets a fallback tone
+        set_client(OllamaClient(base_url=url))
+        with mock.patch("builtins.print"):
+            result = self.store.update(self.root, self.manifest)
+            self.assertEqual((result["updated"], result["rescored"]), (3, 0))
+            self.assertNotIn("positive", self.store.summarize(date(2025, 4, 1), date(2025, 4, 30))["tone_summary"])
+            # Still down: nothing to rescore yet
+            self.assertEqual(self.store.update(self.root, self.manifest)["rescored"], 0)
+
+        with FakeOllamaServer(answer="positive") as server:
+            set_client(OllamaClient(base_url=server.url))
+            result = self.store.update(self.root, self.manifest)
+        self.assertEqual((result["updated"], result["rescored"]), (0, 3))
+        self.assertEqual(result["days"], ["2025-04-01", "2025-04-02", "2025-04-03"])
+        summary = self.store.summarize(date(2025, 4, 1), date(2025, 4, 30))
+        self.assertEqual(summary["tone_summary"], {"positive": 3})
+        # Ollama's tones are kept
+        self.assertEqual(self.store.update(self.root, self.manifest)["rescored"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+
+from src.utils.metrics import Metrics, set_metrics
+from src.utils.scheduler import StageGraph, StreamBuffer
+
+
+class TestStageGraph(unittest.TestCase):
+    def test_dependencies_get_results(self):
+        graph = StageGraph()
+        graph.add("load", lambda: [1, 2, 3])
+        graph.add("total", lambda load: sum(load), after=["load"])
+        graph.add("count", lambda load: len(load), after=["load"])
+        graph.add("mean", lambda total, count: total / count, after=["total", "count"])
+        self.assertEqual(graph.run(), {"load": [1, 2, 3], "total": 6, "count": 3, "mean": 2.0})
+
+    def test_independent_stages_overlap(self):
+        graph = StageGraph()
+        for name in ("insight", "sentiment", "statistics"):
+            graph.add(name, lambda: time.sleep(0.2))
+        started = time.perf_counter()
+        graph.run()
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    def test_failure_skips_dependents_only(self):
+        ran = []
+        graph = StageGraph()
+        graph.add("broken", lambda: 1 / 0)
+        graph.add("fine", lambda: ran.append("fine") or "ok")
+        graph.add("after_broken", lambda broken: ran.append("after_broken"), after=["broken"])
+        graph.add("last", lambda after_broken, fine: ran.append("last"), after=["after_broken", "fine"])
+        with graph.start() as run:
+            self.assertEqual(run.result("fine"), "ok")
+            for name in ("broken", "after_broken", "last"):
+                with self.assertRaises(ZeroDivisionError):
+                    run.result(name)
+            with self.assertRaises(ZeroDivisionError):
+                run.wait()
+        self.assertEqual(ran, ["fine"])
+
+    def test_invalid_graphs(self):
+        graph = StageGraph().add("load", lambda: None)
+        with self.assertRaises(ValueError):
+            graph.add("load", lambda: None)
+        with self.assertRaises(ValueError):
+            graph.add("summary", lambda missing: None, after=["missing"])
+
+    def test_stages_are_timed_with_prefix(self):
+        metrics = Metrics()
+        set_metrics(metrics)
+        self.addCleanup(set_metrics, None)
+        StageGraph(prefix="pulse.").add("insight", lambda: None).run()
+        self.assertEqual(metrics.to_dict()["stages"]["pulse.insight"]["calls"], 1)
+
+
+class TestStreamBuffer(unittest.TestCase):
+    def test_pieces_are_read_while_produced(self):
+        buffer = StreamBuffer()
+        produced = threading.Event()
+
+        def pieces():
+            yield "I noticed "
+            produced.wait(1)
+            yield "calm."
+
+        graph = StageGraph().add("insight", lambda: buffer.fill(pieces()))
+        with graph.start() as run:
+            stream = iter(buffer)
+            self.assertEqual(next(stream), "I noticed ")
+            self.assertFalse(run.futures["insight"].done())
+            produced.set()
+            self.assertEqual(list(stream), ["calm."])
+            self.assertEqual(run.result("insight"), "I noticed calm.")
+
+    def test_failed_stream_ends(self):
+        buffer = StreamBuffer()
+
+        def pieces():
+            yield "Partial"
+            raise ConnectionError("dropped")
+
+        with self.assertRaises(ConnectionError):
+            buffer.fill(pieces())
+        self.assertEqual(list(buffer), ["Partial"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from src.journal_parser import is_journal_file, note_date_from_path
+from src.search import SearchIndex
+from src.utils.manifest import ScanManifest
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.journal = self.test_dir / "Journal"
+        self.month = self.journal / "2025" / "04 Apr"
+        self.month.mkdir(parents=True)
+        self._write("Apr 17.md", "---\ntags: x\n---\n# Tasks\n- [ ] rain boots\n# Journal\nWalked with [[Anna]] in the rain.\n")
+        self._write("Apr 18.md", "# Journal\nLong meeting at work. Tired.\n")
+        self._write("Apr 19.md", "# Journal\nRain again, walking to work.\n")
+        self.index = SearchIndex()
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, name, text):
+        path = self.month / name
+        path.write_text(text)
+        st = path.stat()
+        # Make sure rewrites are seen as changes
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def _update(self):
+        manifest = ScanManifest(self.journal, self.test_dir / "manifest.json", file_filter=is_journal_file).load()
+        return self.index.update(self.journal, manifest)
+
+    def test_search_returns_ranked_results_with_dates(self):
+        self.assertEqual(self._update(), {"indexed": 3, "removed": 0, "unchanged": 0})
+        results = self.index.search("rain walk")
+        self.assertEqual(sorted(r["date"] for r in results), [date(2025, 4, 17), date(2025, 4, 19)])
+        self.assertEqual({r["path"] for r in results}, {"2025/04 Apr/Apr 17.md", "2025/04 Apr/Apr 19.md"})
+        self.assertGreaterEqual(results[0]["score"], results[1]["score"])
+        self.assertIn("[rain]", results[0]["snippet"].lower())
+
+    def test_only_journal_section_is_indexed(self):
+        self._update()
+        self.assertEqual(self.index.search("boots"), [])
+        self.assertEqual(len(self.index.search("anna")), 1)
+
+    def test_incremental_update(self):
+        self._update()
+        self.assertEqual(self._update(), {"indexed": 0, "removed": 0, "unchanged": 3})
+
+        self._write("Apr 18.md", "# Journal\nQuiet day, read a book.\n")
+        (self.month / "Apr 19.md").unlink()
+        self.assertEqual(self._update(), {"indexed": 1, "removed": 1, "unchanged": 1})
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.search("meeting"), [])
+        self.assertEqual([r["path"] for r in self.index.search("book")], ["2025/04 Apr/Apr 18.md"])
+        self.assertEqual([r["path"] for r in self.index.search("work")], [])
+
+    def test_date_filters_and_syntax(self):
+        self._update()
+        results = self.index.search("rain", since=date(2025, 4, 18))
+        self.assertEqual([r["date"] for r in results], [date(2025, 4, 19)])
+        # FTS5 operators in plain queries are treated as words
+        self.assertEqual(self.index.search('rain" OR "meeting'), [])
+        self.assertEqual(len(self.index.search("rain OR meeting", raw=True)), 3)
+
+    def test_note_date_from_path(self):
+        self.assertEqual(note_date_from_path("2024/12 Dec/Dec 03.md"), date(2024, 12, 3))
+        self.assertIsNone(note_date_from_path("12 Dec/Dec 03.md"))
+        self.assertIsNone(note_date_from_path("2024/12 Dec/notes.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold-start target: importing the application (everything `python -m main`
+# loads before it starts scanning) must stay under this many seconds.
+STARTUP_BUDGET_SECONDS = 0.5
+
+# Dependencies that must only be loaded once they are actually used
+HEAVY_MODULES = ("nltk", "textblob", "requests", "numpy")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main, src.pulse
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def run_probe():
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_dependencies_are_lazy(self):
+        self.assertEqual(run_probe()["loaded"], [])
+
+    def test_import_time_budget(self):
+        best = min(run_probe()["elapsed"] for _ in range(3))
+        self.assertLess(best, STARTUP_BUDGET_SECONDS,
+                        f"Importing the app took {best:.3f}s (budget {STARTUP_BUDGET_SECONDS}s)")
+
+
+if __name__ == "__main__":
+    unittest.main()
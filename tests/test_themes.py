@@ -0,0 +1,87 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.themes import build_doc_term_matrix, find_themes, period_key, render_themes, spherical_kmeans
+
+TOPICS = {
+    "work": "meeting deadline project manager email report office client".split(),
+    "sea": "sea waves beach swim sand wind boat shore".split(),
+    "family": "mom dad sister dinner kids birthday cousin grandma".split(),
+}
+
+
+def make_entries(count, seed=1):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        # The sea theme only starts in the second half
+        topic = ["work", "family"][i % 2] if i < count // 2 else ["work", "sea"][i % 2]
+        words = [rng.choice(TOPICS[topic]) for _ in range(20)]
+        entries.append({"content": " ".join(words), "date": date(2025, 1, 1) + timedelta(days=i), "topic": topic})
+    return entries
+
+
+class TestDocTermMatrix(unittest.TestCase):
+    def test_tfidf_rows_are_normalized(self):
+        matrix = build_doc_term_matrix(["sea waves sea", "sea boat", "boat waves", "unique"], stopwords=set(),
+                                       max_df=1.0)
+        self.assertEqual(matrix.vocabulary, ["boat", "sea", "waves"])
+        self.assertEqual(matrix.shape, (4, 3))
+        dense = matrix.dense_rows(range(4))
+        np.testing.assert_allclose(np.linalg.norm(dense[:3], axis=1), 1.0)
+        self.assertFalse(dense[3].any())
+        # "sea" occurs twice in the first entry, so it outweighs "waves"
+        self.assertGreater(dense[0, 1], dense[0, 2])
+
+    def test_dot_matches_dense_product(self):
+        matrix = build_doc_term_matrix([e["content"] for e in make_entries(30)], stopwords=set(), max_df=1.0)
+        centroids = np.random.default_rng(0).standard_normal((3, matrix.shape[1]))
+        np.testing.assert_allclose(matrix.dot(centroids), matrix.dense_rows(range(30)) @ centroids.T)
+
+
+class TestThemes(unittest.TestCase):
+    def test_kmeans_recovers_topics(self):
+        entries = make_entries(120)
+        matrix = build_doc_term_matrix([e["content"] for e in entries], stopwords=set())
+        labels, centroids = spherical_kmeans(matrix, 3, seed=0)
+        self.assertEqual(centroids.shape, (3, matrix.shape[1]))
+        for topic in TOPICS:
+            topic_labels = {label for label, e in zip(labels, entries) if e["topic"] == topic}
+            self.assertEqual(len(topic_labels), 1, topic)
+
+    def test_themes_have_terms_and_trends(self):
+        result = find_themes(make_entries(120), k=3, period="month", stopwords=set())
+        self.assertEqual(result["periods"], ["2025-01", "2025-02", "2025-03", "2025-04"])
+        self.assertEqual(result["unclustered"], 0)
+        sea = next(t for t in result["themes"] if set(t["top_terms"]) <= set(TOPICS["sea"]))
+        family = next(t for t in result["themes"] if set(t["top_terms"]) <= set(TOPICS["family"]))
+        self.assertEqual(sea["direction"], "rising")
+        self.assertEqual(family["direction"], "falling")
+        self.assertEqual(sea["trend"]["2025-01"], 0.0)
+
+    def test_period_key(self):
+        self.assertEqual(period_key(date(2025, 4, 17), "month"), "2025-04")
+        self.assertEqual(period_key(date(2025, 4, 17), "week"), "2025-W16")
+        with self.assertRaises(ValueError):
+            period_key(date(2025, 4, 17), "year")
+
+    def test_empty_input(self):
+        self.assertEqual(find_themes([], stopwords=set()), {"periods": [], "themes": [], "unclustered": 0})
+
+    def test_undated_entries_render(self):
+        entries = [{"content": entry["content"], "date": None} for entry in make_entries(10)]
+        result = find_themes(entries, k=2, stopwords=set())
+        self.assertEqual(result["periods"], [])
+        out = io.StringIO()
+        with redirect_stdout(out):
+            render_themes(result)
+        self.assertIn("2 themes (the entries have no dates", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from src.utils.tokenizers import fast_tokenize, get_tokenizer, nltk_tokenize
+
+STOPWORDS = {"i", "do", "it", "was", "the", "and", "s", "a", "could"}
+
+
+class TestTokenizers(unittest.TestCase):
+    def test_fast_tokenizer_filters_stopwords_and_punctuation(self):
+        words, count = fast_tokenize("i couldn't sleep, and it was anna's e-mail!", STOPWORDS)
+        self.assertEqual(words, ["sleep", "anna"])
+        self.assertEqual(count, 12)
+
+    def test_backends_agree_on_simple_text(self):
+        text = "today i felt really calm and grateful. why do i still feel tired? stillness matters."
+        self.assertEqual(nltk_tokenize(text, STOPWORDS)[0], fast_tokenize(text, STOPWORDS)[0])
+
+    def test_unknown_backend(self):
+        self.assertIs(get_tokenizer("fast"), fast_tokenize)
+        with self.assertRaises(ValueError):
+            get_tokenizer("spacy")
+
+
+if __name__ == "__main__":
+    unittest.main()
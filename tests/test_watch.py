@@ -0,0 +1,222 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+from src import pulse
+from src.analysis import analyze_entries, set_partials_cache
+from src.journal_parser import is_journal_file, load_recent_entries
+from src.rollups import RollupStore, parse_range
+from src.utils.cache import PersistentCache
+from src.utils.manifest import ScanManifest
+from src.watch import InotifyWatcher, PollingWatcher, WarmRange, WarmSummary, watch, write_snapshot
+
+
+def fake_sentiments(texts):
+    return ["positive" if "happy" in text.lower() else "neutral" for text in texts]
+
+
+def fake_sentiments_with_source(texts):
+    return [(tone, "ollama") for tone in fake_sentiments(texts)]
+
+
+def note_path(root: Path, day: date) -> Path:
+    return root / f"{day.year}" / f"{day.month:02d} {day:%b}" / f"{day:%b} {day.day:02d}.md"
+
+
+class TestWarmSummary(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.today = date.today()
+        for offset, text in [(0, "Happy walk? #walk"), (1, "Rainy day, calm evening."), (3, "Work work #work")]:
+            self.write(self.today - timedelta(days=offset), text)
+        self.old = self.write(self.today - timedelta(days=40), "Old happy note", age_days=40)
+        set_partials_cache(PersistentCache())
+        patcher = mock.patch("src.watch.get_sentiments", side_effect=fake_sentiments)
+        self.sentiments = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        set_partials_cache(None)
+        shutil.rmtree(self.root)
+
+    def write(self, day: date, text: str, age_days: float = 0) -> Path:
+        path = note_path(self.root, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# Journal\n{text}\n")
+        if age_days:
+            mtime = time.time() - age_days * 86400
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_summary_matches_analyze_entries(self):
+        state = WarmSummary(self.root, days_back=7, section_only=False)
+        self.assertEqual(state.reload(), 3)
+        since = datetime.now() - timedelta(days=7)
+        with mock.patch("src.analysis.get_sentiments", side_effect=fake_sentiments):
+            cold = analyze_entries(sorted(load_recent_entries(self.root, since), key=lambda e: str(e["path"])))
+        self.assertEqual(state.summary(), cold)
+        self.assertIn("Happy walk? #walk", state.insight_text())
+
+    def test_update_reprocesses_only_touched_notes(self):
+        state = WarmSummary(self.root, days_back=7, section_only=False)
+        state.reload()
+        edited = self.write(self.today, "Happy again? Yes? #walk #joy")
+        added = self.write(self.today - timedelta(days=2), "A happy new note")
+        removed = note_path(self.root, self.today - timedelta(days=3))
+        removed.unlink()
+        self.sentiments.reset_mock()
+
+        self.assertEqual(state.update([edited, added, removed, self.old]), 2)
+        self.assertEqual(len(self.sentiments.call_args[0][0]), 2)
+        summary = state.summary()
+        self.assertEqual(summary["questions_count"], 2)
+        self.assertEqual(dict(summary["tags"]), {"walk": 1, "joy": 1})
+        self.assertEqual(summary["tone_summary"], {"positive": 2, "neutral": 1})
+        # Unchanged notes are not read again
+        self.assertEqual(state.update([edited]), 0)
+
+    def test_window_by_note_date_and_prune(self):
+        state = WarmSummary(self.root, days_back=7, select_by="date", section_only=False)
+        state.reload()
+        self.assertEqual(len(state.notes), 3)
+        state.days_back = 2
+        self.assertEqual(state.prune(), 1)
+        self.assertEqual(len(state.notes), 2)
+
+    def test_watch_writes_snapshot_that_pulse_accepts(self):
+        state = WarmSummary(self.root, days_back=7, section_only=False)
+        state.reload()
+        snapshot_path = self.root / "cache" / "snapshot.json"
+        watcher = mock.Mock()
+        watcher.wait.return_value = ({self.write(self.today, "Happy happy")}, False)
+        with mock.patch("builtins.print"):
+            watch(state, watcher, snapshot_path=snapshot_path, rounds=1)
+
+        snapshot = pulse.load_watch_snapshot(snapshot_path)
+        self.assertEqual(snapshot["entries"], 3)
+        self.assertEqual(snapshot["summary"]["tone_summary"], {"positive": 1, "neutral": 2})
+        self.assertIsNone(pulse.load_watch_snapshot(snapshot_path, max_age=-1))
+        with mock.patch("src.pulse.snapshot_settings", return_value={"journal_dir": "elsewhere"}):
+            self.assertIsNone(pulse.load_watch_snapshot(snapshot_path))
+
+        data = json.loads(snapshot_path.read_text())
+        data["pid"] = 2 ** 22 + 12345  # above the default pid_max, so never running
+        snapshot_path.write_text(json.dumps(data))
+        self.assertIsNone(pulse.load_watch_snapshot(snapshot_path))
+        # A missing or bogus pid would make os.kill signal a process group
+        for pid in (None, 0, -1):
+            if pid is None:
+                data.pop("pid")
+            else:
+                data["pid"] = pid
+            snapshot_path.write_text(json.dumps(data))
+            with mock.patch("src.pulse.os.kill") as kill:
+                self.assertIsNone(pulse.load_watch_snapshot(snapshot_path), msg=pid)
+            kill.assert_not_called()
+
+    def test_warm_range_slides_over_the_store(self):
+        store = RollupStore()
+        self.addCleanup(store.close)
+        warm_range = WarmRange("30d", store, self.root, ScanManifest(self.root, file_filter=is_journal_file))
+        with mock.patch("src.rollups.get_sentiments_with_source", side_effect=fake_sentiments_with_source):
+            result = warm_range.update()
+            start, end = parse_range("30d")
+            self.assertEqual((result["start"], result["end"]), (start.isoformat(), end.isoformat()))
+            self.assertEqual(result["summary"]["entries"], 3)
+
+            self.write(self.today - timedelta(days=2), "Another happy day #joy")
+            summary = warm_range.update()["summary"]
+            expected = store.summarize(start, end)
+            # Tied tags may be listed in another order (see SlidingRange)
+            self.assertEqual(dict(summary["tags"]), dict(expected["tags"]))
+            for field in ("entries", "tone_summary", "questions_count"):
+                self.assertEqual(summary[field], expected[field], msg=field)
+            self.assertEqual(summary["tone_summary"], {"positive": 2, "neutral": 2})
+
+            # Moving back in time, only the old note is left in the range
+            summary = warm_range.update(today=self.today - timedelta(days=15))["summary"]
+            self.assertEqual((summary["entries"], summary["tone_summary"]), (1, {"positive": 1}))
+
+    def test_range_pulse_answers_from_snapshot(self):
+        store = RollupStore()
+        self.addCleanup(store.close)
+        state = WarmSummary(self.root, days_back=7, section_only=False)
+        state.reload()
+        warm_range = WarmRange("30d", store, self.root, ScanManifest(self.root, file_filter=is_journal_file))
+        with mock.patch("src.rollups.get_sentiments_with_source", side_effect=fake_sentiments_with_source):
+            snapshot_path = write_snapshot(state, self.root / "cache" / "snapshot.json", warm_range.update())
+        snapshot = pulse.load_watch_snapshot(snapshot_path)
+
+        rollups = mock.Mock(wraps=store)
+        rollups.update.return_value = {"updated": 0, "removed": 0}
+        rollups.close = mock.Mock()
+        with mock.patch("src.pulse.load_watch_snapshot", return_value=snapshot), \
+                mock.patch("src.pulse.open_rollups", return_value=rollups), \
+                mock.patch("src.pulse.JOURNAL_DIR", self.root), mock.patch("src.pulse.start_fetch", return_value=None), \
+                mock.patch("src.pulse._render") as render, mock.patch("builtins.print"):
+            pulse.run_range(*parse_range("30d"))
+            rollups.update.assert_not_called()
+            self.assertEqual(render.call_args[0][0], snapshot["range"]["summary"])
+            self.assertIn("Happy walk? #walk", render.call_args[0][1])
+
+            # Another range is not answered from the snapshot
+            pulse.run_range(*parse_range("60d"))
+            rollups.update.assert_called_once()
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.month = self.root / "2025" / "04 Apr"
+        self.month.mkdir(parents=True)
+        (self.month / "Apr 16.md").write_text("Before.")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def change_later(self):
+        def change():
+            time.sleep(0.1)
+            (self.month / "Apr 16.md").unlink()
+            (self.month / "Apr 17.md").write_text("Written.")
+            new_month = self.root / "2025" / "05 May"
+            new_month.mkdir()
+            (new_month / "May 01.md").write_text("In a new folder.")
+
+        thread = threading.Thread(target=change)
+        thread.start()
+        return thread
+
+    def expected(self):
+        return {self.month / "Apr 16.md", self.month / "Apr 17.md", self.root / "2025" / "05 May" / "May 01.md"}
+
+    def test_polling_watcher(self):
+        watcher = PollingWatcher(self.root, interval=0.05)
+        self.assertEqual(watcher.wait(timeout=0.1), (set(), False))
+        thread = self.change_later()
+        thread.join()
+        self.assertEqual(watcher.wait(timeout=1), (self.expected(), False))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher(self.root)
+        except OSError as e:
+            self.skipTest(f"inotify unavailable: {e}")
+        self.addCleanup(watcher.close)
+        self.assertEqual(watcher.wait(timeout=0.05), (set(), False))
+        thread = self.change_later()
+        paths, rescan = watcher.wait(timeout=2)
+        thread.join()
+        self.assertFalse(rescan)
+        self.assertEqual(paths, self.expected())
+
+
+if __name__ == "__main__":
+    unittest.main()